@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import sys
 import os
+import time
 import logging
 
 sys.path.append(
@@ -22,11 +25,32 @@ from src.routes.after_service_route import router as after_service_router
 # It also includes the classification logic to route messages to either FAQ or after-service handling.
 # The chat route is designed to be flexible and can be extended in the future to include more features or services.
 from src.routes.chat_route import router as chat_router
+from src.core.config import SLOW_REQUEST_LOG_MS
+from src.core.logger import setup_logging, stop_logging
+from src.core.metrics import HTTP_REQUEST_SECONDS, current_trace, registry, start_trace
+from src.core.startup import readiness, warm_up
+from src.utils.local_intent_model import flush_decisions
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+
+    # Connections, models and indexes are ready before the first request is accepted
+    await warm_up()
+    yield
+    flush_decisions()
+    stop_logging()
+
 
 app = FastAPI(
     title="Vexere Server",
     version="1.0",
     description="This is the Vexere server API.",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -39,25 +63,66 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start_trace()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        # Route template, not the raw path, so ids do not explode the label set
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(
+            elapsed, method=request.method, route=route, status=status
+        )
+        if elapsed * 1000 >= SLOW_REQUEST_LOG_MS:
+            logger.warning(
+                "Slow request",
+                extra={
+                    "method": request.method,
+                    "route": route,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "spans": [
+                        {
+                            "stage": stage,
+                            "offset_ms": offset,
+                            "duration_ms": duration,
+                            "error": error,
+                        }
+                        for stage, offset, duration, error in current_trace()
+                    ],
+                },
+            )
+
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/ready")
+def ready():
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
 app.include_router(faq_router, prefix="/api/faq")
 app.include_router(after_service_router, prefix="/api/after-service")
 # MAIN ROUTE
 app.include_router(chat_router, prefix="/api/chat")
 
 
-@app.on_event("startup")
-async def startup_event():
-    logger = logging.getLogger("uvicorn.access")
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    logger.addHandler(handler)
-
-
 if __name__ == "__main__":
     import uvicorn
 
@@ -25,3 +25,119 @@ MILVUS_CLOUD_DB_NAME = os.getenv("MILVUS_CLOUD_DB_NAME")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 BACKEND_URL = os.getenv("BACKEND_URL")
+
+# After-service session (slot filling) configuration
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "900"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+# Classification cache configuration
+CLASSIFICATION_CACHE_TTL_SECONDS = int(
+    os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "3600")
+)
+CLASSIFICATION_CACHE_MAX_ENTRIES = int(
+    os.getenv("CLASSIFICATION_CACHE_MAX_ENTRIES", "5000")
+)
+
+# Local intent model (trained from logged LLM decisions)
+INTENT_DECISION_LOG_PATH = os.getenv(
+    "INTENT_DECISION_LOG_PATH", "data/intent_decisions.jsonl"
+)
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "data/intent_model.npz")
+LOCAL_INTENT_THRESHOLD = float(os.getenv("LOCAL_INTENT_THRESHOLD", "0.85"))
+
+# Prototype (centroid) router thresholds on cosine similarity
+PROTOTYPE_ROUTER_MIN_SCORE = float(os.getenv("PROTOTYPE_ROUTER_MIN_SCORE", "0.82"))
+PROTOTYPE_ROUTER_MIN_MARGIN = float(os.getenv("PROTOTYPE_ROUTER_MIN_MARGIN", "0.02"))
+
+FAQ_DATA_PATH = os.getenv(
+    "FAQ_DATA_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "mock", "faq.json")),
+)
+
+# Lexical (BM25) FAQ retrieval: normalized score and lead over the runner-up
+LEXICAL_DECISIVE_SCORE = float(os.getenv("LEXICAL_DECISIVE_SCORE", "0.6"))
+LEXICAL_DECISIVE_RATIO = float(os.getenv("LEXICAL_DECISIVE_RATIO", "1.3"))
+
+# Milvus index profile: FLAT, IVF_FLAT, HNSW or IVF_SQ8 (see schema/index_profiles.py)
+MILVUS_INDEX_PROFILE = os.getenv("MILVUS_INDEX_PROFILE", "IVF_FLAT")
+
+# Milvus search micro-batching
+MILVUS_SEARCH_BATCH_MAX_SIZE = int(os.getenv("MILVUS_SEARCH_BATCH_MAX_SIZE", "32"))
+MILVUS_SEARCH_BATCH_MAX_WAIT_MS = float(
+    os.getenv("MILVUS_SEARCH_BATCH_MAX_WAIT_MS", "3")
+)
+
+# OpenAI embedding micro-batching (concurrent embed_query calls -> one embed_documents)
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+# Storage of in-memory embeddings (prototype centroids): float32, float16 or int8
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32").lower()
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+
+# Embedding provider: "openai" (remote) or "local" (in-process CPU sentence-transformers model)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+# Client-side tiktoken chunking of long inputs; needs the tiktoken BPE files (network on first use)
+OPENAI_EMBEDDING_TOKENIZE = os.getenv("OPENAI_EMBEDDING_TOKENIZE", "true").lower() == "true"
+LOCAL_EMBEDDING_MODEL = os.getenv(
+    "LOCAL_EMBEDDING_MODEL",
+    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+)
+# "torch" or "onnx"; LOCAL_EMBEDDING_ONNX_FILE picks a quantized export, e.g. onnx/model_qint8_avx2.onnx
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch").lower()
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE")
+# Vector score above which a message is routed straight to the FAQ (model dependent)
+FAQ_MATCH_MIN_SCORE = float(os.getenv("FAQ_MATCH_MIN_SCORE", "0.85"))
+
+# Upper bound for the startup warm-up before the app starts serving anyway
+STARTUP_WARMUP_TIMEOUT_SECONDS = float(os.getenv("STARTUP_WARMUP_TIMEOUT_SECONDS", "60"))
+
+# Requests slower than this log their per-stage span breakdown
+SLOW_REQUEST_LOG_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", "2000"))
+
+# Logging: level, "json" or "text" output, and the share of DEBUG/INFO records kept
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Shared state (caches, sessions, OpenAI rate-limit cooldowns): "memory" (per process) or "redis"
+# (shared by every worker; required for consistent sessions with --workers N)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "vexere-agent")
+
+# OpenAI outbound gateway. Per-model limits as model=requests_per_minute:tokens_per_minute,
+# comma separated (e.g. gpt-4o-mini=500:200000); unlisted models are not rate limited.
+# Limits apply per worker process.
+OPENAI_RATE_LIMITS = os.getenv("OPENAI_RATE_LIMITS", "")
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("OPENAI_QUEUE_TIMEOUT_SECONDS", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_MAX_WAIT_SECONDS = float(os.getenv("OPENAI_RETRY_MAX_WAIT_SECONDS", "20"))
+
+# Latency budget of one chat turn and per-stage timeouts, in seconds. A turn past its
+# deadline is answered with the best lexical FAQ match instead of waiting on upstreams.
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "8"))
+EMBED_TIMEOUT_SECONDS = float(os.getenv("EMBED_TIMEOUT_SECONDS", "2"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "1"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "6"))
+# Hedged duplicate of embedding/search requests slower than their recent p95
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "true").lower() == "true"
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "20"))
+
+# Circuit breakers around Milvus, OpenAI and the backend: consecutive failures that open
+# a breaker, and seconds before one probe call is let through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Chat-history writes kept in memory while the backend is down, replayed on recovery
+PENDING_WRITES_MAX_ENTRIES = int(os.getenv("PENDING_WRITES_MAX_ENTRIES", "10000"))
+
+# Speculative FAQ answers: when routing falls through to the LLM but the vector or prototype
+# score already leans FAQ (at least SPECULATIVE_FAQ_MIN_SCORE), the FAQ answer is generated
+# alongside the routing call and discarded if the route turns out different. At most
+# SPECULATIVE_MAX_PER_MINUTE drafts per worker (must be positive) cap the extra LLM spend.
+SPECULATIVE_ANSWERS = os.getenv("SPECULATIVE_ANSWERS", "false").lower() == "true"
+SPECULATIVE_FAQ_MIN_SCORE = float(os.getenv("SPECULATIVE_FAQ_MIN_SCORE", "0.7"))
+SPECULATIVE_MAX_PER_MINUTE = float(os.getenv("SPECULATIVE_MAX_PER_MINUTE", "60"))
@@ -0,0 +1,275 @@
+"""
+Dependency-free metrics: counters, histograms, a per-request span recorder and the
+Prometheus text format served at /metrics.
+"""
+
+import time
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers cached lookups (ms) up to slow LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# Shared section, from here to the registry instance: identical in the agent and server
+# copies of this file, which are deployed separately and share no package. Change both
+# (scripts/check_shared_copies.py compares them); buckets and metrics below stay per
+# service.
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(
+    labelnames: Sequence[str], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._values.get(key)
+        return int(series[-2]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {series[-2]}")
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+# End of shared section
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "agent_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = registry.histogram(
+    "agent_stage_duration_seconds",
+    "Latency of one chat pipeline stage",
+    ["stage"],
+)
+STAGE_ERRORS = registry.counter(
+    "agent_stage_errors_total",
+    "Chat pipeline stages that raised",
+    ["stage"],
+)
+ROUTE_DECISIONS = registry.counter(
+    "agent_route_decisions_total",
+    "Turn classifications by deciding source and route",
+    ["source", "route"],
+)
+LLM_TOKENS = registry.counter(
+    "agent_llm_tokens_total",
+    "OpenAI tokens used, by model and kind (prompt/completion)",
+    ["model", "kind"],
+)
+LLM_COST = registry.counter(
+    "agent_llm_cost_usd_total",
+    "Estimated OpenAI spend in USD",
+    ["model"],
+)
+OPENAI_REQUESTS = registry.counter(
+    "agent_openai_requests_total",
+    "OpenAI calls through the gateway by outcome (ok, error, rejected, circuit_open)",
+    ["model", "outcome"],
+)
+OPENAI_RETRIES = registry.counter(
+    "agent_openai_retries_total",
+    "OpenAI calls retried by the gateway, by error type",
+    ["model", "error"],
+)
+OPENAI_WAIT_SECONDS = registry.histogram(
+    "agent_openai_wait_seconds",
+    "Time OpenAI calls waited for rate (token buckets) or queue (concurrency) capacity",
+    ["model", "reason"],
+)
+DEADLINE_EXCEEDED = registry.counter(
+    "agent_deadline_exceeded_total",
+    "Stages abandoned because their timeout or the turn deadline passed",
+    ["stage"],
+)
+HEDGED_REQUESTS = registry.counter(
+    "agent_hedged_requests_total",
+    "Duplicate upstream requests sent after the p95 delay, and how often they won",
+    ["stage", "outcome"],
+)
+CIRCUIT_TRANSITIONS = registry.counter(
+    "agent_circuit_transitions_total",
+    "Circuit breaker state changes by dependency and new state",
+    ["breaker", "state"],
+)
+BACKEND_PENDING_WRITES = registry.counter(
+    "agent_backend_pending_writes_total",
+    "Chat-history writes queued while the backend was down, replayed or dropped",
+    ["outcome"],
+)
+SPECULATIVE_DRAFTS = registry.counter(
+    "agent_speculative_drafts_total",
+    "FAQ answers drafted alongside the routing LLM "
+    "(started, used, discarded, cancelled before starting, capped)",
+    ["outcome"],
+)
+SPECULATIVE_SAVED_SECONDS = registry.histogram(
+    "agent_speculative_saved_seconds",
+    "Latency saved by each used speculative FAQ answer",
+)
+EMBEDDING_TEXTS = registry.counter(
+    "agent_embedding_texts_total",
+    "Texts sent to the embedding provider",
+    ["provider"],
+)
+
+# Spans of the current request: (stage, start offset ms, duration ms, error)
+_trace: ContextVar[Optional[List[Tuple[str, float, float, bool]]]] = ContextVar(
+    "trace", default=None
+)
+_trace_start: ContextVar[float] = ContextVar("trace_start", default=0.0)
+
+
+def start_trace() -> None:
+    _trace.set([])
+    _trace_start.set(time.perf_counter())
+
+
+def current_trace() -> List[Tuple[str, float, float, bool]]:
+    return list(_trace.get() or [])
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block into agent_stage_duration_seconds and the current request trace"""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _trace.get()
+        if spans is not None:
+            offset = (started - _trace_start.get()) * 1000
+            spans.append((stage, round(offset, 1), round(elapsed * 1000, 1), error))
+
+
+def traced(stage: str) -> Callable:
+    """Decorator form of span() for sync and async functions"""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
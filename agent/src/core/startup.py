@@ -0,0 +1,183 @@
+import asyncio
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+from src.core.config import STARTUP_WARMUP_TIMEOUT_SECONDS
+from src.integrates.llm import DEFAULT_CHAT_MODEL, warm_up_llm
+from src.integrates.milvus import get_milvus_client
+from src.integrates.openai_gateway import background_priority
+from src.utils.circuit_breaker import OPEN, add_close_listener, breaker_states
+from src.utils.lexical_index import get_lexical_index
+from src.utils.local_intent_model import get_local_intent_model
+from src.utils.prototype_router import build_prototype_router
+
+logger = logging.getLogger(__name__)
+
+# The app can answer correctly only when these are up; the others just make it faster
+REQUIRED_CHECKS = ("milvus", "embeddings", "llm")
+
+
+class Readiness:
+    """
+    Outcome of each warm-up step, reported by /ready. Readiness itself is computed on
+    every call from the warm-up outcome, the Milvus connection and the circuit breakers,
+    so a dependency that goes down (or comes back) shows up without a restart.
+    """
+
+    def __init__(self):
+        self.finished = False
+        self.checks: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, ok: bool, started: float, error: str = None) -> None:
+        self.checks[name] = {
+            "ok": ok,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": error,
+        }
+
+    def passed(self, name: str) -> bool:
+        return bool(self.checks.get(name, {}).get("ok"))
+
+    def live(self) -> Dict[str, bool]:
+        """Whether each required dependency is usable right now"""
+        circuits = breaker_states()
+        milvus = get_milvus_client()
+        embeddings = milvus.embeddings
+        return {
+            # Milvus reconnects on its own, so the warm-up outcome does not matter here
+            "milvus": bool(milvus.connected) and circuits.get("milvus") != OPEN,
+            "embeddings": self.passed("embeddings")
+            and embeddings is not None
+            and circuits.get(f"openai:{embeddings.model}") != OPEN,
+            "llm": self.passed("llm")
+            and circuits.get(f"openai:{DEFAULT_CHAT_MODEL}") != OPEN,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(self.live().values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        live = self.live()
+        return {
+            "ready": self.finished and all(live.values()),
+            "finished": self.finished,
+            "live": live,
+            "checks": self.checks,
+            "circuits": breaker_states(),
+        }
+
+
+readiness = Readiness()
+
+
+def _run_check(name: str, fn: Callable[[], Any]) -> bool:
+    started = time.perf_counter()
+    try:
+        # Warm-up calls queue behind user traffic
+        with background_priority():
+            fn()
+        readiness.record(name, True, started)
+        return True
+    except Exception as e:
+        logger.error("Startup check %s failed: %s", name, e)
+        readiness.record(name, False, started, str(e))
+        return False
+
+
+async def _check(name: str, fn: Callable[[], Any]) -> bool:
+    return await asyncio.to_thread(_run_check, name, fn)
+
+
+def _connect_milvus() -> None:
+    if not get_milvus_client().ensure_connected():
+        raise Exception("Milvus collection not available")
+
+
+def _warm_embeddings() -> None:
+    embeddings = get_milvus_client().embeddings
+    if not embeddings:
+        raise Exception("Embedding provider not available")
+    # Opens the OpenAI connection pool, or loads the local model weights
+    embeddings.embed_query("khởi động")
+
+
+def _build_prototype_router() -> None:
+    embeddings = get_milvus_client().embeddings
+    if not embeddings or build_prototype_router(embeddings.embed_documents) is None:
+        raise Exception("Prototype router not built")
+
+
+def _load_local_indexes() -> None:
+    if get_lexical_index() is None:
+        raise Exception("Lexical FAQ index not built")
+    get_local_intent_model()
+
+
+async def _warm_vector_stack() -> None:
+    # The embedding provider is created while connecting, the rest needs it
+    await _check("milvus", _connect_milvus)
+    if await _check("embeddings", _warm_embeddings):
+        await _check("prototype_router", _build_prototype_router)
+
+
+# Warm-up steps in dependency order; the prototype router needs the embeddings
+_RECHECKS = (
+    ("milvus", _connect_milvus),
+    ("embeddings", _warm_embeddings),
+    ("prototype_router", _build_prototype_router),
+    ("llm", warm_up_llm),
+    ("local_indexes", _load_local_indexes),
+)
+_recheck_lock = threading.Lock()
+
+
+def recheck_failed() -> None:
+    """Run again the warm-up steps that failed or were skipped"""
+    if not _recheck_lock.acquire(blocking=False):
+        return
+    try:
+        for name, fn in _RECHECKS:
+            if readiness.passed(name):
+                continue
+            if name == "prototype_router" and not readiness.passed("embeddings"):
+                continue
+            if _run_check(name, fn):
+                logger.info("Startup check %s passed after a recovery", name)
+    finally:
+        _recheck_lock.release()
+
+
+def _on_breaker_closed(name: str) -> None:
+    # e.g. Milvus is back: build what warm-up had to skip, off the caller's thread
+    if readiness.finished and not all(readiness.passed(check) for check, _ in _RECHECKS):
+        threading.Thread(target=recheck_failed, name="readiness-recheck", daemon=True).start()
+
+
+add_close_listener(_on_breaker_closed)
+
+
+async def warm_up() -> Dict[str, Any]:
+    """Connect and warm every dependency in parallel before the first request"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _warm_vector_stack(),
+                _check("llm", warm_up_llm),
+                _check("local_indexes", _load_local_indexes),
+            ),
+            timeout=STARTUP_WARMUP_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.error("Warm-up exceeded %ss", STARTUP_WARMUP_TIMEOUT_SECONDS)
+    readiness.finished = True
+    status = {name: check["ok"] for name, check in readiness.checks.items()}
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        "Warm-up finished",
+        extra={"ready": readiness.ready, "duration_ms": round(elapsed_ms), "checks": status},
+    )
+    return readiness.snapshot()
@@ -0,0 +1,130 @@
+import threading
+from typing import Dict, List, Optional
+
+from src.core.config import (
+    EMBEDDING_PROVIDER,
+    OPENAI_EMBEDDING_MODEL,
+    OPENAI_EMBEDDING_TOKENIZE,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BACKEND,
+    LOCAL_EMBEDDING_ONNX_FILE,
+)
+from src.integrates.openai_gateway import get_openai_gateway
+
+# The FAQ collection built before providers existed keeps its name for ada-002 sized vectors
+BASE_COLLECTION_NAME = "faq_vexere"
+LEGACY_DIMENSION = 1536
+
+# Upper bound for one embedding request; ingestion batches need longer than one query
+OPENAI_EMBEDDING_REQUEST_TIMEOUT_SECONDS = 30
+
+OPENAI_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+class EmbeddingProvider:
+    """Text -> vector interface shared by routing, retrieval and ingestion"""
+
+    name: str = ""
+    model: str = ""
+    dimension: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.model = model
+        self.dimension = OPENAI_DIMENSIONS.get(model, LEGACY_DIMENSION)
+        # Retries and rate limits are handled by the gateway
+        self.client = OpenAIEmbeddings(
+            model=model,
+            check_embedding_ctx_length=OPENAI_EMBEDDING_TOKENIZE,
+            max_retries=0,
+            timeout=OPENAI_EMBEDDING_REQUEST_TIMEOUT_SECONDS,
+        )
+        self.gateway = get_openai_gateway()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.gateway.call(
+            self.model,
+            lambda: self.client.embed_documents(texts),
+            tokens=sum(len(text) for text in texts) // 4,
+        )
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """Multilingual sentence-embedding model running on CPU in this process"""
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = LOCAL_EMBEDDING_MODEL,
+        backend: str = LOCAL_EMBEDDING_BACKEND,
+        onnx_file: Optional[str] = LOCAL_EMBEDDING_ONNX_FILE,
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_PROVIDER=local needs sentence-transformers "
+                "(pip install 'sentence-transformers[onnx]')"
+            ) from e
+
+        kwargs = {"device": "cpu"}
+        if backend != "torch":
+            kwargs["backend"] = backend
+            if onnx_file:
+                kwargs["model_kwargs"] = {"file_name": onnx_file}
+
+        self.model = model if not onnx_file else f"{model}:{onnx_file}"
+        self.encoder = SentenceTransformer(model, **kwargs)
+        self.dimension = self.encoder.get_sentence_embedding_dimension()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.encoder.encode(
+            texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalEmbeddingProvider,
+}
+
+_providers: Dict[str, EmbeddingProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(name: str = None) -> EmbeddingProvider:
+    """Shared provider instance; the local model is loaded once per process"""
+    name = (name or EMBEDDING_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(
+            f"Unknown embedding provider {name}. Must be one of: {list(PROVIDERS)}"
+        )
+
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
+
+
+def collection_name_for(dimension: int) -> str:
+    """One FAQ collection per vector dimension, so switching models never mixes spaces"""
+    if dimension == LEGACY_DIMENSION:
+        return BASE_COLLECTION_NAME
+    return f"{BASE_COLLECTION_NAME}_{dimension}"
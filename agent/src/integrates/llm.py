@@ -0,0 +1,147 @@
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from src.core.config import OPENAI_API_KEY, LLM_TIMEOUT_SECONDS
+from src.core.metrics import LLM_COST, LLM_TOKENS
+from src.integrates.openai_gateway import (
+    COMPLETION_TOKEN_RESERVE,
+    approx_tokens,
+    get_openai_gateway,
+)
+from src.utils.deadlines import run_within
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+
+# USD per 1M tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-ada-002": (0.10, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+_llms: Dict[Tuple[str, float], "ChatOpenAI"] = {}
+_llms_lock = threading.Lock()
+
+
+def record_usage(model: str, prompt_tokens: int, completion_tokens: int = 0) -> None:
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+    # Versioned names like gpt-4o-mini-2024-07-18 are priced as their base model
+    base = max(
+        (name for name in MODEL_PRICES if model.startswith(name)), key=len, default=None
+    )
+    if base:
+        prompt_price, completion_price = MODEL_PRICES[base]
+        LLM_COST.inc(
+            (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6,
+            model=base,
+        )
+
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    # None is cached too, so an offline host does not retry the BPE download per call
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def record_embedding_usage(model: str, texts: List[str]) -> None:
+    """OpenAI embedding responses are not surfaced by LangChain, so count locally"""
+    encoding = _token_encoding(model)
+    if encoding is not None:
+        tokens = sum(len(tokens) for tokens in encoding.encode_batch(texts))
+    else:
+        tokens = sum(len(text) for text in texts) // 4
+    record_usage(model, tokens)
+
+
+@lru_cache(maxsize=None)
+def _usage_callback():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageCallback(BaseCallbackHandler):
+        """Feeds token usage of every ChatOpenAI response into the metrics"""
+
+        def on_llm_end(self, response, **kwargs):
+            llm_output = response.llm_output or {}
+            usage = llm_output.get("token_usage") or {}
+            record_usage(
+                llm_output.get("model_name", DEFAULT_CHAT_MODEL),
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+            )
+
+    return UsageCallback()
+
+
+def get_chat_llm(
+    model: str = DEFAULT_CHAT_MODEL, temperature: float = 0
+) -> "ChatOpenAI":
+    """Shared ChatOpenAI instances, so every caller reuses the same connection pool"""
+    key = (model, temperature)
+    with _llms_lock:
+        if key not in _llms:
+            # langchain_openai takes about a second to import; load it on first use
+            from langchain_openai import ChatOpenAI
+
+            # Retries and rate limits are handled by the gateway (invoke_llm); the
+            # client timeout ends calls that invoke_llm has already given up on
+            _llms[key] = ChatOpenAI(
+                api_key=OPENAI_API_KEY,
+                model=model,
+                temperature=temperature,
+                callbacks=[_usage_callback()],
+                max_retries=0,
+                timeout=LLM_TIMEOUT_SECONDS,
+            )
+        return _llms[key]
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    # (role, content) tuples or message objects
+    return " ".join(
+        str(item[1] if isinstance(item, tuple) else getattr(item, "content", item))
+        for item in prompt
+    )
+
+
+def invoke_llm(
+    runnable: Any,
+    prompt: Any,
+    model: str = DEFAULT_CHAT_MODEL,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+) -> Any:
+    """
+    runnable.invoke(prompt) through the OpenAI gateway, raising DeadlineExceeded after
+    timeout seconds or when the turn's deadline passes
+    """
+    tokens = approx_tokens(_prompt_text(prompt)) + COMPLETION_TOKEN_RESERVE
+    gateway = get_openai_gateway()
+    return run_within(
+        lambda: gateway.call(model, lambda: runnable.invoke(prompt), tokens=tokens),
+        "llm",
+        timeout,
+    )
+
+
+def warm_up_llm() -> None:
+    """Open the pooled HTTPS connection to OpenAI with a request that costs no tokens"""
+    llm = get_chat_llm()
+    get_openai_gateway().call(llm.model_name, llm.root_client.models.list)
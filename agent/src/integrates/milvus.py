@@ -1,57 +1,107 @@
-import os
-import sys
-import json
-from typing import List, Dict, Any
-
-# Add the parent directory to the path
-sys.path.append(
-    os.path.abspath(
-        os.path.join(
-            os.path.dirname(__file__),
-            "..",
-        )
-    )
-)
+import logging
+import threading
+from typing import List, Dict
 
-from core.config import (
+from src.core.config import (
     MILVUS_CLOUD_ENDPOINT,
     MILVUS_CLOUD_TOKEN,
+    MILVUS_SEARCH_BATCH_MAX_SIZE,
+    MILVUS_SEARCH_BATCH_MAX_WAIT_MS,
+    EMBED_BATCH_MAX_SIZE,
+    EMBED_BATCH_MAX_WAIT_MS,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBED_TIMEOUT_SECONDS,
+    SEARCH_TIMEOUT_SECONDS,
 )
+from src.schema.index_profiles import get_index_profile
+from src.integrates.embeddings import get_embedding_provider, collection_name_for
+from src.utils.compact_vectors import CompactVectors
+from src.utils.micro_batcher import MicroBatcher
+from src.core.metrics import span, EMBEDDING_TEXTS
+from src.integrates.llm import record_embedding_usage
+from src.utils.shared_state import SharedCache
+from src.utils.deadlines import Hedger, wait_within
+from src.utils.circuit_breaker import OPEN, CircuitOpenError, get_breaker
 
-try:
-    from pymilvus import connections, Collection, utility
-    from langchain_openai import OpenAIEmbeddings
-
-    MILVUS_AVAILABLE = True
-    EMBEDDINGS_AVAILABLE = True
-except ImportError as e:
-    MILVUS_AVAILABLE = False
-    EMBEDDINGS_AVAILABLE = False
-    print(f"Import warning: {e}")
+logger = logging.getLogger(__name__)
 
-MILVUS_CLOUD_COLLECTION_NAME = "faq_vexere"
+# Model and query text -> single-row float32 CompactVectors, far smaller than a list of 1536
+# Python floats. Kept at full precision whatever VECTOR_DTYPE is: a cache hit must search
+# with the same vector as a miss
+embedding_cache = SharedCache(
+    "embedding",
+    ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS,
+    max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+)
 
 
 class MilvusClient:
     def __init__(self):
-        self.collection_name = MILVUS_CLOUD_COLLECTION_NAME
+        self.collection_name = None
         self.collection = None
         self.connected = False
         self.embeddings = None
+        self.search_params = get_index_profile()["search_params"]
+        # Concurrent single-query searches are merged into one search_many request
+        self.search_batcher = MicroBatcher(
+            self._search_batch,
+            max_batch_size=MILVUS_SEARCH_BATCH_MAX_SIZE,
+            max_wait_ms=MILVUS_SEARCH_BATCH_MAX_WAIT_MS,
+        )
+        # Concurrent embed_query calls are sent as one embed_documents request
+        self.embed_batcher = MicroBatcher(
+            self._embed_batch,
+            max_batch_size=EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+        )
+        # Duplicate upstream requests that run past their recent p95
+        self.search_hedger = Hedger("search", default_delay_ms=100)
+        self.embed_hedger = Hedger("embed", default_delay_ms=300)
 
-        if MILVUS_AVAILABLE:
-            self._connect()
+        # Opens after repeated search or reconnect failures; searches then return nothing
+        # at once and callers use the lexical FAQ index
+        self.breaker = get_breaker("milvus")
 
-        # Initialize embeddings for text to vector conversion
-        if EMBEDDINGS_AVAILABLE:
+        self.initialized = False
+        self._init_lock = threading.Lock()
+
+    def connect(self) -> bool:
+        """Create the embedding provider and load the collection; runs once per process"""
+        with self._init_lock:
+            if self.initialized:
+                return self.connected
+            self.initialized = True
+
+            # Initialize embeddings for text to vector conversion
             try:
-                self.embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-                print("OpenAI embeddings initialized successfully")
+                self.embeddings = get_embedding_provider()
+                logger.info(
+                    "Embedding provider initialized: %s (%s, dim=%d)",
+                    self.embeddings.name,
+                    self.embeddings.model,
+                    self.embeddings.dimension,
+                )
             except Exception as e:
-                print(f"Failed to initialize OpenAI embeddings: {e}")
+                logger.error("Failed to initialize embedding provider: %s", e)
                 self.embeddings = None
 
+            # Each embedding dimension has its own FAQ collection
+            if self.embeddings:
+                self.collection_name = collection_name_for(self.embeddings.dimension)
+
+            if self.collection_name:
+                self._connect()
+            return self.connected
+
     def _connect(self):
+        # pymilvus is heavy to import, so it is loaded only when connecting
+        try:
+            from pymilvus import connections, Collection, utility
+        except ImportError as e:
+            logger.warning("Import warning: %s", e)
+            return
+
         try:
             connections.connect(
                 uri=MILVUS_CLOUD_ENDPOINT,
@@ -63,94 +113,189 @@ class MilvusClient:
                 self.collection = Collection(self.collection_name)
                 self.collection.load()
                 self.connected = True
-                print(f"Connected to Milvus collection: {self.collection_name}")
+                logger.info("Connected to Milvus collection: %s", self.collection_name)
             else:
-                print(f"Collection {self.collection_name} not found")
+                logger.warning("Collection %s not found", self.collection_name)
 
         except Exception as e:
-            print(f"Failed to connect to Milvus: {e}")
+            logger.error("Failed to connect to Milvus: %s", e)
             self.connected = False
 
+    def available(self) -> bool:
+        """Connected (reconnecting if due) and not failing fast behind an open breaker"""
+        return self.ensure_connected() and self.breaker.state != OPEN
+
+    def ensure_connected(self) -> bool:
+        """Reconnect after an outage, at most one attempt per breaker reset period"""
+        if self.connected:
+            return True
+        if not self.initialized:
+            return self.connect()
+        if not self.collection_name:
+            return False
+        try:
+            self.breaker.call(self._reconnect)
+        except Exception as e:
+            logger.debug("Milvus reconnect skipped or failed: %s", e)
+        return self.connected
+
+    def _reconnect(self) -> None:
+        with self._init_lock:
+            if not self.connected:
+                self._connect()
+        if not self.connected:
+            raise Exception("Milvus collection not available")
+
     def search_similar(
         self, query_embedding: List[float], top_k: int = 3
     ) -> List[Dict]:
         """Search for similar documents using vector embedding"""
-        if not self.connected or not self.collection:
-            print("Milvus not connected or collection not available")
+        if not self.available():
+            logger.debug("Milvus unavailable, skipping vector search")
             return []
 
         try:
-            search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+            # Concurrent callers share a single search_many request
+            with span("search_similar"):
+                documents = wait_within(
+                    self.search_batcher.submit((query_embedding, top_k)),
+                    "search_similar",
+                    SEARCH_TIMEOUT_SECONDS,
+                )
+            logger.debug("Found %d similar documents", len(documents))
+            return documents
+
+        except Exception as e:
+            logger.error("Error searching in Milvus: %s", e)
+            return []
 
+    def _search_batch(self, requests: List[tuple]) -> List[List[Dict]]:
+        top_k = max(request_top_k for _, request_top_k in requests)
+        embeddings = [embedding for embedding, _ in requests]
+        try:
+            results = self.breaker.call(
+                lambda: self.search_hedger(lambda: self.search_many(embeddings, top_k))
+            )
+        except CircuitOpenError:
+            raise
+        except Exception:
+            if self.breaker.state == OPEN:
+                # The probe after the reset period reconnects instead of reusing this one
+                self.connected = False
+            raise
+        return [
+            documents[:request_top_k]
+            for documents, (_, request_top_k) in zip(results, requests)
+        ]
+
+    def search_many(
+        self, query_embeddings: List[List[float]], top_k: int = 3
+    ) -> List[List[Dict]]:
+        """Search many query vectors in a single Milvus request, one result list per query"""
+        if not self.connected or not self.collection:
+            raise Exception("Milvus not connected or collection not available")
+
+        with span("milvus.search_many"):
             results = self.collection.search(
-                data=[query_embedding],
+                data=query_embeddings,
                 anns_field="embedding",
-                param=search_params,
+                param=self.search_params,
                 limit=top_k,
                 output_fields=["question", "category", "answer"],
+                timeout=SEARCH_TIMEOUT_SECONDS,
             )
+        return [self._to_documents(hits) for hits in results]
 
-            documents = []
-            for result in results[0]:
-                try:
-                    question = result.get("question")
-                    category = result.get("category")
-                    answer = result.get("answer")
+    def _to_documents(self, hits) -> List[Dict]:
+        documents = []
+        for result in hits:
+            try:
+                question = result.get("question")
+                category = result.get("category")
+                answer = result.get("answer")
+
+                documents.append(
+                    {
+                        "question": question or "",
+                        "category": category or "",
+                        "answer": answer or "",
+                        "score": result.score,
+                    }
+                )
 
+            except Exception as e:
+                logger.warning("Error accessing result data: %s", e)
+                # Try to_dict method
+                try:
+                    result_dict = result.to_dict()
+                    # Extract from dict
                     documents.append(
                         {
-                            "question": question or "",
-                            "category": category or "",
-                            "answer": answer or "",
+                            "question": result_dict.get("question", ""),
+                            "category": result_dict.get("category", ""),
+                            "answer": result_dict.get("answer", ""),
                             "score": result.score,
                         }
                     )
+                except Exception as e2:
+                    logger.warning("to_dict also failed: %s", e2)
+                    continue
 
-                except Exception as e:
-                    print(f"Error accessing result data: {e}")
-                    # Try to_dict method
-                    try:
-                        result_dict = result.to_dict()
-                        print(f"Result dict: {result_dict}")
-                        # Extract from dict
-                        documents.append(
-                            {
-                                "question": result_dict.get("question", ""),
-                                "category": result_dict.get("category", ""),
-                                "answer": result_dict.get("answer", ""),
-                                "score": result.score,
-                            }
-                        )
-                    except Exception as e2:
-                        print(f"to_dict also failed: {e2}")
-                        continue
-
-            print(f"Found {len(documents)} similar documents")
-            return documents
-
-        except Exception as e:
-            print(f"Error searching in Milvus: {e}")
-            return []
+        return documents
 
     def embed_query(self, query: str) -> List[float]:
         """Convert text query to embedding vector"""
         if not self.embeddings:
-            raise Exception("OpenAI embeddings not available")
+            raise Exception("Embedding provider not available")
+
+        cached = embedding_cache.get(self._cache_key(query))
+        if cached is not None:
+            return cached.row(0)
 
         try:
-            embedding = self.embeddings.embed_query(query)
-            print(
-                f"Generated embedding for query: '{query}' (dimension: {len(embedding)})"
-            )
+            with span("embed_query"):
+                embedding = wait_within(
+                    self.embed_batcher.submit(query), "embed_query", EMBED_TIMEOUT_SECONDS
+                )
+            logger.debug("Generated embedding (dimension: %d)", len(embedding))
             return embedding
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e)
             raise e
 
+    def _cache_key(self, query: str) -> str:
+        # The cache can be shared by workers running different embedding models
+        return f"{self.embeddings.model}:{query}"
+
+    def _embed_batch(self, queries: List[str]) -> List[List[float]]:
+        # Identical messages in one window are embedded once
+        unique = list(dict.fromkeys(queries))
+        with span("embedding.embed_documents"):
+            # A local model would only compete with itself, so only remote calls are hedged
+            if self.embeddings.name == "openai":
+                embedded = self.embed_hedger(lambda: self.embeddings.embed_documents(unique))
+            else:
+                embedded = self.embeddings.embed_documents(unique)
+            vectors = dict(zip(unique, embedded))
+        EMBEDDING_TEXTS.inc(len(unique), provider=self.embeddings.name)
+        if self.embeddings.name == "openai":
+            record_embedding_usage(self.embeddings.model, unique)
+        for query, vector in vectors.items():
+            embedding_cache.set(
+                self._cache_key(query), CompactVectors.from_array(vector, "float32")
+            )
+        if len(queries) > 1:
+            logger.debug(
+                "Embedded %d queries in one request (%d unique)", len(queries), len(unique)
+            )
+        return [vectors[query] for query in queries]
+
 
-# Global client instance
+# Global client instance; connects during app startup (or on first use in scripts)
 milvus_client = MilvusClient()
 
 
 def get_milvus_client():
+    if not milvus_client.initialized:
+        milvus_client.connect()
     return milvus_client
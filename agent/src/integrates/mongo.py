@@ -1,4 +1,4 @@
-from core.config import MONGODB_KEY, MONGODB_DB_NAME
+from src.core.config import MONGODB_KEY, MONGODB_DB_NAME
 from pymongo import MongoClient
 
 class MongoDBClient:
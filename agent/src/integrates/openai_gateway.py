@@ -0,0 +1,409 @@
+"""
+Single outbound path for OpenAI calls.
+
+Every chat completion, embedding request and model listing goes through
+OpenAIGateway.call(), which
+
+- waits on per-model limits for requests and tokens per minute, counted in one-minute
+  windows of the shared state backend so every worker draws on the same budget (per-process
+  token buckets when the backend is the in-memory one),
+- holds one of OPENAI_MAX_CONCURRENCY slots, handed out to user-facing calls before
+  background work (startup warm-up),
+- retries rate-limit, timeout, connection and 5xx errors with jittered exponential
+  backoff (tenacity), honouring Retry-After, and shares the 429 cooldown with the
+  other workers through the shared state backend,
+- fails fast with CircuitOpenError while the model's circuit breaker is open.
+
+The OpenAI clients are created with max_retries=0, so retries happen only here.
+"""
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+from enum import IntEnum
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from src.core.config import (
+    OPENAI_RATE_LIMITS,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_QUEUE_TIMEOUT_SECONDS,
+    OPENAI_MAX_RETRIES,
+    OPENAI_RETRY_MAX_WAIT_SECONDS,
+)
+from src.core.metrics import OPENAI_REQUESTS, OPENAI_RETRIES, OPENAI_WAIT_SECONDS
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from src.utils.deadlines import current_deadline
+from src.utils.shared_state import SharedCache, StateBackend
+
+logger = logging.getLogger(__name__)
+
+# Output tokens reserved per chat completion when charging the token bucket
+COMPLETION_TOKEN_RESERVE = 256
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar(
+    "openai_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def background_priority():
+    """OpenAI calls made inside the block (and threads started from it) yield to user traffic"""
+    token = _priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class GatewayTimeout(Exception):
+    """No rate or concurrency capacity within the queue timeout"""
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def parse_rate_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    """'gpt-4o-mini=500:200000,text-embedding-ada-002=3000:1000000' -> {model: (rpm, tpm)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        model, _, rates = item.partition("=")
+        rpm, _, tpm = rates.partition(":")
+        limits[model.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+class TokenBucket:
+    """
+    Refills at rate_per_minute up to one minute's worth. reserve() takes the amount
+    right away, possibly into debt, and returns how long the caller must wait; callers
+    are therefore served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        # A single call larger than the bucket waits for a full bucket, not forever
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def take(self, amount: float) -> Tuple[float, Callable[[], None]]:
+        """reserve() plus a callback that gives the amount back"""
+        return self.reserve(amount), lambda: self.refund(amount)
+
+
+class SharedRateWindow:
+    """
+    Per-minute budget counted in the shared state backend, so all workers share one limit.
+    take() charges the first one-minute window (wall clock, aligned across workers) that
+    still has room and returns how long until that window starts. Windows further ahead than
+    max_wait are not charged; the wait to the first of them is returned instead.
+    Backend errors are logged and let the call through rather than failing it.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        key: str,
+        rate_per_minute: float,
+        max_wait: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.key = key
+        self.capacity = float(rate_per_minute)
+        self.max_wait = max_wait
+        self.clock = clock
+
+    def take(self, amount: float) -> Tuple[float, Callable[[], None]]:
+        amount = min(amount, self.capacity)
+        now = self.clock()
+        window = int(now // self.WINDOW_SECONDS)
+        while True:
+            wait = max(0.0, window * self.WINDOW_SECONDS - now)
+            if wait > self.max_wait:
+                return wait, lambda: None
+            key = f"{self.key}:{window}"
+            # Keep the counter until its window is over
+            ttl = (window + 1) * self.WINDOW_SECONDS - now + 1
+            try:
+                used = self.backend.incr("openai_rate", key, amount, ttl)
+                if used <= self.capacity:
+                    return wait, lambda: self._give_back(key, amount, ttl)
+                self._give_back(key, amount, ttl)
+            except Exception as e:
+                logger.warning("Shared OpenAI rate limit unavailable for %s: %s", self.key, e)
+                return 0.0, lambda: None
+            window += 1
+
+    def _give_back(self, key: str, amount: float, ttl: float) -> None:
+        self.backend.incr("openai_rate", key, -amount, ttl)
+
+
+class PriorityLimiter:
+    """Semaphore whose free slots go to the waiter with the lowest priority value first"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiting: List[Tuple[int, int, threading.Event]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: Priority, timeout: float) -> None:
+        with self._lock:
+            if self.active < self.limit and not self._waiting:
+                self.active += 1
+                return
+            entry = (int(priority), next(self._sequence), threading.Event())
+            heapq.heappush(self._waiting, entry)
+
+        if entry[2].wait(timeout):
+            return
+        with self._lock:
+            # The slot may have been handed over between the timeout and the lock
+            if entry[2].is_set():
+                return
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+        raise GatewayTimeout(f"No OpenAI slot free within {timeout:.0f}s")
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiting:
+                # The slot passes straight to the next waiter, active stays the same
+                heapq.heappop(self._waiting)[2].set()
+            else:
+                self.active -= 1
+
+
+def _is_retryable(error: BaseException) -> bool:
+    import openai
+
+    return isinstance(
+        error,
+        (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.InternalServerError,
+        ),
+    )
+
+
+def _is_outage(error: BaseException) -> Optional[bool]:
+    """Breaker verdict: exhausted retries are an outage, a local queue timeout says nothing"""
+    if isinstance(error, GatewayTimeout):
+        return None
+    return _is_retryable(error)
+
+
+def _past_deadline(retry_state) -> bool:
+    """Stop retrying when the next attempt would start after the turn's deadline"""
+    deadline = current_deadline()
+    return deadline is not None and deadline.remaining() < (retry_state.upcoming_sleep or 0)
+
+
+def _retry_after(error: BaseException) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class OpenAIGateway:
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        queue_timeout: float = OPENAI_QUEUE_TIMEOUT_SECONDS,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        retry_max_wait: float = OPENAI_RETRY_MAX_WAIT_SECONDS,
+        cooldowns: Optional[SharedCache] = None,
+    ):
+        self.limits = limits or {}
+        self.limiter = PriorityLimiter(max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_max_wait = retry_max_wait
+        self.backoff = wait_random_exponential(multiplier=0.5, max=retry_max_wait)
+        # model -> wall-clock time until which every worker holds off after a 429
+        self.cooldowns = cooldowns or SharedCache(
+            "openai_cooldown", ttl_seconds=retry_max_wait, max_entries=100
+        )
+        self._buckets: Dict[str, Tuple[Any, Any]] = {}
+        self._buckets_lock = threading.Lock()
+
+    def _limit_for(self, model: str) -> Optional[Tuple[float, float]]:
+        # Versioned names like gpt-4o-mini-2024-07-18 share their base model's limits
+        base = max(
+            (name for name in self.limits if model.startswith(name)), key=len, default=None
+        )
+        return self.limits[base] if base else None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        return get_breaker(f"openai:{model}", is_failure=_is_outage)
+
+    def _bucket(self, model: str, kind: str, rate_per_minute: float):
+        if not rate_per_minute:
+            return None
+        backend = self.cooldowns.backend
+        if backend.name == "memory":
+            # Only this process counts, so a smooth bucket is as good as a shared window
+            return TokenBucket(rate_per_minute)
+        return SharedRateWindow(
+            backend, f"{model}:{kind}", rate_per_minute, max_wait=self.queue_timeout
+        )
+
+    def _buckets_for(self, model: str) -> Tuple[Any, Any]:
+        """(requests, tokens) limiters for the model; None where no limit is configured"""
+        with self._buckets_lock:
+            if model not in self._buckets:
+                rpm, tpm = self._limit_for(model) or (0, 0)
+                self._buckets[model] = (
+                    self._bucket(model, "requests", rpm),
+                    self._bucket(model, "tokens", tpm),
+                )
+            return self._buckets[model]
+
+    def _wait_for_rate(self, model: str, tokens: int) -> None:
+        until = self.cooldowns.get(model)
+        wait = max(0.0, until - time.time()) if until else 0.0
+
+        refunds = []
+        for bucket, amount in zip(self._buckets_for(model), (1, tokens)):
+            if bucket is not None and amount:
+                bucket_wait, refund = bucket.take(amount)
+                wait = max(wait, bucket_wait)
+                refunds.append(refund)
+
+        if wait > self.queue_timeout:
+            for refund in refunds:
+                refund()
+            OPENAI_REQUESTS.inc(model=model, outcome="rejected")
+            raise GatewayTimeout(f"OpenAI rate limit for {model}: next slot in {wait:.1f}s")
+        if wait > 0:
+            OPENAI_WAIT_SECONDS.observe(wait, model=model, reason="rate")
+            time.sleep(wait)
+
+    def _call_once(
+        self, model: str, request: Callable[[], Any], tokens: int, priority: Priority
+    ) -> Any:
+        self._wait_for_rate(model, tokens)
+
+        started = time.perf_counter()
+        try:
+            self.limiter.acquire(priority, self.queue_timeout)
+        except GatewayTimeout:
+            OPENAI_REQUESTS.inc(model=model, outcome="rejected")
+            raise
+        OPENAI_WAIT_SECONDS.observe(time.perf_counter() - started, model=model, reason="queue")
+        try:
+            return request()
+        finally:
+            self.limiter.release()
+
+    def _wait(self, retry_state) -> float:
+        import openai
+
+        error = retry_state.outcome.exception()
+        retry_after = min(_retry_after(error), self.retry_max_wait)
+        if retry_after and isinstance(error, openai.RateLimitError):
+            model = retry_state.kwargs["model"]
+            self.cooldowns.set(model, time.time() + retry_after, retry_after)
+        return max(self.backoff(retry_state), retry_after)
+
+    def _before_sleep(self, retry_state) -> None:
+        error = retry_state.outcome.exception()
+        model = retry_state.kwargs["model"]
+        OPENAI_RETRIES.inc(model=model, error=type(error).__name__)
+        logger.warning(
+            "OpenAI %s failed (%s), retry %d in %.2fs",
+            model,
+            type(error).__name__,
+            retry_state.attempt_number,
+            retry_state.next_action.sleep,
+        )
+
+    def call(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        tokens: int = 0,
+        priority: Optional[Priority] = None,
+    ) -> Any:
+        """Run fn() (one OpenAI request for model, about `tokens` tokens) under the limits"""
+        retrying = Retrying(
+            retry=retry_if_exception(_is_retryable),
+            wait=self._wait,
+            stop=stop_after_attempt(self.max_retries + 1) | _past_deadline,
+            before_sleep=self._before_sleep,
+            reraise=True,
+        )
+        priority = _priority.get() if priority is None else priority
+        try:
+            result = self.breaker(model).call(
+                lambda: retrying(
+                    self._call_once,
+                    # Keyword arguments, so _wait and _before_sleep can read the model
+                    model=model,
+                    request=fn,
+                    tokens=tokens,
+                    priority=priority,
+                )
+            )
+        except CircuitOpenError:
+            OPENAI_REQUESTS.inc(model=model, outcome="circuit_open")
+            raise
+        except GatewayTimeout:
+            raise
+        except Exception:
+            OPENAI_REQUESTS.inc(model=model, outcome="error")
+            raise
+        OPENAI_REQUESTS.inc(model=model, outcome="ok")
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_openai_gateway() -> OpenAIGateway:
+    return OpenAIGateway(limits=parse_rate_limits(OPENAI_RATE_LIMITS))
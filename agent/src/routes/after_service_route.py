@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import re
 import sys
 import os
@@ -13,7 +14,7 @@ async def after_service_route(request: Request):
     try:
         json_body = await request.json()
         message = json_body.get("message")
-        return after_service_chat(message)
+        return await run_in_threadpool(after_service_chat, message)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import re
 import sys
 import os
@@ -12,7 +13,7 @@ async def faq_route(request: Request):
     try:
         json_body = await request.json()
         message = json_body.get("message")
-        return faq_rag_chat(message)
+        return await run_in_threadpool(faq_rag_chat, message)
     except HTTPException:
         raise
     except Exception as e:
@@ -6,35 +6,41 @@ from pymilvus import (
     Collection,
     utility,
 )
-import os
-import sys
 import logging
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from core.config import (
+from src.core.config import (
     MILVUS_CLOUD_ENDPOINT,
     MILVUS_CLOUD_TOKEN,
 )
+from src.schema.index_profiles import get_index_profile
 
 
-def init_milvus_collection(collection_name: str) -> Collection:
+def init_milvus_collection(
+    collection_name: str,
+    recreate: bool = False,
+    index_profile: str = None,
+    dim: int = 1536,
+) -> Collection:
     connections.connect(
         uri=MILVUS_CLOUD_ENDPOINT,
         token=MILVUS_CLOUD_TOKEN,
         secure=True,
     )
 
-    index_params = {
-        "metric_type": "COSINE",
-        "index_type": "IVF_FLAT",
-        "params": {"nlist": 128},
-    }
+    index_params = get_index_profile(index_profile)["index_params"]
+
+    if recreate and utility.has_collection(collection_name):
+        utility.drop_collection(collection_name)
+        print(f"[✔] Dropped collection: {collection_name}")
 
     if not utility.has_collection(collection_name):
         fields = [
-            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=1536),
+            # Stable FAQ key so re-ingestion upserts instead of duplicating rows
+            FieldSchema(
+                name="faq_id", dtype=DataType.VARCHAR, max_length=64, is_primary=True
+            ),
+            FieldSchema(name="content_hash", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
             FieldSchema(name="question", dtype=DataType.VARCHAR, max_length=512),
             FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=128),
             FieldSchema(name="answer", dtype=DataType.VARCHAR, max_length=2048),
@@ -45,8 +51,30 @@ def init_milvus_collection(collection_name: str) -> Collection:
     else:
         collection = Collection(name=collection_name)
         print(f"[ℹ] Collection already exists: {collection_name}")
+        field_names = {field.name for field in collection.schema.fields}
+        if "content_hash" not in field_names:
+            raise ValueError(
+                f"Collection {collection_name} uses the legacy auto_id schema; "
+                "re-run with recreate=True to rebuild it"
+            )
+        embedding_field = next(
+            field for field in collection.schema.fields if field.name == "embedding"
+        )
+        if embedding_field.params.get("dim") != dim:
+            raise ValueError(
+                f"Collection {collection_name} stores {embedding_field.params.get('dim')}-d "
+                f"vectors, expected {dim}"
+            )
 
     try:
+        if collection.has_index():
+            current_type = collection.index().params.get("index_type")
+            if current_type != index_params["index_type"]:
+                # Switching profile: the index can only be dropped while released
+                collection.release()
+                collection.drop_index()
+                print(f"[✔] Dropped {current_type} index on: {collection_name}")
+
         if not collection.has_index():
             collection.create_index(field_name="embedding", index_params=index_params)
             print(f"[✔] Created index on embedding field: {collection_name}")
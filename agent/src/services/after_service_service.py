@@ -1,57 +1,91 @@
-import json
-import re
+import logging
 import requests
-import asyncio
-import threading
-from pprint import pprint
 from datetime import datetime
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 
-from src.core.config import BACKEND_URL
-from src.utils.intent_classifier import AfterServiceIntentClassifier
-from src.utils.chat_procesing import append_message_to_chat
+from src.core.config import BACKEND_URL, SESSION_TTL_SECONDS, SESSION_MAX_ENTRIES
+from src.core.metrics import span, traced
+from src.utils.intent_classifier import get_classifier
+from src.utils.chat_procesing import backend_breaker, save_message_to_chat
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.shared_state import SharedCache
+from src.utils.entity_extractor import extract_entities, slot_coverage
 
+logger = logging.getLogger(__name__)
 
-def save_message_to_chat(chat_id: str, message: str, role: str = "assistant"):
-    """Helper function to save message to chat in a separate thread"""
+# Slots each intent needs before it can be executed against the backend
+REQUIRED_SLOTS = {
+    "change_schedule": ["ticket_code", "schedule_time"],
+    "cancel_ticket": ["ticket_code"],
+    "invoice_request": ["ticket_code"],
+    "complaint": ["ticket_code", "reason"],
+}
+
+# A follow-up fills a ticket code or time only when those make up this share of its words;
+# "Cho mình 10:30 tối" does, "xe chạy lúc 8h có wifi không?" asks about something else
+FOLLOW_UP_MIN_SLOT_COVERAGE = 0.5
+
+# Pending after-service intents and their collected slots, keyed by chat_id
+session_store = SharedCache(
+    "session", ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES
+)
 
-    def run_async():
-        try:
-            asyncio.run(append_message_to_chat(chat_id, message, role))
-        except Exception as e:
-            print(f"Error saving {role} message to chat {chat_id}: {e}")
 
-    thread = threading.Thread(target=run_async)
-    thread.daemon = True
-    thread.start()
+def backend_call(send: Callable[[], requests.Response]) -> requests.Response:
+    """Ticket API request through the backend breaker; 5xx responses count as failures"""
+
+    def checked() -> requests.Response:
+        res = send()
+        if res.status_code >= 500:
+            res.raise_for_status()
+        return res
+
+    return backend_breaker.call(checked)
 
 
 def get_all_tickets():
     try:
-        res = requests.get(f"{BACKEND_URL}/api/ticket")
+        res = backend_call(lambda: requests.get(f"{BACKEND_URL}/api/ticket"))
         if res.status_code == 200:
             return res.json()
     except Exception as e:
-        print(f"Lỗi gọi API lấy danh sách vé: {e}")
+        logger.error("Lỗi gọi API lấy danh sách vé: %s", e)
     return []
 
 
+@traced("backend.get_ticket")
 def get_ticket_info(ticket_id: str) -> Dict:
     try:
-        res = requests.get(f"{BACKEND_URL}/api/ticket/{ticket_id}")
+        res = backend_call(lambda: requests.get(f"{BACKEND_URL}/api/ticket/{ticket_id}"))
         if res.status_code == 200:
             return res.json()
+    except CircuitOpenError:
+        # Unknown rather than missing: the caller must not report "ticket not found"
+        raise
     except Exception as e:
-        print(f"Lỗi lấy thông tin vé {ticket_id}: {e}")
+        logger.error("Lỗi lấy thông tin vé %s: %s", ticket_id, e)
     return None
 
 
 class AfterServiceHandler:
     """Handler for different after-service intents"""
 
-    def __init__(self):
-        self.classifier = AfterServiceIntentClassifier()
-        self.session_state = {}
+    def __init__(self, session_state: Optional[Dict] = None):
+        self.classifier = get_classifier()
+        self.session_state = session_state if session_state is not None else {}
+
+    def ticket_exists(self, ticket_id: str) -> bool:
+        """Check the ticket against the backend once per conversation"""
+        verified_tickets = self.session_state.setdefault("verified_tickets", [])
+        if ticket_id in verified_tickets:
+            return True
+
+        if not get_ticket_info(ticket_id):
+            return False
+
+        verified_tickets.append(ticket_id)
+        return True
 
     def handle_change_schedule(self, message: str, entities: Dict) -> Dict:
         ticket_id = entities.get("ticket_code")
@@ -73,7 +107,7 @@ class AfterServiceHandler:
             }
 
         # Check if ticket exists
-        if not get_ticket_info(ticket_id):
+        if not self.ticket_exists(ticket_id):
             return {
                 "message": message,
                 "intent": "change_schedule",
@@ -81,10 +115,13 @@ class AfterServiceHandler:
             }
 
         try:
-            res = requests.put(
-                f"{BACKEND_URL}/api/ticket/{ticket_id}",
-                json={"time": changed_time},
-            )
+            with span("backend.update_ticket"):
+                res = backend_call(
+                    lambda: requests.put(
+                        f"{BACKEND_URL}/api/ticket/{ticket_id}",
+                        json={"time": changed_time},
+                    )
+                )
             if res.status_code == 200:
                 return {
                     "message": message,
@@ -114,8 +151,7 @@ class AfterServiceHandler:
                 "response": "Vui lòng cung cấp mã vé để hủy.",
             }
 
-        ticket_info = get_ticket_info(ticket_id)
-        if not ticket_info:
+        if not self.ticket_exists(ticket_id):
             return {
                 "message": message,
                 "intent": "cancel_ticket",
@@ -123,9 +159,13 @@ class AfterServiceHandler:
             }
 
         try:
-            res = requests.put(
-                f"{BACKEND_URL}/api/ticket/{ticket_id}", json={"status": "cancelled"}
-            )
+            with span("backend.update_ticket"):
+                res = backend_call(
+                    lambda: requests.put(
+                        f"{BACKEND_URL}/api/ticket/{ticket_id}",
+                        json={"status": "cancelled"},
+                    )
+                )
             if res.status_code == 200:
                 return {
                     "message": message,
@@ -190,14 +230,88 @@ class AfterServiceHandler:
         }
 
 
-def after_service_chat(message: str, chat_id: str = None) -> Dict[str, Any]:
+def get_missing_slots(intent: str, entities: Dict) -> List[str]:
+    return [slot for slot in REQUIRED_SLOTS.get(intent, []) if not entities.get(slot)]
+
+
+def resolve_follow_up(
+    message: str, chat_id: str = None, free_text: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Merge a follow-up message into the pending intent of the conversation.
+    Returns a classification result when the message fills at least one missing slot,
+    otherwise None so the caller falls back to normal classification. Ticket codes and
+    times count only in messages made mostly of them; with free_text=False the whole
+    message is not taken as a complaint reason either (the caller checks it first).
+    """
+    if not chat_id:
+        return None
+
+    session = session_store.get(chat_id)
+    if not session or not session.get("intent"):
+        return None
+
+    intent = session["intent"]
+    pending_entities = session.get("entities", {})
+    missing = get_missing_slots(intent, pending_entities)
+    extracted = {}
+    if slot_coverage(message) >= FOLLOW_UP_MIN_SLOT_COVERAGE:
+        extracted = extract_entities(message)
+
+    if free_text and "reason" in missing and pending_entities.get("ticket_code"):
+        # The previous turn asked for the complaint reason, so this reply is the reason
+        extracted["reason"] = message.strip()
+
+    if not any(slot in extracted for slot in missing):
+        return None
+
+    return {
+        "intent": intent,
+        "entities": {**pending_entities, **extracted},
+        "source": "session",
+    }
+
+
+def end_pending_request(chat_id: str = None) -> None:
+    """Drop the pending intent once the conversation has moved on to something else"""
+    if chat_id:
+        session_store.delete(chat_id)
+
+
+def update_session(chat_id: str, session: Dict, intent: str, entities: Dict) -> None:
+    """Keep the intent pending while required slots are missing, otherwise close it"""
+    if not chat_id:
+        return
+
+    if intent in REQUIRED_SLOTS and get_missing_slots(intent, entities):
+        session.update({"intent": intent, "entities": entities})
+        session_store.set(chat_id, session)
+    else:
+        session_store.delete(chat_id)
+
+
+def after_service_chat(
+    message: str, chat_id: str = None, classification: Dict[str, Any] = None
+) -> Dict[str, Any]:
     try:
-        handler = AfterServiceHandler()
+        session = (session_store.get(chat_id) if chat_id else None) or {}
+        handler = AfterServiceHandler(session_state=session)
+
+        # Follow-up turns reuse the pending intent instead of reclassifying
+        classification_result = classification or resolve_follow_up(message, chat_id)
+        if classification_result is None:
+            # Classify intent and entity from user message
+            classification_result = handler.classifier.classify_intent(message)
 
-        # Classify intent and entity from user message
-        classification_result = handler.classifier.classify_intent(message)
         intent = classification_result["intent"]
-        entities = classification_result.get("entities")
+        entities = {
+            k: v for k, v in (classification_result.get("entities") or {}).items() if v
+        }
+
+        # Accumulate slots collected in earlier turns for the same intent
+        if session.get("intent") == intent:
+            entities = {**session.get("entities", {}), **entities}
+        classification_result["entities"] = entities
 
         # Choose handler based on intent
         if intent == "change_schedule":
@@ -216,6 +330,8 @@ def after_service_chat(message: str, chat_id: str = None) -> Dict[str, Any]:
         response["timestamp"] = datetime.now().isoformat()
         response["chat_id"] = chat_id  # Include chat_id in response
 
+        update_session(chat_id, session, intent, entities)
+
         # Save assistant response to chat history
         assistant_message = response.get("response", "")
         if chat_id and assistant_message:
@@ -223,6 +339,9 @@ def after_service_chat(message: str, chat_id: str = None) -> Dict[str, Any]:
 
         return response
 
+    except DeadlineExceeded:
+        # Raised before any ticket action; chat_service serves a degraded answer
+        raise
     except Exception as e:
         error_message = (
             "Xin lỗi, có lỗi xảy ra trong quá trình xử lý. Vui lòng thử lại sau."
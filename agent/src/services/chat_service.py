@@ -1,45 +1,329 @@
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from .faq_service import faq_rag_chat
-from .after_service_service import after_service_chat
-from integrates.milvus import get_milvus_client
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+from fastapi.concurrency import run_in_threadpool
+from .faq_service import faq_answer, faq_rag_chat, save_faq_answer, top_faq_answer
+from .after_service_service import (
+    after_service_chat,
+    end_pending_request,
+    resolve_follow_up,
+)
+from src.integrates.milvus import get_milvus_client
+from src.core.config import (
+    LOCAL_INTENT_THRESHOLD,
+    FAQ_MATCH_MIN_SCORE,
+    CHAT_DEADLINE_SECONDS,
+    SPECULATIVE_ANSWERS,
+    SPECULATIVE_FAQ_MIN_SCORE,
+    SPECULATIVE_MAX_PER_MINUTE,
+)
+from src.core.metrics import (
+    span,
+    ROUTE_DECISIONS,
+    SPECULATIVE_DRAFTS,
+    SPECULATIVE_SAVED_SECONDS,
+)
+from src.integrates.openai_gateway import TokenBucket
+from src.utils.intent_classifier import get_classifier, has_after_service_cue
+from src.utils.local_intent_model import get_local_intent_model
+from src.utils.prototype_router import get_prototype_router
+from src.utils.entity_extractor import extract_entities, extract_ticket_code
+from src.utils.lexical_index import get_lexical_index
+from src.utils.deadlines import DeadlineExceeded, deadline_scope
+from src.utils.chat_procesing import append_or_queue, is_new_chat, open_chat
+from src.utils.stage_graph import Stage, run_stages
 
+logger = logging.getLogger(__name__)
 
-def classify_route(message: str) -> str:
-    # Step 1: try matching FAQ via Milvus
+
+def _record_route(result: Dict[str, Any]) -> Dict[str, Any]:
+    ROUTE_DECISIONS.inc(source=result.get("source", ""), route=result["route"])
+    logger.info(
+        "Turn classified",
+        extra={
+            "route": result["route"],
+            "intent": result.get("intent"),
+            "source": result.get("source"),
+        },
+    )
+    return result
+
+
+def _classify_locally(message: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Routing steps that need no LLM. Returns the result of the first confident step, or
+    None with the best FAQ score seen (vector match or prototype leaning FAQ).
+    """
+    faq_score = 0.0
+    lexical_match = None
+
+    # Step 1: a decisive lexical FAQ hit needs no embedding; ticket codes signal after-service
+    lexical_index = get_lexical_index()
+    if lexical_index and not extract_ticket_code(message):
+        with span("classify.lexical"):
+            lexical_results = lexical_index.search(message, top_k=2)
+        if lexical_index.is_decisive(lexical_results):
+            logger.debug("Lexical matched FAQ, score=%.2f", lexical_results[0]["score"])
+            lexical_match = {"route": "faq", "source": "lexical"}
+            # "Tôi bị trừ tiền hai lần" matches an FAQ entry word for word but is a
+            # complaint: with such wording the hit only counts once a router reads it as FAQ
+            if not has_after_service_cue(message):
+                return lexical_match, faq_score
+
+    # Step 2: try matching FAQ via Milvus
+    embedding = None
     try:
         milvus = get_milvus_client()
         embedding = milvus.embed_query(message)
         results = milvus.search_similar(embedding, top_k=1)
-        if results and results[0]["score"] >= 0.85:
-            print(f"[Milvus matched FAQ] score={results[0]['score']:.2f}")
-            return "faq"
+        if results:
+            faq_score = results[0]["score"]
+        if faq_score >= FAQ_MATCH_MIN_SCORE:
+            logger.debug("Milvus matched FAQ, score=%.2f", faq_score)
+            return {"route": "faq", "source": "milvus"}, faq_score
     except Exception as e:
-        print(f"[Milvus fallback triggered] {e}")
-
-    # Step 2: fallback to LLM if no good match
-    system_prompt = (
-        "Bạn là AI phân loại câu hỏi của người dùng thành một trong hai loại: `faq` hoặc `after_service`.\n\n"
-        "- `faq`: là những câu hỏi tra cứu thông tin như chính sách, hoàn tiền, hành lý, giờ chạy...\n"
-        "- `after_service`: là những yêu cầu xử lý sau bán như: đổi vé, huỷ vé, bị trừ tiền nhiều lần, xuất hoá đơn, khiếu nại...\n\n"
-        "Chỉ trả về một trong hai loại trên, không giải thích gì thêm.\n\n"
-    )
+        logger.warning("Milvus routing step failed: %s", e)
+
+    # Step 3: compare the same embedding against the route/intent prototype centroids
+    router = get_prototype_router()
+    if router and embedding is not None:
+        with span("classify.prototype_router"):
+            decision = router.route(embedding)
+        if router.is_confident(decision):
+            logger.debug(
+                "Prototype router %s/%s score=%.2f margin=%.3f",
+                decision["route"],
+                decision["intent"],
+                decision["score"],
+                decision["margin"],
+            )
+            return {
+                "route": decision["route"],
+                "intent": decision["intent"],
+                "entities": extract_entities(message),
+                "source": "prototype_router",
+            }, faq_score
+        if decision["route"] == "faq":
+            if lexical_match:
+                return lexical_match, faq_score
+            faq_score = max(faq_score, decision["score"])
+
+    # Step 4: local intent model trained from earlier LLM decisions
+    local_model = get_local_intent_model()
+    if local_model:
+        try:
+            with span("classify.local_model"):
+                prediction = local_model.predict(message)
+            if prediction["confidence"] >= LOCAL_INTENT_THRESHOLD:
+                logger.debug(
+                    "Local intent model %s/%s confidence=%.2f",
+                    prediction["route"],
+                    prediction["intent"],
+                    prediction["confidence"],
+                )
+                return {
+                    **prediction,
+                    "entities": extract_entities(message),
+                    "source": "local_model",
+                }, faq_score
+            if lexical_match and prediction["route"] == "faq":
+                return lexical_match, faq_score
+        except Exception as e:
+            logger.warning("Local intent model error: %s", e)
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=message),
-    ]
+    return None, faq_score
 
-    response = llm.invoke(messages)
-    print(f"[LLM classify fallback] result={response.content.strip()}")
-    return response.content.strip().lower()
 
+def _classify_with_llm(message: str) -> Dict[str, Any]:
+    # Step 5: fallback to a single LLM call returning route, intent and entities
+    with span("classify.llm"):
+        return get_classifier().classify_turn(message)
 
-def chat_service(message: str, chat_history: list[dict], chat_id: str = None) -> dict:
-    route = classify_route(message)
+
+def _route_locally(
+    message: str, chat_id: str = None
+) -> Tuple[Optional[Dict[str, Any]], float]:
+    """Route without the LLM if possible; see _classify_locally"""
+    # A ticket code or time answering a pending after-service request skips routing
+    follow_up = resolve_follow_up(message, chat_id, free_text=False)
+    if follow_up:
+        return {**follow_up, "route": "after_service"}, 0.0
+    with span("classify_turn"):
+        result, faq_score = _classify_locally(message)
+
+    if result is None or result["route"] != "faq":
+        # Any other text is taken as a pending complaint reason unless it reads as FAQ
+        follow_up = resolve_follow_up(message, chat_id)
+        if follow_up:
+            return {**follow_up, "route": "after_service"}, 0.0
+    else:
+        end_pending_request(chat_id)
+    return (_record_route(result) if result else None), faq_score
+
+
+def _answer_turn(message: str, chat_id: str, classification: Dict[str, Any]) -> dict:
+    route = classification["route"]
     if route == "faq":
         return faq_rag_chat(message=message, chat_id=chat_id)
     elif route == "after_service":
-        return after_service_chat(message=message, chat_id=chat_id)
+        # Reuse the intent from the routing call instead of classifying again
+        return after_service_chat(
+            message=message,
+            chat_id=chat_id,
+            classification=classification if classification.get("intent") else None,
+        )
+
+
+def _answer_within_deadline(
+    message: str, chat_id: str, classification: Optional[Dict[str, Any]]
+) -> dict:
+    if classification is not None:
+        try:
+            return _answer_turn(message, chat_id, classification)
+        except DeadlineExceeded as e:
+            logger.warning("Chat turn past its deadline, serving top FAQ answer: %s", e)
+    return top_faq_answer(message, chat_id)
+
+
+class FaqDraft:
+    """FAQ answer generated alongside the routing LLM call; nothing is saved until it is used"""
+
+    def __init__(self, message: str):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.routed_at: Optional[float] = None
+        self._running = False
+        self._discarded = False
+        self._lock = threading.Lock()
+        self.task = asyncio.ensure_future(run_in_threadpool(self._answer, message))
+        self.task.add_done_callback(self._done)
+
+    def _answer(self, message: str) -> Optional[dict]:
+        with self._lock:
+            if self._discarded:
+                return None
+            self._running = True
+        SPECULATIVE_DRAFTS.inc(outcome="started")
+        return faq_answer(message)
+
+    def _done(self, _task) -> None:
+        self.finished = time.perf_counter()
+
+    def discard(self) -> None:
+        with self._lock:
+            self._discarded = True
+            running = self._running
+        self.task.cancel()
+        if running:
+            # A running thread cannot be stopped: its calls are paid for and stay counted
+            SPECULATIVE_DRAFTS.inc(outcome="discarded")
+        else:
+            # Never reached a worker thread, so it gives its slot back
+            _draft_budget.refund(1)
+            SPECULATIVE_DRAFTS.inc(outcome="cancelled")
+
+    async def result(self) -> dict:
+        response = await self.task
+        finished = self.finished or time.perf_counter()
+        # Without the draft, answering would only have started once the route was known
+        SPECULATIVE_SAVED_SECONDS.observe(min(self.routed_at, finished) - self.started)
+        SPECULATIVE_DRAFTS.inc(outcome="used")
+        return response
+
+
+_draft_budget = TokenBucket(SPECULATIVE_MAX_PER_MINUTE)
+
+
+def _start_faq_draft(message: str, faq_score: float) -> Optional[FaqDraft]:
+    """Draft only while the router leans FAQ without being sure, within the per-minute cap"""
+    if not SPECULATIVE_ANSWERS or faq_score < SPECULATIVE_FAQ_MIN_SCORE:
+        return None
+    if extract_ticket_code(message):
+        return None
+    if _draft_budget.reserve(1) > 0:
+        _draft_budget.refund(1)
+        SPECULATIVE_DRAFTS.inc(outcome="capped")
+        return None
+    return FaqDraft(message)
+
+
+async def chat_turn(message: str, chat_id: str = None) -> Tuple[str, list[dict], dict]:
+    """
+    Run one chat turn as a stage graph. Local routing needs neither the chat id nor the
+    stored history, so it runs while the backend opens the chat and saves the user
+    message. The routing LLM call (and a speculative draft) waits for the chat to be
+    opened, so an unknown chat_id costs no completion; the answer waits for the save,
+    which keeps the assistant message after the user's.
+    Returns (actual_chat_id, chat_messages, response). chat_messages are the messages
+    stored before this turn; the user message is saved alongside and not included.
+    """
+    follow_up_chat_id = None if is_new_chat(chat_id) else chat_id
+
+    async def route_locally() -> Optional[Tuple[Optional[Dict[str, Any]], float]]:
+        try:
+            return await run_in_threadpool(_route_locally, message, follow_up_chat_id)
+        except DeadlineExceeded as e:
+            logger.warning("Routing past its deadline, serving top FAQ answer: %s", e)
+            return None
+
+    async def route(_chat, local) -> Tuple[Optional[Dict[str, Any]], Optional[FaqDraft]]:
+        if local is None:
+            return None, None
+        classification, faq_score = local
+        if classification is not None:
+            return classification, None
+
+        try:
+            draft = _start_faq_draft(message, faq_score)
+            try:
+                classification = await run_in_threadpool(_classify_with_llm, message)
+            except BaseException:
+                if draft is not None:
+                    draft.discard()
+                raise
+        except DeadlineExceeded as e:
+            logger.warning("Routing past its deadline, serving top FAQ answer: %s", e)
+            return None, None
+
+        _record_route(classification)
+        if classification["route"] == "faq" and follow_up_chat_id:
+            await run_in_threadpool(end_pending_request, follow_up_chat_id)
+        if draft is not None:
+            if classification["route"] == "faq":
+                draft.routed_at = time.perf_counter()
+            else:
+                draft.discard()
+                draft = None
+        return classification, draft
+
+    async def answer(chat, _saved, routed) -> dict:
+        classification, draft = routed
+        if draft is not None:
+            response = await draft.result()
+            save_faq_answer(message, chat[0], response)
+            return response
+        return await run_in_threadpool(
+            _answer_within_deadline, message, chat[0], classification
+        )
+
+    # The budget covers the whole turn, backend calls included
+    with deadline_scope(CHAT_DEADLINE_SECONDS):
+        results = await run_stages(
+            [
+                Stage("chat", lambda: open_chat(chat_id)),
+                Stage(
+                    "save_message",
+                    lambda chat: append_or_queue(chat[0], message),
+                    after=("chat",),
+                ),
+                Stage("route_locally", route_locally),
+                Stage("route", route, after=("chat", "route_locally")),
+                Stage("answer", answer, after=("chat", "save_message", "route")),
+            ]
+        )
+
+    actual_chat_id, chat_messages = results["chat"]
+    return actual_chat_id, chat_messages, results["answer"]
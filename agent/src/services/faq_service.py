@@ -1,15 +1,18 @@
-import os
-import sys
-import json
+import logging
 from typing import List, Dict
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
 
 from src.integrates.milvus import get_milvus_client
-from src.core.config import BACKEND_URL
-from src.utils.chat_procesing import append_message_to_chat
+from src.core.metrics import span, traced
+from src.integrates.llm import get_chat_llm, invoke_llm
+from src.utils.chat_procesing import save_message_to_chat
+from src.utils.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.circuit_breaker import CircuitOpenError
 
-llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
+logger = logging.getLogger(__name__)
+
+# Candidates taken from each retriever before fusion
+HYBRID_CANDIDATES = 5
 
 PROMPT_TEMPLATE = """System: Bạn là trợ lý ảo của Vexere tên là SniT. Bạn sẽ trả lời câu hỏi của người dùng dựa trên dữ liệu FAQ đặt trong thẻ <context>...</context>.
 Sử dụng những thông tin được cung cấp để trả lời câu hỏi người dùng đặt bên trong thẻ <question>...</question>.
@@ -32,49 +35,55 @@ def format_context(documents: List[Dict]) -> str:
     return "\n\n".join(context_parts)
 
 
+@traced("retrieve_docs")
 def retrieve_relevant_docs(query: str, top_k: int = 3) -> List[Dict]:
-    print(f"Searching for query: '{query}' with top_k: {top_k}")
+    candidates = max(top_k, HYBRID_CANDIDATES)
+
+    # Lexical BM25 first: a decisive hit answers without any embedding call
+    lexical_index = get_lexical_index()
+    with span("retrieve.lexical"):
+        lexical_results = lexical_index.search(query, candidates) if lexical_index else []
+    if lexical_index and lexical_index.is_decisive(lexical_results):
+        logger.debug("Lexical search decisive: score=%.2f", lexical_results[0]["score"])
+        return lexical_results[:top_k]
 
     try:
         # Get Milvus client instance
         milvus_client = get_milvus_client()
-        print(f"Milvus client connected: {milvus_client.connected}")
-        print(f"Milvus embeddings available: {milvus_client.embeddings is not None}")
-
-        if not milvus_client.connected:
+        # Down or behind an open breaker: skip the embedding call, lexical results answer
+        if not milvus_client.available():
             raise Exception("Milvus client is not connected to cloud")
 
         if not milvus_client.embeddings:
-            raise Exception("OpenAI embeddings not available")
+            raise Exception("Embedding provider not available")
 
         # First, convert query to embedding
         query_embedding = milvus_client.embed_query(query)
 
         # Then perform vector search using the embedding
-        vector_results = milvus_client.search_similar(query_embedding, top_k)
-        print(f"Vector search returned {len(vector_results)} results")
+        vector_results = milvus_client.search_similar(query_embedding, candidates)
+        logger.debug("Vector search returned %d results", len(vector_results))
 
-        if not vector_results:
-            print("No results found in Milvus Cloud")
+        if not vector_results and not lexical_results:
+            logger.info("No FAQ results found")
             return []
 
-        return vector_results
+        # Reciprocal rank fusion of the vector and lexical rankings
+        return reciprocal_rank_fusion([vector_results, lexical_results])[:top_k]
 
     except Exception as e:
-        print(f"Error retrieving documents from Milvus: {e}")
+        logger.error("Error retrieving documents from Milvus: %s", e)
+        if lexical_results:
+            return lexical_results[:top_k]
         raise e
 
 
 def generate_answer_with_llm(context: str, question: str) -> str:
-    if not llm:
-        return "Xin lỗi, hệ thống AI hiện không khả dụng."
-
     try:
-        prompt = PromptTemplate(
-            template=PROMPT_TEMPLATE, input_variables=["context", "question"]
-        )
-        formatted_prompt = prompt.format(context=context, question=question)
-        response = llm.invoke(formatted_prompt)
+        llm = get_chat_llm()
+        formatted_prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+        with span("llm.generate_answer"):
+            response = invoke_llm(llm, formatted_prompt)
 
         # Extract content from response properly
         if hasattr(response, "content"):
@@ -82,13 +91,51 @@ def generate_answer_with_llm(context: str, question: str) -> str:
         else:
             return str(response)
 
+    except (DeadlineExceeded, CircuitOpenError):
+        # faq_rag_chat answers with the top document instead
+        raise
     except Exception as e:
-        print(f"Error generating answer with LLM: {e}")
+        logger.error("Error generating answer with LLM: %s", e)
         return "Xin lỗi, đã có lỗi xảy ra khi tạo câu trả lời."
 
 
+def top_faq_answer(message: str, chat_id: str = None) -> dict:
+    """Best lexical FAQ match without embedding or LLM calls, for turns past their deadline"""
+    lexical_index = get_lexical_index()
+    results = lexical_index.search(message, top_k=1) if lexical_index else []
+    if results:
+        answer = f"Dựa trên thông tin FAQ: {results[0]['answer']}"
+    else:
+        answer = "Xin lỗi, hệ thống đang bận. Vui lòng thử lại sau hoặc liên hệ tổng đài 1900 6484."
+
+    if chat_id:
+        save_message_to_chat(chat_id, answer, "assistant")
+
+    return {
+        "success": True,
+        "message": answer,
+        "user_question": message,
+        "relevant_docs_count": len(results),
+        "chat_id": chat_id,
+        "degraded": True,
+    }
+
+
 def faq_rag_chat(message: str, chat_id: str = None) -> dict:
     """Main RAG chat function using Milvus Cloud vector search"""
+    response = faq_answer(message, chat_id)
+    save_faq_answer(message, chat_id, response)
+    return response
+
+
+def save_faq_answer(message: str, chat_id: str, response: dict) -> None:
+    """Save the assistant message of a faq_answer() response to chat history"""
+    if chat_id and message and message.strip():
+        save_message_to_chat(chat_id, response["message"], "assistant")
+
+
+def faq_answer(message: str, chat_id: str = None) -> dict:
+    """faq_rag_chat without saving to chat history, so it can be discarded"""
     try:
         if not message or not message.strip():
             return {
@@ -97,7 +144,7 @@ def faq_rag_chat(message: str, chat_id: str = None) -> dict:
                 "user_question": message,
             }
 
-        # TODO: Retrieve relevant documents from Milvus Cloud
+        # Retrieve relevant documents (vector search fused with the lexical index)
         try:
             relevant_docs = retrieve_relevant_docs(message, top_k=1)
         except Exception as e:
@@ -111,17 +158,6 @@ def faq_rag_chat(message: str, chat_id: str = None) -> dict:
         if not relevant_docs:
             answer = "Xin lỗi, tôi không tìm thấy thông tin phù hợp với câu hỏi của bạn. Vui lòng liên hệ tổng đài 1900 6484 để được hỗ trợ tốt hơn."
 
-            # Save assistant response to chat history
-            if chat_id:
-                try:
-                    import asyncio
-
-                    asyncio.create_task(
-                        append_message_to_chat(chat_id, answer, role="assistant")
-                    )
-                except Exception as e:
-                    print(f"Error saving assistant message to chat: {e}")
-
             return {
                 "success": True,
                 "message": answer,
@@ -129,27 +165,15 @@ def faq_rag_chat(message: str, chat_id: str = None) -> dict:
                 "relevant_docs_count": 0,
             }
 
-        # TODO: Generate answer using LLM
+        # Generate the answer from the retrieved documents
         try:
             context = format_context(relevant_docs)
-            print(f"Context sent to LLM: {context[:200]}...")
             answer = generate_answer_with_llm(context=context, question=message)
         except Exception as e:
-            print(f"Error generating answer with LLM: {e}")
+            logger.error("Error generating answer with LLM: %s", e)
             # Fallback to simple answer from the most relevant document
             answer = f"Dựa trên thông tin FAQ: {relevant_docs[0]['answer']}"
 
-        # Save assistant response to chat history
-        if chat_id:
-            try:
-                import asyncio
-
-                asyncio.create_task(
-                    append_message_to_chat(chat_id, answer, role="assistant")
-                )
-            except Exception as e:
-                print(f"Error saving assistant message to chat: {e}")
-
         return {
             "success": True,
             "message": answer,
@@ -159,22 +183,11 @@ def faq_rag_chat(message: str, chat_id: str = None) -> dict:
         }
 
     except Exception as e:
-        print(f"Error in rag_chat: {e}")
+        logger.exception("Error in rag_chat: %s", e)
         error_message = (
             "Xin lỗi, đã có lỗi xảy ra khi xử lý câu hỏi của bạn. Vui lòng thử lại sau."
         )
 
-        # Save error message to chat history
-        if chat_id:
-            try:
-                import asyncio
-
-                asyncio.create_task(
-                    append_message_to_chat(chat_id, error_message, role="assistant")
-                )
-            except Exception as e:
-                print(f"Error saving error message to chat: {e}")
-
         return {
             "success": False,
             "error": str(e),
@@ -1,82 +1,206 @@
+import time
 import httpx
+import asyncio
+import logging
+import threading
+from collections import deque
 from datetime import datetime
-from src.core.config import BACKEND_URL
+from typing import Deque, Dict, Optional
+from src.core.config import BACKEND_URL, PENDING_WRITES_MAX_ENTRIES
+from src.core.metrics import traced, BACKEND_PENDING_WRITES
+from src.utils.circuit_breaker import OPEN, CircuitOpenError, get_breaker
+
+logger = logging.getLogger(__name__)
 
 chat_history_url = f"{BACKEND_URL}/api/chat-history/"
 
+# Seconds between replay attempts of queued writes while the backend is down
+REPLAY_INTERVAL_SECONDS = 1.0
+
+
+def is_backend_outage(error: BaseException) -> bool:
+    """5xx responses, connection errors and timeouts; a 4xx still means the backend is up"""
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        return status_code >= 500
+    return True
+
+
+# Shared by chat-history calls here and the ticket calls of the after-service flow
+backend_breaker = get_breaker("backend", is_failure=is_backend_outage)
 
+# Chat-history appends made while the backend is down, replayed in order once it is back
+pending_writes: Deque[Dict[str, str]] = deque(maxlen=PENDING_WRITES_MAX_ENTRIES)
+_replayer: Optional[threading.Thread] = None
+_replayer_lock = threading.Lock()
+
+
+@traced("backend.get_messages")
 async def get_chat_messages_by_id(chat_id: str) -> list[dict]:
     """Get only the messages list from chat history"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{chat_history_url}{chat_id}")
-        response.raise_for_status()
-        chat_data = response.json()
-        return chat_data.get("data", {}).get("messages", [])
+
+    async def fetch():
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{chat_history_url}{chat_id}")
+            response.raise_for_status()
+            return response.json()
+
+    chat_data = await backend_breaker.acall(fetch)
+    return chat_data.get("data", {}).get("messages", [])
 
 
+@traced("backend.create_chat")
 async def create_new_chat() -> str:
     """Create a new chat and return its ID"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            chat_history_url,
-            json={
-                "title": "Chat conversation",
-                "status": "active",
-                "messages": [],
-            },
-        )
-        response.raise_for_status()
-        result = response.json()
-        return result["data"]["id"]
-
-
-async def append_message_to_chat(chat_id: str, message: str, role="user") -> None:
+
+    async def create():
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                chat_history_url,
+                json={
+                    "title": "Chat conversation",
+                    "status": "active",
+                    "messages": [],
+                },
+            )
+            response.raise_for_status()
+            return response.json()
+
+    result = await backend_breaker.acall(create)
+    return result["data"]["id"]
+
+
+@traced("backend.append_message")
+async def append_message_to_chat(
+    chat_id: str, message: str, role="user", timestamp: str = None
+) -> None:
     """Append a message to an existing chat"""
     payload = {
         "role": role,
         "content": message,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": timestamp or datetime.now().isoformat(),
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{chat_history_url}{chat_id}/messages",
-            json=payload,
-        )
-        response.raise_for_status()
-
-
-async def chat_exists(chat_id: str) -> bool:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{chat_history_url}{chat_id}")
-        if response.status_code == 200:
-            return True
-        elif response.status_code == 404:
-            return False
-        else:
-            raise Exception(f"Unexpected status code: {response.status_code}")
-
-
-async def chat_processing(chat_id: str, message: str) -> tuple[str, list[dict]]:
+
+    async def append():
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{chat_history_url}{chat_id}/messages",
+                json=payload,
+            )
+            response.raise_for_status()
+
+    await backend_breaker.acall(append)
+
+
+def queue_message(chat_id: str, message: str, role: str, timestamp: str = None) -> None:
+    """Keep an append for replay once the backend answers again"""
+    if len(pending_writes) == pending_writes.maxlen:
+        BACKEND_PENDING_WRITES.inc(outcome="dropped")
+        logger.warning("Pending chat writes full, dropping the oldest")
+    pending_writes.append(
+        {
+            "chat_id": chat_id,
+            "message": message,
+            "role": role,
+            "timestamp": timestamp or datetime.now().isoformat(),
+        }
+    )
+    BACKEND_PENDING_WRITES.inc(outcome="queued")
+
+    global _replayer
+    with _replayer_lock:
+        if _replayer is None:
+            _replayer = threading.Thread(target=_replay_pending_writes, daemon=True)
+            _replayer.start()
+
+
+def _replay_pending_writes() -> None:
+    global _replayer
+    while True:
+        with _replayer_lock:
+            if not pending_writes:
+                _replayer = None
+                return
+            write = pending_writes[0]
+
+        try:
+            asyncio.run(append_message_to_chat(**write))
+            BACKEND_PENDING_WRITES.inc(outcome="replayed")
+        except Exception as e:
+            if isinstance(e, CircuitOpenError) or is_backend_outage(e):
+                time.sleep(REPLAY_INTERVAL_SECONDS)
+                continue
+            BACKEND_PENDING_WRITES.inc(outcome="dropped")
+            logger.error("Dropping queued message for chat %s: %s", write["chat_id"], e)
+
+        with _replayer_lock:
+            # The bounded deque may have dropped it meanwhile
+            if pending_writes and pending_writes[0] is write:
+                pending_writes.popleft()
+
+
+async def append_or_queue(chat_id: str, message: str, role: str = "user") -> None:
+    """Append now, or queue the write while the backend is down or has writes queued"""
+    timestamp = datetime.now().isoformat()
+    # Nothing overtakes queued writes, so each chat keeps its message order
+    if pending_writes or backend_breaker.state == OPEN:
+        queue_message(chat_id, message, role, timestamp)
+        return
+    try:
+        await append_message_to_chat(chat_id, message, role, timestamp)
+    except Exception as e:
+        if not (isinstance(e, CircuitOpenError) or is_backend_outage(e)):
+            raise
+        logger.warning("Backend unavailable, queueing %s message for chat %s", role, chat_id)
+        queue_message(chat_id, message, role, timestamp)
+
+
+def save_message_to_chat(chat_id: str, message: str, role: str = "assistant"):
+    """Helper function to save message to chat in a separate thread"""
+
+    def run_async():
+        try:
+            asyncio.run(append_or_queue(chat_id, message, role))
+        except Exception as e:
+            logger.error("Error saving %s message to chat %s: %s", role, chat_id, e)
+
+    thread = threading.Thread(target=run_async)
+    thread.daemon = True
+    thread.start()
+
+
+def is_new_chat(chat_id: Optional[str]) -> bool:
+    return not chat_id or str(chat_id).strip().lower() in ["", "null", "undefined"]
+
+
+@traced("open_chat")
+async def open_chat(chat_id: Optional[str]) -> tuple[str, list[dict]]:
     """
-    Case 1: If chat_id is empty or none, create a new chat and append the message.
-    Case 2: If chat_id exists, append the message to the existing chat.
+    Case 1: If chat_id is empty or none, create a new chat (it has no messages yet).
+    Case 2: If chat_id exists, fetch its messages; the same request checks that it exists.
     Case 3: If chat_id is invalid, raise an error.
-    Returns tuple of (actual_chat_id, updated_chat_messages).
+    Returns tuple of (actual_chat_id, stored_chat_messages).
     """
-    actual_chat_id = chat_id
-
-    if not chat_id or str(chat_id).strip().lower() in ["", "null", "undefined"]:
-        # Case 1: Create a new chat
+    if is_new_chat(chat_id):
+        # Needs the backend to issue the id; fails fast while it is down
         actual_chat_id = await create_new_chat()
-        print(f"[DEBUG] Created new chat with ID: {actual_chat_id}")
-        await append_message_to_chat(actual_chat_id, message)
-    else:
-        # Case 2: Check if chat exists
-        if not await chat_exists(chat_id):
-            raise ValueError(f"Chat with ID {chat_id} does not exist.")
-        # Append the message to the existing chat
-        await append_message_to_chat(chat_id, message)
-
-    # Return the actual chat_id and updated chat messages
-    messages = await get_chat_messages_by_id(actual_chat_id)
-    return actual_chat_id, messages
+        logger.debug("Created new chat with ID: %s", actual_chat_id)
+        return actual_chat_id, []
+
+    if backend_breaker.state == OPEN:
+        # Backend down: answer anyway, the message is replayed once it is back
+        return chat_id, []
+
+    try:
+        return chat_id, await get_chat_messages_by_id(chat_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise ValueError(f"Chat with ID {chat_id} does not exist.") from None
+        if not is_backend_outage(e):
+            raise
+        logger.warning("Backend unavailable, continuing chat %s without history", chat_id)
+    except CircuitOpenError:
+        logger.warning("Backend unavailable, continuing chat %s without history", chat_id)
+    except httpx.TransportError as e:
+        logger.warning("Backend unreachable, continuing chat %s without history: %s", chat_id, e)
+    return chat_id, []
@@ -0,0 +1,151 @@
+"""
+Circuit breakers for the agent's dependencies (Milvus, OpenAI, the backend API).
+
+After failure_threshold consecutive failures a breaker opens and calls fail at once
+with CircuitOpenError, so callers switch to their fallback in microseconds instead of
+waiting for a timeout. After reset_seconds one probe call is let through (half-open):
+success closes the breaker, failure opens it for another reset_seconds. Functions passed
+to add_close_listener() are called with the breaker's name whenever one closes again.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+from src.core.metrics import CIRCUIT_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The dependency is considered down; use the fallback"""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        is_failure: Callable[[BaseException], Optional[bool]] = lambda error: True,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        # False for errors that still prove the dependency is up (e.g. a 404), None for
+        # errors that say nothing about it (e.g. a local queue timeout)
+        self.is_failure = is_failure
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            logger.warning("Circuit %s %s -> %s", self.name, self._state, state)
+            CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
+            self._state = state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._probing:
+                raise CircuitOpenError(f"{self.name} is unavailable")
+            # This caller is the probe; everyone else keeps failing fast meanwhile
+            self._probing = True
+            self._transition(HALF_OPEN)
+
+    def _close(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            recovered = self._state != CLOSED
+            self._transition(CLOSED)
+        if recovered:
+            # Outside the lock, listeners may call through this breaker
+            _notify_closed(self.name)
+
+    def record_success(self) -> None:
+        self._close()
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        verdict = True if error is None else self.is_failure(error)
+        if verdict is False:
+            # An answer from the dependency (e.g. a 404) still shows it is up
+            self._close()
+            return
+        with self._lock:
+            self._probing = False
+            if verdict is None:
+                return
+            self.failures += 1
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        self.before_call()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.before_call()
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_close_listeners: List[Callable[[str], None]] = []
+
+
+def add_close_listener(listener: Callable[[str], None]) -> None:
+    """Call listener(name) each time a breaker closes after being open"""
+    _close_listeners.append(listener)
+
+
+def _notify_closed(name: str) -> None:
+    for listener in list(_close_listeners):
+        try:
+            listener(name)
+        except Exception as e:
+            logger.error("Close listener for circuit %s failed: %s", name, e)
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Shared breaker per dependency; kwargs only apply when it is first created"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, str]:
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in sorted(_breakers.items())}
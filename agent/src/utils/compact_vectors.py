@@ -0,0 +1,90 @@
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+# Quantized rows are widened to float32 this many at a time, so a query never copies the whole matrix
+COSINE_BLOCK_ROWS = 1024
+
+
+class CompactVectors:
+    """
+    Row-major matrix of embeddings stored as float32, float16 or int8 with per-row norms.
+    int8 rows use symmetric per-row scales, so row i ~= data[i] * scales[i].
+    Cosine scores are computed in fixed-size blocks of rows without dequantizing rows one by one.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        norms: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+    ):
+        self.data = data
+        self.norms = norms
+        self.scales = scales
+
+    @classmethod
+    def from_array(
+        cls,
+        vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+        dtype: str = "float32",
+    ) -> "CompactVectors":
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype {dtype}. Must be one of: {VECTOR_DTYPES}")
+
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        # Norms come from the original values so quantization does not skew cosine scores
+        norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            data = np.round(vectors / scales[:, None]).astype(np.int8)
+            return cls(data, norms, scales.astype(np.float32))
+
+        return cls(vectors.astype(dtype, copy=False), norms)
+
+    @property
+    def dtype(self) -> str:
+        return self.data.dtype.name
+
+    @property
+    def shape(self) -> tuple:
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return self.data.nbytes + self.norms.nbytes + scales
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def to_float32(self) -> np.ndarray:
+        vectors = self.data.astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[:, None]
+        return vectors
+
+    def row(self, index: int) -> List[float]:
+        """One vector as a plain list, e.g. for a Milvus search request"""
+        vector = self.data[index].astype(np.float32)
+        if self.scales is not None:
+            vector *= self.scales[index]
+        return vector.tolist()
+
+    def cosine(self, query: Union[np.ndarray, Sequence[float]]) -> np.ndarray:
+        """Cosine similarity of one query vector against every row"""
+        query = np.asarray(query, dtype=np.float32)
+        if self.data.dtype == np.float32:
+            scores = self.data @ query
+        else:
+            scores = np.empty(len(self.data), dtype=np.float32)
+            for start in range(0, len(self.data), COSINE_BLOCK_ROWS):
+                block = self.data[start : start + COSINE_BLOCK_ROWS]
+                scores[start : start + len(block)] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales
+        denominator = self.norms * np.linalg.norm(query)
+        return scores / np.where(denominator == 0, 1.0, denominator)
@@ -0,0 +1,170 @@
+"""
+Latency bounds for the chat hot path.
+
+- deadline_scope() sets the budget of one chat turn; stage_timeout() gives each stage
+  the smaller of its own timeout and what is left of that budget.
+- run_within() / wait_within() stop waiting on a blocking call once its stage timeout
+  passes and raise DeadlineExceeded, so callers can fall back instead of hanging.
+- Hedger sends a duplicate of a slow upstream request once the first has taken longer
+  than the recent p95 of that stage, and returns whichever answers first.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    wait,
+)
+from typing import Any, Callable, Deque, Optional
+
+from src.core.config import HEDGE_REQUESTS, HEDGE_MIN_DELAY_MS
+from src.core.metrics import DEADLINE_EXCEEDED, HEDGED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Abandoned calls finish here on their client timeout. Hedges get their own pool so a
+# backlog of slow LLM calls cannot hold up embedding and search requests.
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="deadline")
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+# Samples kept per stage, and how many are needed before the p95 is trusted
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(Exception):
+    """A stage ran past its timeout or the turn's deadline"""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    token = _deadline.set(Deadline(seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+def stage_timeout(stage: str, timeout: float) -> float:
+    """Timeout of a stage capped by the turn deadline; raises if nothing is left"""
+    deadline = _deadline.get()
+    if deadline is not None:
+        timeout = min(timeout, deadline.remaining())
+    if timeout <= 0:
+        DEADLINE_EXCEEDED.inc(stage=stage)
+        raise DeadlineExceeded(f"No time left for {stage}")
+    return timeout
+
+
+def wait_within(future: Future, stage: str, timeout: float) -> Any:
+    timeout = stage_timeout(stage, timeout)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        DEADLINE_EXCEEDED.inc(stage=stage)
+        raise DeadlineExceeded(f"{stage} took longer than {timeout:.2f}s") from None
+
+
+def run_within(fn: Callable[[], Any], stage: str, timeout: float) -> Any:
+    """fn() in a worker thread (with this context, so the deadline follows), bounded"""
+    context = contextvars.copy_context()
+    return wait_within(_executor.submit(context.run, fn), stage, timeout)
+
+
+class LatencyTracker:
+    """Rolling p95 of the last LATENCY_WINDOW calls"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class Hedger:
+    """
+    Calls fn() and, if it has not answered after the stage's recent p95 (at least
+    HEDGE_MIN_DELAY_MS, default_delay_ms until enough samples), calls it once more.
+    Only for idempotent reads: both requests may reach the upstream.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        default_delay_ms: float,
+        enabled: bool = HEDGE_REQUESTS,
+        min_delay_ms: float = HEDGE_MIN_DELAY_MS,
+    ):
+        self.stage = stage
+        self.default_delay = default_delay_ms / 1000
+        self.min_delay = min_delay_ms / 1000
+        self.enabled = enabled
+        self.latency = LatencyTracker()
+
+    def delay(self) -> float:
+        p95 = self.latency.p95()
+        return max(self.min_delay, self.default_delay if p95 is None else p95)
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self.latency.observe(time.perf_counter() - started)
+        return result
+
+    def __call__(self, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return self._timed(fn)
+
+        delay = self.delay()
+        primary = _hedge_executor.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        logger.debug("Hedging %s after %.0fms", self.stage, delay * 1000)
+        HEDGED_REQUESTS.inc(stage=self.stage, outcome="sent")
+        hedge = _hedge_executor.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        HEDGED_REQUESTS.inc(stage=self.stage, outcome="won")
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,72 @@
+import re
+from typing import Dict, Optional
+
+# Ticket codes are either the public "VX..." code or the backend ObjectId
+TICKET_CODE_PATTERN = re.compile(r"\b(VX\d{3,}|[0-9a-fA-F]{24})\b", re.IGNORECASE)
+
+# "10:30", "10h30", "10h", "10 giờ 30", optionally followed by AM/PM or a Vietnamese period
+TIME_PATTERN = re.compile(
+    # A bare h or g is a unit only when no letter follows: "9h30", "9g sáng" but not "2 ghế"
+    r"\b(\d{1,2})\s*(?::|giờ|[hg](?![^\W\d_]))"
+    r"\s*(\d{2})?\s*(am|pm|sáng|trưa|chiều|tối|đêm)?",
+    re.IGNORECASE,
+)
+
+PM_PERIODS = {"pm", "chiều", "tối", "đêm"}
+
+
+def extract_ticket_code(message: str) -> Optional[str]:
+    match = TICKET_CODE_PATTERN.search(message or "")
+    if not match:
+        return None
+    code = match.group(1)
+    return code.upper() if code.upper().startswith("VX") else code
+
+
+def extract_schedule_time(message: str) -> Optional[str]:
+    """Extract a departure time and normalize it to the "hh:mm AM/PM" format used by the classifier"""
+    text = TICKET_CODE_PATTERN.sub(" ", message or "")
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    period = (match.group(3) or "").lower()
+    if hour > 23 or minute > 59:
+        return None
+
+    if period in PM_PERIODS and hour < 12:
+        hour += 12
+    elif period == "trưa" and hour < 5:
+        hour += 12
+    elif period in ("am", "sáng") and hour == 12:
+        hour = 0
+
+    suffix = "PM" if hour >= 12 else "AM"
+    display_hour = hour % 12 or 12
+    return f"{display_hour:02d}:{minute:02d} {suffix}"
+
+
+def slot_coverage(message: str) -> float:
+    """Share of the words of a message that are ticket codes or times"""
+    words = (message or "").split()
+    if not words:
+        return 0.0
+    rest = TIME_PATTERN.sub(" ", TICKET_CODE_PATTERN.sub(" ", message)).split()
+    return 1 - len(rest) / len(words)
+
+
+def extract_entities(message: str) -> Dict[str, str]:
+    """Rule-based extraction of the after-service slots that have a fixed shape"""
+    entities = {}
+
+    ticket_code = extract_ticket_code(message)
+    if ticket_code:
+        entities["ticket_code"] = ticket_code
+
+    schedule_time = extract_schedule_time(message)
+    if schedule_time:
+        entities["schedule_time"] = schedule_time
+
+    return entities
@@ -1,71 +1,128 @@
-import json
 import re
-from pprint import pprint
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
-from src.core.config import OPENAI_API_KEY
+import logging
+from typing import Dict, Any, Literal, Optional
+from pydantic import BaseModel, Field
+from src.core.config import (
+    CLASSIFICATION_CACHE_TTL_SECONDS,
+    CLASSIFICATION_CACHE_MAX_ENTRIES,
+)
+from src.core.metrics import span
+from src.integrates.llm import get_chat_llm, invoke_llm
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.entity_extractor import extract_entities
+from src.utils.text_processing import fold_diacritics
+from src.utils.shared_state import SharedCache
+from src.utils.local_intent_model import log_decision
 
+logger = logging.getLogger(__name__)
 
-class AfterServiceIntentClassifier:
-    """Intent classifier for after-service requests using LangChain"""
+IntentName = Literal[
+    "change_schedule",
+    "cancel_ticket",
+    "invoice_request",
+    "complaint",
+    "general_inquiry",
+]
 
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            api_key=OPENAI_API_KEY, model="gpt-4o-mini", temperature=0.1
-        )
 
-        self.intents = {
-            "change_schedule": {
-                "keywords": [
-                    "đổi giờ",
-                    "thay đổi giờ",
-                    "chuyển giờ",
-                    "đổi lịch",
-                    "thay đổi thời gian",
-                    "reschedule",
-                ],
-                "description": "Yêu cầu đổi giờ xe",
-            },
-            "cancel_ticket": {
-                "keywords": [
-                    "hủy vé",
-                    "hủy đặt",
-                    "cancel",
-                    "không đi",
-                    "hoàn tiền",
-                    "trả vé",
-                ],
-                "description": "Yêu cầu hủy vé",
-            },
-            "invoice_request": {
-                "keywords": [
-                    "xuất hóa đơn",
-                    "hóa đơn",
-                    "invoice",
-                    "VAT",
-                    "công ty",
-                    "hóa đơn điện tử",
-                ],
-                "description": "Yêu cầu xuất hóa đơn",
-            },
-            "complaint": {
-                "keywords": [
-                    "khiếu nại",
-                    "phản ánh",
-                    "complaint",
-                    "không hài lòng",
-                    "tồi tệ",
-                    "báo cáo",
-                ],
-                "description": "Khiếu nại dịch vụ",
-            },
-        }
+class AfterServiceEntities(BaseModel):
+    """Thông tin trích xuất từ tin nhắn của khách hàng"""
 
-    def classify_intent(self, message: str) -> Dict[str, Any]:
-        """Classify user intent using LangChain LLM"""
+    ticket_code: Optional[str] = Field(None, description="Mã vé, ví dụ VX123456789")
+    schedule_time: Optional[str] = Field(
+        None, description='Giờ muốn đổi, định dạng "hh:mm AM/PM"'
+    )
+    reason: Optional[str] = Field(None, description="Lý do khiếu nại")
+
+
+class IntentClassification(BaseModel):
+    """Ý định sau bán hàng và các thông tin đi kèm"""
+
+    intent: IntentName = Field(..., description="Ý định chính của khách hàng")
+    entities: AfterServiceEntities = Field(default_factory=AfterServiceEntities)
+
+
+class TurnClassification(IntentClassification):
+    """Loại câu hỏi, ý định sau bán hàng và các thông tin đi kèm"""
+
+    route: Literal["faq", "after_service"] = Field(
+        ..., description="faq: tra cứu thông tin; after_service: yêu cầu xử lý vé"
+    )
 
-        system_prompt = f"""
+
+# Validated classification results keyed by normalized message text
+classification_cache = SharedCache(
+    "classification",
+    ttl_seconds=CLASSIFICATION_CACHE_TTL_SECONDS,
+    max_entries=CLASSIFICATION_CACHE_MAX_ENTRIES,
+)
+
+
+def normalize_message(message: str) -> str:
+    return re.sub(r"\s+", " ", (message or "").strip().lower())
+
+
+# Wording of after-service requests, also used when no LLM is available
+INTENTS = {
+    "change_schedule": {
+        "keywords": [
+            "đổi giờ",
+            "thay đổi giờ",
+            "chuyển giờ",
+            "đổi lịch",
+            "thay đổi thời gian",
+            "reschedule",
+        ],
+        "description": "Yêu cầu đổi giờ xe",
+    },
+    "cancel_ticket": {
+        "keywords": [
+            "hủy vé",
+            "hủy đặt",
+            "cancel",
+            "không đi",
+            "hoàn tiền",
+            "trả vé",
+        ],
+        "description": "Yêu cầu hủy vé",
+    },
+    "invoice_request": {
+        "keywords": [
+            "xuất hóa đơn",
+            "hóa đơn",
+            "invoice",
+            "VAT",
+            "công ty",
+            "hóa đơn điện tử",
+        ],
+        "description": "Yêu cầu xuất hóa đơn",
+    },
+    "complaint": {
+        "keywords": [
+            "khiếu nại",
+            "phản ánh",
+            "complaint",
+            "không hài lòng",
+            "tồi tệ",
+            "báo cáo",
+        ],
+        "description": "Khiếu nại dịch vụ",
+    },
+}
+
+# Charge problems are complaints even when they match an FAQ entry word for word
+CHARGE_CUES = ["trừ tiền", "bị trừ", "thanh toán hai lần", "thanh toán 2 lần"]
+
+
+def has_after_service_cue(message: str) -> bool:
+    """Cancellation, complaint or charge wording in the message, accents ignored"""
+    text = fold_diacritics(message)
+    cues = INTENTS["cancel_ticket"]["keywords"] + INTENTS["complaint"]["keywords"] + CHARGE_CUES
+    return any(fold_diacritics(cue) in text for cue in cues)
+
+
+INTENT_PROMPT = """
         Bạn là một hệ thống phân loại ý định cho dịch vụ hỗ trợ sau bán hàng của VeXeRe.
         Nhiệm vụ của bạn là phân tích tin nhắn của khách hàng và xác định ý định chính.
 
@@ -76,29 +133,123 @@ class AfterServiceIntentClassifier:
         4. complaint: Khiếu nại, phản ánh dịch vụ
         5. general_inquiry: Các câu hỏi chung không thuộc các loại trên
 
-        Trả về kết quả dưới dạng JSON với định dạng:
-        {{
-            "intent": "tên_ý_định",
-            "entities": {{"ticket_code": "value", "schedule_time": "value", "reason": "value"}},
-        }}
-
+        Trích xuất mã vé (ticket_code), giờ muốn đổi (schedule_time) và lý do khiếu nại (reason) nếu có.
         Đối với "schedule_time" nếu có, phải tuân theo định dạng "hh:mm AM/PM"
+        """
+
+TURN_PROMPT = (
+    """
+        Trước tiên, phân loại câu hỏi của người dùng (route) thành một trong hai loại: `faq` hoặc `after_service`.
+        - `faq`: là những câu hỏi tra cứu thông tin như chính sách, hoàn tiền, hành lý, giờ chạy...
+        - `after_service`: là những yêu cầu xử lý sau bán như: đổi vé, huỷ vé, bị trừ tiền nhiều lần, xuất hoá đơn, khiếu nại...
 
-        Chỉ trả về JSON, không giải thích thêm.
+        Với `faq`, đặt intent là general_inquiry.
         """
+    + INTENT_PROMPT
+)
+
+
+class AfterServiceIntentClassifier:
+    """Intent classifier for after-service requests using LangChain"""
+
+    def __init__(self):
+        self.llm = get_chat_llm(temperature=0.1)
+        self.structured_llms = {}
+
+        self.intents = INTENTS
+
+    def classify_intent(self, message: str) -> Dict[str, Any]:
+        """Classify user intent using LangChain LLM structured output"""
+        return self._classify(
+            message, IntentClassification, INTENT_PROMPT, cache_prefix="intent"
+        )
+
+    def classify_turn(self, message: str) -> Dict[str, Any]:
+        """Classify route, intent and entities of a chat turn in a single LLM call"""
+        return self._classify(
+            message, TurnClassification, TURN_PROMPT, cache_prefix="turn"
+        )
+
+    def _classify(
+        self, message: str, schema: type, system_prompt: str, cache_prefix: str
+    ) -> Dict[str, Any]:
+        cache_key = f"{cache_prefix}:{normalize_message(message)}"
+        cached = classification_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "entities": dict(cached["entities"])}
 
         human_prompt = f"Phân tích tin nhắn sau: '{message}'"
 
         try:
             messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=human_prompt),
+                ("system", system_prompt),
+                ("human", human_prompt),
             ]
 
-            response = self.llm.invoke(messages)
-            result = json.loads(response.content)
-            pprint(result)
-            return result
+            structured_llm = self.structured_llms.get(schema)
+            if structured_llm is None:
+                structured_llm = self.llm.with_structured_output(
+                    schema, method="function_calling"
+                )
+                self.structured_llms[schema] = structured_llm
+            with span(f"llm.classify_{cache_prefix}"):
+                result = invoke_llm(structured_llm, messages).model_dump()
+            result["source"] = "llm"
+            logger.debug("LLM classification: %s", result)
 
+            classification_cache.set(cache_key, result)
+            log_decision(
+                message, result.get("route", "after_service"), result["intent"]
+            )
+            return {**result, "entities": dict(result["entities"])}
+
+        except DeadlineExceeded:
+            # The caller serves a degraded answer rather than guessing a route
+            raise
+        except CircuitOpenError:
+            # OpenAI is down; neither cached nor logged, it must not train the local model
+            return self.classify_by_rules(message)
         except Exception as e:
-            print(f"LLM classification error: {e}")
+            logger.error("LLM classification error: %s", e)
+            return {
+                "route": "after_service",
+                "intent": "general_inquiry",
+                "entities": {},
+                "source": "fallback",
+            }
+
+    def classify_by_rules(self, message: str) -> Dict[str, Any]:
+        """Keyword intents and regex entities, used while the LLM is unavailable"""
+        text = message.lower()
+        intent = next(
+            (
+                name
+                for name, spec in self.intents.items()
+                if any(keyword.lower() in text for keyword in spec["keywords"])
+            ),
+            "general_inquiry",
+        )
+        entities = extract_entities(message)
+        # Without an intent keyword or a ticket code the message is most likely a question
+        is_request = intent != "general_inquiry" or entities.get("ticket_code")
+        return {
+            "route": "after_service" if is_request else "faq",
+            "intent": intent,
+            "entities": entities,
+            "source": "rules",
+        }
+
+
+_classifier: Optional[AfterServiceIntentClassifier] = None
+
+
+def get_classifier() -> AfterServiceIntentClassifier:
+    """
+    The classifier shared by routing and the after-service handlers, so its LLM client
+    and structured-output chains are built once. Created on first use so importing this
+    module does not load the OpenAI client.
+    """
+    global _classifier
+    if _classifier is None:
+        _classifier = AfterServiceIntentClassifier()
+    return _classifier
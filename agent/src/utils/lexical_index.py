@@ -0,0 +1,138 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from src.core.config import (
+    FAQ_DATA_PATH,
+    LEXICAL_DECISIVE_SCORE,
+    LEXICAL_DECISIVE_RATIO,
+)
+from src.utils.text_processing import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def index_terms(text: str) -> List[str]:
+    """Syllables plus syllable bigrams, since Vietnamese words usually span two syllables"""
+    tokens = tokenize(text)
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+
+# Field boosts: the question carries most of the intent, the answer adds recall
+FIELD_WEIGHTS = {"question": 3, "category": 2, "answer": 1}
+
+
+class BM25Index:
+    """In-process BM25 over FAQ entries with diacritic-folded tokens"""
+
+    def __init__(self, documents: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.vocabulary: Dict[str, int] = {}
+
+        rows, cols, counts = [], [], []
+        for row, doc in enumerate(documents):
+            term_counts = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in index_terms(doc.get(field, "")):
+                    term_counts[token] = term_counts.get(token, 0) + weight
+            for token, count in term_counts.items():
+                rows.append(row)
+                cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                counts.append(count)
+
+        tf = sparse.csr_matrix(
+            (np.array(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(documents), len(self.vocabulary)),
+        )
+        doc_lengths = np.asarray(tf.sum(axis=1)).ravel()
+        document_frequency = np.bincount(tf.indices, minlength=len(self.vocabulary))
+        self.idf = np.log(
+            1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5)
+        ).astype(np.float32)
+
+        # Precompute the BM25 weight of every (document, term) pair once
+        length_norm = k1 * (1 - b + b * doc_lengths / max(doc_lengths.mean(), 1.0))
+        weights = tf.tocoo()
+        weights.data = (
+            self.idf[weights.col]
+            * weights.data
+            * (k1 + 1)
+            / (weights.data + length_norm[weights.row])
+        )
+        # Term-major layout makes scoring a query a sum of a few rows
+        self.term_weights = weights.T.tocsr()
+
+    @classmethod
+    def from_faq_file(cls, path: str = FAQ_DATA_PATH) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        term_ids = [
+            self.vocabulary[t] for t in index_terms(query) if t in self.vocabulary
+        ]
+        if not term_ids:
+            return []
+
+        scores = np.asarray(self.term_weights[term_ids].sum(axis=0)).ravel()
+        # Upper bound of the score for this query, used to normalize to [0, 1]
+        ideal = float(self.idf[term_ids].sum() * (self.k1 + 1)) or 1.0
+
+        top = np.argsort(scores)[::-1][:top_k]
+        return [
+            {
+                "question": self.documents[i].get("question", ""),
+                "category": self.documents[i].get("category", ""),
+                "answer": self.documents[i].get("answer", ""),
+                "score": float(scores[i] / ideal),
+                "bm25_score": float(scores[i]),
+            }
+            for i in top
+            if scores[i] > 0
+        ]
+
+    @staticmethod
+    def is_decisive(results: List[Dict[str, Any]]) -> bool:
+        """True when the best lexical hit is strong and clearly ahead of the runner-up"""
+        if not results or results[0]["score"] < LEXICAL_DECISIVE_SCORE:
+            return False
+        if len(results) == 1:
+            return True
+        return (
+            results[0]["bm25_score"]
+            >= LEXICAL_DECISIVE_RATIO * results[1]["bm25_score"]
+        )
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]], k: int = 60
+) -> List[Dict[str, Any]]:
+    """Merge ranked lists by summing 1 / (k + rank); the first list wins on duplicates"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.get("question") or doc.get("answer", "")
+            entry = fused.setdefault(key, {**doc, "rrf_score": 0.0})
+            entry["rrf_score"] += 1.0 / (k + rank + 1)
+    return sorted(fused.values(), key=lambda doc: doc["rrf_score"], reverse=True)
+
+
+_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> Optional[BM25Index]:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = BM25Index.from_faq_file()
+                except Exception as e:
+                    logger.error("Failed to build lexical FAQ index: %s", e)
+    return _index
@@ -0,0 +1,281 @@
+"""
+Lightweight in-process intent model trained from logged LLM routing decisions.
+
+Usage:
+    python -m src.utils.local_intent_model   # train from the decision log and save the model
+"""
+
+import os
+import json
+import zlib
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.core.config import INTENT_DECISION_LOG_PATH, INTENT_MODEL_PATH
+from src.utils.text_processing import char_ngrams
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 2**18
+MIN_EXAMPLES_PER_LABEL = 5
+
+# (path, JSON line) pairs appended by one background thread, off the request path
+_pending: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def log_decision(
+    message: str,
+    route: str,
+    intent: Optional[str] = None,
+    source: str = "llm",
+    path: str = INTENT_DECISION_LOG_PATH,
+) -> None:
+    """Queue a routing decision for the JSONL training log"""
+    record = {
+        "message": message,
+        "route": route,
+        "intent": intent,
+        "source": source,
+        "timestamp": datetime.now().isoformat(),
+    }
+    _pending.put((path, json.dumps(record, ensure_ascii=False) + "\n"))
+    _start_writer()
+
+
+def flush_decisions() -> None:
+    """Wait until every queued decision is written; also runs at exit"""
+    if _writer is not None:
+        _pending.join()
+
+
+def _start_writer() -> None:
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(
+                target=_write_loop, name="intent-decisions", daemon=True
+            )
+            _writer.start()
+            atexit.register(flush_decisions)
+
+
+def _write_loop() -> None:
+    while True:
+        # Everything queued meanwhile goes out with one open() per file
+        batch = [_pending.get()]
+        while True:
+            try:
+                batch.append(_pending.get_nowait())
+            except queue.Empty:
+                break
+
+        lines: Dict[str, List[str]] = {}
+        for path, line in batch:
+            lines.setdefault(path, []).append(line)
+        for path, file_lines in lines.items():
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(file_lines)
+            except Exception as e:
+                logger.error("Error logging intent decision: %s", e)
+
+        for _ in batch:
+            _pending.task_done()
+
+
+def load_decisions(path: str = INTENT_DECISION_LOG_PATH) -> List[Dict[str, Any]]:
+    decisions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                decisions.append(json.loads(line))
+    return decisions
+
+
+def decision_label(route: str, intent: Optional[str]) -> str:
+    return route if route == "faq" else f"{route}:{intent or 'general_inquiry'}"
+
+
+def split_label(label: str) -> Tuple[str, Optional[str]]:
+    route, _, intent = label.partition(":")
+    return route, intent or None
+
+
+class LocalIntentModel:
+    """Hashed character n-gram TF-IDF features with multinomial logistic regression"""
+
+    def __init__(
+        self,
+        labels: List[str] = None,
+        idf: np.ndarray = None,
+        weights: np.ndarray = None,
+        bias: np.ndarray = None,
+    ):
+        self.labels = labels or []
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    def _term_counts(self, messages: List[str]) -> sparse.csr_matrix:
+        rows, cols = [], []
+        for row, message in enumerate(messages):
+            for ngram in char_ngrams(message):
+                rows.append(row)
+                cols.append(zlib.crc32(ngram.encode("utf-8")) % N_FEATURES)
+        data = np.ones(len(rows), dtype=np.float32)
+        counts = sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(messages), N_FEATURES), dtype=np.float32
+        )
+        counts.sum_duplicates()
+        return counts
+
+    def _features(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        tf = counts.copy()
+        tf.data = 1.0 + np.log(tf.data)
+        tfidf = tf.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1))).ravel()
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ tfidf
+
+    def fit(
+        self,
+        messages: List[str],
+        labels: List[str],
+        epochs: int = 300,
+        learning_rate: float = 5.0,
+        l2: float = 1e-4,
+    ) -> "LocalIntentModel":
+        self.labels = sorted(set(labels))
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        y = np.array([label_index[label] for label in labels])
+
+        counts = self._term_counts(messages)
+        document_frequency = np.bincount(counts.indices, minlength=N_FEATURES)
+        self.idf = (
+            np.log((1 + len(messages)) / (1 + document_frequency)) + 1.0
+        ).astype(np.float32)
+        x = self._features(counts)
+
+        n_samples, n_labels = x.shape[0], len(self.labels)
+        targets = np.zeros((n_samples, n_labels), dtype=np.float32)
+        targets[np.arange(n_samples), y] = 1.0
+
+        self.weights = np.zeros((N_FEATURES, n_labels), dtype=np.float32)
+        self.bias = np.zeros(n_labels, dtype=np.float32)
+        for _ in range(epochs):
+            probabilities = self._softmax(x @ self.weights + self.bias)
+            error = (probabilities - targets) / n_samples
+            self.weights -= learning_rate * (x.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, messages: List[str]) -> np.ndarray:
+        x = self._features(self._term_counts(messages))
+        return self._softmax(x @ self.weights + self.bias)
+
+    def predict(self, message: str) -> Dict[str, Any]:
+        probabilities = self.predict_proba([message])[0]
+        best = int(np.argmax(probabilities))
+        route, intent = split_label(self.labels[best])
+        return {
+            "route": route,
+            "intent": intent,
+            "confidence": float(probabilities[best]),
+        }
+
+    def save(self, path: str = INTENT_MODEL_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Only keep the rows of features that were seen during training
+        rows = np.flatnonzero(np.abs(self.weights).sum(axis=1))
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            idf=self.idf,
+            rows=rows,
+            weights=self.weights[rows],
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path: str = INTENT_MODEL_PATH) -> "LocalIntentModel":
+        data = np.load(path)
+        weights = np.zeros((N_FEATURES, len(data["labels"])), dtype=np.float32)
+        weights[data["rows"]] = data["weights"]
+        return cls(
+            labels=data["labels"].tolist(),
+            idf=data["idf"],
+            weights=weights,
+            bias=data["bias"],
+        )
+
+
+_model: Optional[LocalIntentModel] = None
+_model_loaded = False
+
+
+def get_local_intent_model() -> Optional[LocalIntentModel]:
+    """Load the trained model once; returns None when no model has been trained yet"""
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model_loaded = True
+        if os.path.exists(INTENT_MODEL_PATH):
+            try:
+                _model = LocalIntentModel.load(INTENT_MODEL_PATH)
+                logger.info("Local intent model loaded: %s", _model.labels)
+            except Exception as e:
+                logger.error("Failed to load local intent model: %s", e)
+    return _model
+
+
+def train_from_log(
+    log_path: str = INTENT_DECISION_LOG_PATH, model_path: str = INTENT_MODEL_PATH
+) -> LocalIntentModel:
+    decisions = [d for d in load_decisions(log_path) if d.get("source") == "llm"]
+
+    # Latest decision wins when the same message was logged more than once
+    by_message = {}
+    for decision in decisions:
+        by_message[decision["message"]] = decision_label(
+            decision["route"], decision.get("intent")
+        )
+
+    label_counts = {}
+    for label in by_message.values():
+        label_counts[label] = label_counts.get(label, 0) + 1
+    kept = {
+        message: label
+        for message, label in by_message.items()
+        if label_counts[label] >= MIN_EXAMPLES_PER_LABEL
+    }
+    if len(set(kept.values())) < 2:
+        raise ValueError("Not enough labelled decisions to train the intent model")
+
+    model = LocalIntentModel().fit(list(kept.keys()), list(kept.values()))
+    model.save(model_path)
+    print(
+        f"Trained local intent model on {len(kept)} messages, labels={model.labels}"
+    )
+    return model
+
+
+if __name__ == "__main__":
+    train_from_log()
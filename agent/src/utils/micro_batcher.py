@@ -0,0 +1,91 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+# Batches run here, so neither the submitting caller nor the flusher waits on batch_fn
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="batch")
+
+
+class MicroBatcher:
+    """
+    Merges calls that arrive within max_wait_ms into one batch_fn call.
+    batch_fn receives the list of submitted items and must return one result per item.
+    submit() never waits on batch_fn; calling the batcher blocks until the result is in,
+    so from the event loop await asubmit() instead.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[Tuple[Any, Future]] = []
+        self._flush_at: Optional[float] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        batch = None
+        with self._cond:
+            self._pending.append((item, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take_pending()
+            elif len(self._pending) == 1:
+                # First item of a window: one long-lived thread flushes it after max_wait
+                self._flush_at = time.monotonic() + self.max_wait
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flusher.start()
+                self._cond.notify()
+
+        # A full batch is dispatched right away, without waiting for the window
+        if batch:
+            _executor.submit(self._run, batch)
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    async def asubmit(self, item: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _take_pending(self) -> List[Tuple[Any, Future]]:
+        batch, self._pending = self._pending, []
+        self._flush_at = None
+        return batch
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                remaining = self._flush_at - time.monotonic()
+                if remaining > 0:
+                    # Woken early, or a full batch took the window: check again
+                    self._cond.wait(remaining)
+                    continue
+                batch = self._take_pending()
+            _executor.submit(self._run, batch)
+
+    def _run(self, batch: List[Tuple[Any, Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"Batch function returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
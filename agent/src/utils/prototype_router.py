@@ -0,0 +1,137 @@
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.core.config import (
+    FAQ_DATA_PATH,
+    PROTOTYPE_ROUTER_MIN_SCORE,
+    PROTOTYPE_ROUTER_MIN_MARGIN,
+    VECTOR_DTYPE,
+)
+from src.utils.compact_vectors import CompactVectors
+
+logger = logging.getLogger(__name__)
+
+# Example utterances per "route:intent" label; FAQ questions are added per category at build time
+AFTER_SERVICE_PROTOTYPES = {
+    "after_service:change_schedule": [
+        "Tôi muốn đổi giờ xe",
+        "Đổi giờ vé VX123456789 sang 10:00 AM",
+        "Cho mình chuyển sang chuyến muộn hơn",
+        "Thay đổi thời gian khởi hành của vé",
+        "Tôi muốn dời lịch đi sang buổi chiều",
+    ],
+    "after_service:cancel_ticket": [
+        "Tôi muốn hủy vé",
+        "Hủy vé VX123456789 giúp tôi",
+        "Tôi không đi nữa, hủy đặt chỗ",
+        "Cho mình trả vé này",
+        "Hủy chuyến xe tôi đã đặt",
+    ],
+    "after_service:invoice_request": [
+        "Tôi muốn xuất hóa đơn",
+        "Xuất hóa đơn VAT cho vé VX123456789",
+        "Cho tôi hóa đơn điện tử cho công ty",
+        "Gửi hóa đơn cho vé tôi đã mua",
+    ],
+    "after_service:complaint": [
+        "Tôi muốn khiếu nại",
+        "Tài xế không lịch sự, tôi muốn phản ánh",
+        "Xe đến muộn 2 tiếng, tôi rất không hài lòng",
+        "Tôi bị trừ tiền nhiều lần",
+        "Khiếu nại vé VX123456789 vì nhà xe hủy chuyến",
+    ],
+}
+
+
+def load_prototypes(faq_path: str = FAQ_DATA_PATH) -> Dict[str, List[str]]:
+    prototypes = {}
+    with open(faq_path, "r", encoding="utf-8") as f:
+        for item in json.load(f):
+            prototypes.setdefault(f"faq:{item['category']}", []).append(
+                item["question"]
+            )
+    prototypes.update(AFTER_SERVICE_PROTOTYPES)
+    return prototypes
+
+
+class PrototypeRouter:
+    """Routes a query embedding to the closest label centroid of prototype utterances"""
+
+    def __init__(self, labels: List[str], centroids: CompactVectors):
+        self.labels = labels
+        self.centroids = centroids
+
+    @classmethod
+    def build(
+        cls,
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        prototypes: Dict[str, List[str]] = None,
+    ) -> "PrototypeRouter":
+        prototypes = prototypes or load_prototypes()
+        labels = list(prototypes.keys())
+        texts = [text for label in labels for text in prototypes[label]]
+        owners = np.repeat(
+            np.arange(len(labels)), [len(prototypes[label]) for label in labels]
+        )
+
+        vectors = np.asarray(embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        centroids = np.zeros((len(labels), vectors.shape[1]), dtype=np.float32)
+        np.add.at(centroids, owners, vectors)
+        return cls(labels, CompactVectors.from_array(centroids, VECTOR_DTYPE))
+
+    def route(self, query_embedding: List[float]) -> Dict[str, Any]:
+        scores = self.centroids.cosine(query_embedding)
+
+        best, second = np.argsort(scores)[::-1][:2]
+        label = self.labels[best]
+        route, _, intent = label.partition(":")
+
+        # Labels of the same route do not compete with each other for the route decision
+        other_route = [
+            scores[i]
+            for i, other in enumerate(self.labels)
+            if not other.startswith(f"{route}:")
+        ]
+        return {
+            "route": route,
+            "intent": intent if route == "after_service" else None,
+            "score": float(scores[best]),
+            "margin": float(scores[best] - scores[second]),
+            "route_margin": float(scores[best] - max(other_route, default=-1.0)),
+        }
+
+    def is_confident(self, decision: Dict[str, Any]) -> bool:
+        if decision["score"] < PROTOTYPE_ROUTER_MIN_SCORE:
+            return False
+        if decision["route"] == "faq":
+            return decision["route_margin"] >= PROTOTYPE_ROUTER_MIN_MARGIN
+        return decision["margin"] >= PROTOTYPE_ROUTER_MIN_MARGIN
+
+
+_router: Optional[PrototypeRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_prototype_router() -> Optional[PrototypeRouter]:
+    return _router
+
+
+def build_prototype_router(
+    embed_documents: Callable[[List[str]], List[List[float]]],
+) -> Optional[PrototypeRouter]:
+    """Embed the prototypes once and keep the centroid matrix in memory"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            try:
+                _router = PrototypeRouter.build(embed_documents)
+                logger.info("Prototype router ready with %d labels", len(_router.labels))
+            except Exception as e:
+                logger.error("Failed to build prototype router: %s", e)
+    return _router
@@ -0,0 +1,232 @@
+"""
+Shared state for caches, sessions and rate-limit cooldowns.
+
+The memory backend keeps everything in the current process, which is enough for a
+single worker. The Redis backend stores entries in Redis (or anything speaking its
+protocol) so that every worker of `uvicorn --workers N` / gunicorn sees the same
+sessions and cache entries.
+"""
+
+import time
+import pickle
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.config import STATE_BACKEND, STATE_KEY_PREFIX, STATE_REDIS_URL
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend:
+    """Namespaced key/value store with per-entry expiry"""
+
+    name = ""
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+    ) -> None:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self, namespace: str) -> None:
+        raise NotImplementedError
+
+    def incr(
+        self, namespace: str, key: str, amount: float, ttl_seconds: float
+    ) -> float:
+        """Add to a counter, creating it with the given expiry; returns the new value"""
+        raise NotImplementedError
+
+
+class MemoryBackend(StateBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._caches: Dict[str, TTLCache] = {}
+        # (namespace, key) -> (expires at, value)
+        self._counters: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, namespace: str, max_entries: int) -> TTLCache:
+        with self._lock:
+            cache = self._caches.get(namespace)
+            if cache is None:
+                # Expiry is passed on every set, so the default TTL is never used
+                cache = self._caches[namespace] = TTLCache(0, max_entries)
+            return cache
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        cache = self._caches.get(namespace)
+        return cache.get(key) if cache is not None else None
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+    ) -> None:
+        self._cache(namespace, max_entries).set(key, value, ttl_seconds)
+
+    def delete(self, namespace: str, key: str) -> None:
+        cache = self._caches.get(namespace)
+        if cache is not None:
+            cache.delete(key)
+
+    def clear(self, namespace: str) -> None:
+        cache = self._caches.get(namespace)
+        if cache is not None:
+            cache.clear()
+        with self._lock:
+            for counter in [c for c in self._counters if c[0] == namespace]:
+                del self._counters[counter]
+
+    def incr(
+        self, namespace: str, key: str, amount: float, ttl_seconds: float
+    ) -> float:
+        now = time.monotonic()
+        with self._lock:
+            expires_at, value = self._counters.get((namespace, key), (0.0, 0.0))
+            if expires_at <= now:
+                expires_at, value = now + ttl_seconds, 0.0
+            value += amount
+            self._counters[(namespace, key)] = (expires_at, value)
+            return value
+
+
+class RedisBackend(StateBackend):
+    """
+    Values are pickled, so the Redis instance must only be reachable by the agent.
+    Redis errors are logged and treated as cache misses rather than failing requests.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, url: str = STATE_REDIS_URL, prefix: str = STATE_KEY_PREFIX, client=None
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "STATE_BACKEND=redis needs the redis package: pip install redis"
+                ) from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("Redis get failed for %s: %s", namespace, e)
+            return None
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+    ) -> None:
+        # Size is bounded by expiry and the server's maxmemory policy, not max_entries
+        try:
+            self.client.set(
+                self._key(namespace, key),
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                px=max(1, int(ttl_seconds * 1000)),
+            )
+        except Exception as e:
+            logger.warning("Redis set failed for %s: %s", namespace, e)
+
+    def delete(self, namespace: str, key: str) -> None:
+        try:
+            self.client.delete(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("Redis delete failed for %s: %s", namespace, e)
+
+    def clear(self, namespace: str) -> None:
+        pattern = f"{self.prefix}:{namespace}:*"
+        keys = list(self.client.scan_iter(match=pattern, count=500))
+        if keys:
+            self.client.delete(*keys)
+
+    def incr(
+        self, namespace: str, key: str, amount: float, ttl_seconds: float
+    ) -> float:
+        full_key = self._key(namespace, key)
+        value = float(self.client.incrbyfloat(full_key, amount))
+        if value == amount:
+            # First increment of the window starts its expiry
+            self.client.pexpire(full_key, max(1, int(ttl_seconds * 1000)))
+        return value
+
+
+@lru_cache(maxsize=1)
+def get_state_backend() -> StateBackend:
+    """Created on first use, so forked workers never share a Redis connection"""
+    if STATE_BACKEND == "redis":
+        backend = RedisBackend()
+        logger.info("Shared state in Redis at %s", STATE_REDIS_URL.split("@")[-1])
+        return backend
+    if STATE_BACKEND != "memory":
+        raise ValueError(
+            f"Unknown STATE_BACKEND {STATE_BACKEND}. Must be memory or redis"
+        )
+    return MemoryBackend()
+
+
+class SharedCache:
+    """
+    TTLCache-compatible view of one namespace of the shared state backend.
+    The backend is resolved on first use, and can be pinned for tests.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+        backend: Optional[StateBackend] = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._backend = backend
+
+    @property
+    def backend(self) -> StateBackend:
+        return self._backend or get_state_backend()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.backend.get(self.namespace, key)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.backend.set(self.namespace, key, value, ttl, self.max_entries)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self.namespace, key)
+
+    def clear(self) -> None:
+        self.backend.clear(self.namespace)
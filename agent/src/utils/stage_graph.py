@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Sequence, Tuple
+
+from src.core.metrics import span
+
+
+class Stage(NamedTuple):
+    """
+    One step of a request. fn is called with the results of the stages named in
+    after, in that order, and returns an awaitable.
+    """
+
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    after: Tuple[str, ...] = ()
+
+
+async def run_stages(stages: Sequence[Stage]) -> Dict[str, Any]:
+    """
+    Run every stage as soon as the stages it depends on have finished, so stages that do
+    not depend on each other overlap. Stages must be listed after their dependencies.
+    Returns the result of each stage by name; the first error cancels the other stages.
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage) -> Any:
+        inputs = await asyncio.gather(*(tasks[name] for name in stage.after))
+        with span(f"stage.{stage.name}"):
+            return await stage.fn(*inputs)
+
+    seen = set()
+    for stage in stages:
+        unknown = [name for name in stage.after if name not in seen]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} runs after unknown stages {unknown}")
+        seen.add(stage.name)
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return dict(zip(tasks, results))
@@ -1,70 +1,186 @@
-# TODO: Store faq.json data to Milvus Zilliz Cloud vector store
+# Incremental ingestion of faq.json into the Milvus Zilliz Cloud vector store
 
 import json
-from langchain_core.documents import Document
-from langchain_community.vectorstores import Milvus
-from langchain_community.document_loaders import TextLoader
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import CharacterTextSplitter
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 import sys
 import os
-import logging
 
 
+# The agent root, so the script runs as python src/utils/<name>.py
 sys.path.append(
     os.path.abspath(
         os.path.join(
             os.path.dirname(__file__),
             "..",
+            "..",
         )
     )
 )
 
-from agent.src.schema.faq_schema import init_milvus_collection
-from core.config import (
-    MILVUS_CLOUD_ENDPOINT,
-    MILVUS_CLOUD_TOKEN,
-    MILVUS_CLOUD_DB_NAME,
-)
+from src.schema.faq_schema import init_milvus_collection
+from src.integrates.embeddings import get_embedding_provider, collection_name_for
+
+EMBED_BATCH_SIZE = 64
+EMBED_MAX_CONCURRENCY = 4
+
+
+def faq_key(item: Dict) -> str:
+    """Stable primary key of an FAQ entry, derived from its question"""
+    return hashlib.sha1(item["question"].strip().encode("utf-8")).hexdigest()
+
+
+def unique_questions(items: List[Dict]) -> Tuple[List[Dict], int]:
+    """First entry of every question, and how many later repeats were dropped"""
+    unique = {}
+    for item in items:
+        unique.setdefault(faq_key(item), item)
+    return list(unique.values()), len(items) - len(unique)
+
+
+def content_hash(item: Dict, model: str) -> str:
+    """Hash of everything that ends up in the row, including the embedding model"""
+    payload = json.dumps(
+        [model, item["question"], item["category"], item["answer"]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def embedding_text(item: Dict) -> str:
+    # Same text the previous LangChain pipeline embedded (page_content=answer)
+    return item["answer"]
+
+
+def plan_ingestion(
+    items: List[Dict], existing_hashes: Dict[str, str], model: str
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Return the rows that need (re-)embedding and the keys that no longer exist.
+    Questions must be unique: entries sharing one share a primary key.
+    """
+    rows = {}
+    for item in items:
+        rows[faq_key(item)] = {
+            "faq_id": faq_key(item),
+            "content_hash": content_hash(item, model),
+            "question": item["question"],
+            "category": item["category"],
+            "answer": item["answer"],
+        }
+
+    changed = [
+        row
+        for key, row in rows.items()
+        if existing_hashes.get(key) != row["content_hash"]
+    ]
+    stale = [key for key in existing_hashes if key not in rows]
+    return changed, stale
 
-COLLECTION_NAME = "faq_vexere"
+
+def fetch_existing_hashes(collection) -> Dict[str, str]:
+    records = collection.query(
+        expr='faq_id != ""', output_fields=["faq_id", "content_hash"], limit=16384
+    )
+    return {record["faq_id"]: record["content_hash"] for record in records}
+
+
+def embed_in_batches(
+    embeddings,
+    texts: List[str],
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+) -> List[List[float]]:
+    """Batched embed_documents calls with at most max_concurrency requests in flight"""
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = executor.map(embeddings.embed_documents, batches)
+    return [vector for batch in results for vector in batch]
 
 
-def store_faq_to_milvus(data_path: str = "src/mock/faq.json"):
-    # Initialize Milvus collection
-    init_milvus_collection(collection_name=COLLECTION_NAME)
+def store_faq_to_milvus(
+    data_path: str = "src/mock/faq.json",
+    recreate: bool = False,
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    provider: str = None,
+    embeddings=None,
+    collection=None,
+) -> Dict[str, int]:
+    embeddings = embeddings or get_embedding_provider(provider)
+    model = embeddings.model
+    collection_name = collection_name_for(embeddings.dimension)
+
+    # Initialize Milvus collection (one per embedding dimension)
+    if collection is None:
+        collection = init_milvus_collection(
+            collection_name=collection_name,
+            recreate=recreate,
+            dim=embeddings.dimension,
+        )
 
     with open(data_path, "r", encoding="utf-8") as f:
         raw_data = json.load(f)
 
-    docs = [
-        Document(
-            page_content=item["answer"],
-            metadata={"question": item["question"], "category": item["category"]},
+    items, duplicates = unique_questions(raw_data)
+    if duplicates:
+        print(f"Skipping {duplicates} repeated questions in {data_path}")
+
+    existing_hashes = fetch_existing_hashes(collection)
+    changed, stale = plan_ingestion(items, existing_hashes, model)
+
+    if changed:
+        vectors = embed_in_batches(
+            embeddings,
+            [embedding_text(row) for row in changed],
+            batch_size=batch_size,
+            max_concurrency=max_concurrency,
         )
-        for item in raw_data
-    ]
+        for row, vector in zip(changed, vectors):
+            row["embedding"] = vector
+        for i in range(0, len(changed), batch_size):
+            collection.upsert(changed[i : i + batch_size])
 
-    embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-
-    # Specify the correct field names that match your schema
-    vector_store = Milvus.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        connection_args={
-            "uri": MILVUS_CLOUD_ENDPOINT,
-            "token": MILVUS_CLOUD_TOKEN,
-            "db_name": MILVUS_CLOUD_DB_NAME,
-        },
-        collection_name=COLLECTION_NAME,
-        vector_field="embedding",
-        text_field="answer",
-    )
+    if stale:
+        collection.delete(expr=f"faq_id in {json.dumps(stale)}")
 
-    print(
-        f"Stored {len(docs)} documents to Milvus Cloud collection: {vector_store.collection_name}"
-    )
+    if changed or stale:
+        collection.flush()
+
+    summary = {
+        "total": len(items),
+        "duplicates": duplicates,
+        "upserted": len(changed),
+        "deleted": len(stale),
+        "unchanged": len(items) - len(changed),
+    }
+    print(f"FAQ ingestion into {collection_name} ({model}): {summary}")
+    return summary
 
 
 if __name__ == "__main__":
-    store_faq_to_milvus()
+    parser = argparse.ArgumentParser(description="Incremental FAQ ingestion")
+    parser.add_argument("--data-path", default="src/mock/faq.json")
+    parser.add_argument(
+        "--recreate",
+        action="store_true",
+        help="Drop and rebuild the collection (needed once for the legacy schema)",
+    )
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--max-concurrency", type=int, default=EMBED_MAX_CONCURRENCY)
+    parser.add_argument(
+        "--provider",
+        choices=["openai", "local"],
+        help="Embedding provider (defaults to EMBEDDING_PROVIDER)",
+    )
+    args = parser.parse_args()
+
+    store_faq_to_milvus(
+        data_path=args.data_path,
+        recreate=args.recreate,
+        batch_size=args.batch_size,
+        max_concurrency=args.max_concurrency,
+        provider=args.provider,
+    )
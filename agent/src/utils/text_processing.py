@@ -0,0 +1,23 @@
+import re
+import unicodedata
+
+
+def fold_diacritics(text: str) -> str:
+    """Lowercase and strip Vietnamese diacritics so "hoàn tiền" and "hoan tien" compare equal"""
+    text = (text or "").lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", fold_diacritics(text))
+
+
+def char_ngrams(text: str, min_n: int = 2, max_n: int = 4) -> list[str]:
+    """Character n-grams inside word boundaries, robust to typos and missing accents"""
+    ngrams = []
+    for token in tokenize(text):
+        padded = f" {token} "
+        for n in range(min_n, max_n + 1):
+            ngrams.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+    return ngrams
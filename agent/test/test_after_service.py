@@ -19,7 +19,11 @@ from src.services.after_service_service import (
     get_all_tickets,
     get_ticket_info,
     AfterServiceHandler,
+    resolve_follow_up,
+    session_store,
 )
+from src.services import chat_service
+from src.utils.entity_extractor import extract_entities
 
 
 class TestAfterServiceUtils(unittest.TestCase):
@@ -88,9 +92,18 @@ class TestAfterServiceHandler(unittest.TestCase):
 
     def setUp(self):
         # Mock the classifier to avoid dependency issues
-        with patch("src.services.after_service_service.AfterServiceIntentClassifier"):
+        with patch("src.services.after_service_service.get_classifier"):
             self.handler = AfterServiceHandler()
 
+    def test_handlers_share_one_classifier(self):
+        with patch("src.utils.intent_classifier._classifier", None), patch(
+            "src.utils.intent_classifier.AfterServiceIntentClassifier"
+        ) as classifier_class:
+            first, second = AfterServiceHandler(), AfterServiceHandler()
+
+        classifier_class.assert_called_once()
+        self.assertIs(first.classifier, second.classifier)
+
     def test_handle_change_schedule_missing_ticket_id(self):
         message = "Tôi muốn đổi giờ xe"
         entities = {"schedule_time": "10:00"}
@@ -559,7 +572,7 @@ class TestAfterServiceEdgeCases(unittest.TestCase):
     """Test edge cases and error scenarios"""
 
     def setUp(self):
-        with patch("src.services.after_service_service.AfterServiceIntentClassifier"):
+        with patch("src.services.after_service_service.get_classifier"):
             self.handler = AfterServiceHandler()
 
     @patch("src.services.after_service_service.requests.put")
@@ -624,5 +637,147 @@ class TestAfterServiceEdgeCases(unittest.TestCase):
         self.assertIn(long_reason, result["response"])
 
 
+class TestAfterServiceSession(unittest.TestCase):
+    """Test multi-turn slot filling through the session store"""
+
+    def setUp(self):
+        session_store.clear()
+
+    def tearDown(self):
+        session_store.clear()
+
+    def test_extract_entities(self):
+        self.assertEqual(
+            extract_entities("Đổi vé VX123456789 sang 3h30 chiều"),
+            {"ticket_code": "VX123456789", "schedule_time": "03:30 PM"},
+        )
+        self.assertEqual(
+            extract_entities("sang 10:00 nhé"), {"schedule_time": "10:00 AM"}
+        )
+        self.assertEqual(extract_entities("Tôi muốn đổi giờ"), {})
+
+    def test_counts_are_not_read_as_times(self):
+        self.assertEqual(extract_entities("Cho tôi đặt 2 ghế"), {})
+        self.assertEqual(extract_entities("Vé cho 2 hành khách"), {})
+        self.assertEqual(
+            extract_entities("Đặt 2 ghế chuyến 9g sáng"), {"schedule_time": "09:00 AM"}
+        )
+        self.assertEqual(extract_entities("đi lúc 7 giờ tối"), {"schedule_time": "07:00 PM"})
+
+    @patch("src.services.after_service_service.save_message_to_chat")
+    @patch("src.services.after_service_service.requests.put")
+    @patch("src.services.after_service_service.get_ticket_info")
+    @patch("src.services.after_service_service.get_classifier")
+    def test_follow_up_merges_slots_without_reclassifying(
+        self, mock_get_classifier, mock_get_ticket, mock_put, mock_save
+    ):
+        mock_classifier = mock_get_classifier.return_value
+        mock_classifier.classify_intent.return_value = {
+            "intent": "change_schedule",
+            "entities": {"ticket_code": "VX123456789", "schedule_time": None},
+        }
+        mock_get_ticket.return_value = {"id": "VX123456789", "status": "confirmed"}
+        mock_put.return_value = MagicMock(status_code=200)
+
+        first = after_service_chat("Tôi muốn đổi giờ vé VX123456789", "chat_789")
+        self.assertIn("giờ muốn đổi", first["response"])
+
+        self.assertIsNone(resolve_follow_up("Cảm ơn bạn", "chat_789"))
+        second = after_service_chat("Cho mình 10:30 tối", "chat_789")
+
+        self.assertEqual(mock_classifier.classify_intent.call_count, 1)
+        self.assertEqual(second["classification"]["source"], "session")
+        self.assertIn("thành công", second["response"])
+        self.assertIn("10:30 PM", second["response"])
+        self.assertIsNone(session_store.get("chat_789"))
+
+    def test_verified_ticket_is_not_fetched_twice(self):
+        with patch("src.services.after_service_service.get_classifier"):
+            handler = AfterServiceHandler(session_state={})
+
+        with patch(
+            "src.services.after_service_service.get_ticket_info"
+        ) as mock_get_ticket:
+            mock_get_ticket.return_value = {"id": "VX123456789"}
+            self.assertTrue(handler.ticket_exists("VX123456789"))
+            self.assertTrue(handler.ticket_exists("VX123456789"))
+            mock_get_ticket.assert_called_once_with("VX123456789")
+
+    def test_complaint_reason_follow_up(self):
+        session_store.set(
+            "chat_321",
+            {"intent": "complaint", "entities": {"ticket_code": "VX123456789"}},
+        )
+
+        result = resolve_follow_up("Xe đến muộn 2 tiếng", "chat_321")
+
+        self.assertEqual(result["intent"], "complaint")
+        self.assertEqual(result["entities"]["reason"], "Xe đến muộn 2 tiếng")
+
+
+class TestFollowUpRouting(unittest.TestCase):
+    """A pending request only takes messages that answer it"""
+
+    def setUp(self):
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def _pend(self, intent):
+        session_store.set(
+            "chat_1", {"intent": intent, "entities": {"ticket_code": "VX123456789"}}
+        )
+
+    def _route(self, message, local_result):
+        with patch.object(
+            chat_service, "_classify_locally", return_value=local_result
+        ) as classify:
+            result, _ = chat_service._route_locally(message, "chat_1")
+        return result, classify
+
+    def test_time_reply_is_merged_without_routing(self):
+        self._pend("change_schedule")
+
+        result, classify = self._route("Cho mình 10:30 tối", (None, 0.0))
+
+        classify.assert_not_called()
+        self.assertEqual(result["entities"]["schedule_time"], "10:30 PM")
+
+    def test_faq_question_with_a_time_is_not_taken_as_the_new_time(self):
+        self._pend("change_schedule")
+
+        result, _ = self._route(
+            "xe chạy lúc 8h có wifi không?", ({"route": "faq", "source": "vector"}, 0.9)
+        )
+
+        self.assertEqual(result["route"], "faq")
+        self.assertIsNone(session_store.get("chat_1"))
+
+    def test_unclear_question_with_a_time_goes_to_the_router(self):
+        self._pend("change_schedule")
+
+        result, _ = self._route("xe chạy lúc 8h có wifi không?", (None, 0.3))
+
+        self.assertIsNone(result)
+        self.assertNotIn("schedule_time", session_store.get("chat_1")["entities"])
+
+    def test_faq_question_is_not_stored_as_complaint_reason(self):
+        self._pend("complaint")
+
+        result, _ = self._route(
+            "Hành lý được mang bao nhiêu kg?", ({"route": "faq", "source": "vector"}, 0.9)
+        )
+
+        self.assertEqual(result["route"], "faq")
+        self.assertIsNone(session_store.get("chat_1"))
+
+    def test_other_text_is_the_complaint_reason(self):
+        self._pend("complaint")
+
+        result, _ = self._route("Xe đến muộn 2 tiếng", (None, 0.2))
+
+        self.assertEqual(result["route"], "after_service")
+        self.assertEqual(result["entities"]["reason"], "Xe đến muộn 2 tiếng")
+
+
 if __name__ == "__main__":
     unittest.main()
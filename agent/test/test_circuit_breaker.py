@@ -0,0 +1,241 @@
+import unittest
+import time
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils import chat_procesing
+from src.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    add_close_listener,
+)
+from src.utils import circuit_breaker
+from src.utils.intent_classifier import AfterServiceIntentClassifier
+
+
+def fail():
+    raise ConnectionError("connection refused")
+
+
+def raising(error: Exception):
+    def call():
+        raise error
+
+    return call
+
+
+def http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://backend/api/chat-history/1/messages")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        breaker = CircuitBreaker("milvus", failure_threshold=2, reset_seconds=60)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+        self.assertEqual(breaker.state, OPEN)
+
+        calls = []
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: calls.append(1))
+        self.assertEqual(calls, [])
+
+    def test_success_resets_the_failure_count(self):
+        breaker = CircuitBreaker("milvus", failure_threshold=2, reset_seconds=60)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        breaker.call(lambda: "ok")
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        breaker = CircuitBreaker("openai", failure_threshold=1, reset_seconds=0.05)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+        # A failed probe opens the breaker for another reset period
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_close_listeners_hear_only_recoveries(self):
+        closed = []
+        with patch.object(circuit_breaker, "_close_listeners", []):
+            add_close_listener(closed.append)
+            breaker = CircuitBreaker("milvus", failure_threshold=1, reset_seconds=0)
+            breaker.call(lambda: "ok")
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+            breaker.call(lambda: "ok")
+            breaker.call(lambda: "ok")
+        self.assertEqual(closed, ["milvus"])
+
+    def test_only_one_probe_at_a_time(self):
+        breaker = CircuitBreaker("backend", failure_threshold=1, reset_seconds=0)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+
+        breaker.before_call()  # the probe
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_errors_that_are_not_outages_do_not_trip(self):
+        breaker = CircuitBreaker(
+            "backend",
+            failure_threshold=1,
+            is_failure=chat_procesing.is_backend_outage,
+        )
+        with self.assertRaises(httpx.HTTPStatusError):
+            breaker.call(raising(http_error(404)))
+        self.assertEqual(breaker.state, CLOSED)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            breaker.call(raising(http_error(503)))
+        self.assertEqual(breaker.state, OPEN)
+
+
+class TestOpenAIBreaker(unittest.TestCase):
+
+    def test_open_breaker_fails_fast_without_calling_openai(self):
+        from src.integrates.openai_gateway import OpenAIGateway
+
+        gateway = OpenAIGateway(max_retries=0)
+        breaker = CircuitBreaker("openai:test-model", failure_threshold=1, reset_seconds=60)
+        breaker.record_failure()
+        request = MagicMock()
+
+        with patch.object(gateway, "breaker", return_value=breaker):
+            with self.assertRaises(CircuitOpenError):
+                gateway.call("test-model", request)
+        request.assert_not_called()
+
+    def test_rule_based_intents_while_openai_is_down(self):
+        with patch("src.utils.intent_classifier.get_chat_llm"):
+            classifier = AfterServiceIntentClassifier()
+
+        cancel = classifier.classify_by_rules("Tôi muốn hủy vé VX123456789")
+        self.assertEqual(cancel["route"], "after_service")
+        self.assertEqual(cancel["intent"], "cancel_ticket")
+        self.assertEqual(cancel["entities"]["ticket_code"], "VX123456789")
+        self.assertEqual(cancel["source"], "rules")
+
+        question = classifier.classify_by_rules("Hành lý được mang bao nhiêu kg?")
+        self.assertEqual(question["route"], "faq")
+        self.assertEqual(question["intent"], "general_inquiry")
+
+
+class TestMilvusReconnect(unittest.TestCase):
+
+    def test_reconnects_through_the_breaker_after_an_outage(self):
+        from src.integrates.milvus import MilvusClient
+
+        client = MilvusClient.__new__(MilvusClient)
+        client.initialized = True
+        client.connected = False
+        client.collection_name = "faq_vexere"
+        client.breaker = CircuitBreaker("milvus", failure_threshold=1, reset_seconds=0.05)
+        client._init_lock = MagicMock()
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            client.connected = len(attempts) > 1
+
+        client._connect = connect
+
+        self.assertFalse(client.available())
+        # Open: no reconnect attempt until the reset period has passed
+        self.assertFalse(client.available())
+        self.assertEqual(len(attempts), 1)
+
+        time.sleep(0.06)
+        self.assertTrue(client.available())
+        self.assertEqual(len(attempts), 2)
+
+
+class TestPendingWrites(unittest.TestCase):
+
+    def setUp(self):
+        chat_procesing.pending_writes.clear()
+        breaker = CircuitBreaker(
+            "backend",
+            failure_threshold=1,
+            reset_seconds=0,
+            is_failure=chat_procesing.is_backend_outage,
+        )
+        for name, value in (("backend_breaker", breaker), ("REPLAY_INTERVAL_SECONDS", 0.01)):
+            patcher = patch.object(chat_procesing, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(chat_procesing.pending_writes.clear)
+
+    def test_writes_are_queued_during_an_outage_and_replayed_in_order(self):
+        saved = []
+        backend_up = [False]
+
+        async def post(chat_id, message, role="user", timestamp=None):
+            async def send():
+                if not backend_up[0]:
+                    raise httpx.ConnectError("connection refused")
+                saved.append((chat_id, message, role))
+
+            await chat_procesing.backend_breaker.acall(send)
+
+        with patch.object(chat_procesing, "append_message_to_chat", side_effect=post):
+            asyncio.run(chat_procesing.append_or_queue("chat_1", "Hủy vé giúp tôi"))
+            asyncio.run(chat_procesing.append_or_queue("chat_1", "Đã hủy", "assistant"))
+            self.assertEqual(saved, [])
+            self.assertEqual(len(chat_procesing.pending_writes), 2)
+
+            backend_up[0] = True
+            deadline = time.monotonic() + 2
+            while chat_procesing.pending_writes and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(
+            saved,
+            [("chat_1", "Hủy vé giúp tôi", "user"), ("chat_1", "Đã hủy", "assistant")],
+        )
+
+    def test_client_errors_are_raised_not_queued(self):
+        with patch.object(
+            chat_procesing,
+            "append_message_to_chat",
+            AsyncMock(side_effect=http_error(404)),
+        ):
+            with self.assertRaises(httpx.HTTPStatusError):
+                asyncio.run(chat_procesing.append_or_queue("missing", "Xin chào"))
+        self.assertEqual(len(chat_procesing.pending_writes), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
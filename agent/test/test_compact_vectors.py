@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils import compact_vectors
+from src.utils.compact_vectors import CompactVectors
+
+
+class TestCompactVectors(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        cls.vectors = rng.normal(0, 0.02, (50, 1536))
+        cls.query = rng.normal(0, 0.02, 1536)
+        normalized = cls.vectors / np.linalg.norm(cls.vectors, axis=1, keepdims=True)
+        cls.expected = normalized @ (cls.query / np.linalg.norm(cls.query))
+
+    def test_float32_matches_exact_cosine(self):
+        compact = CompactVectors.from_array(self.vectors)
+        self.assertEqual(compact.dtype, "float32")
+        np.testing.assert_allclose(compact.cosine(self.query), self.expected, atol=1e-5)
+
+    def test_quantized_scores_stay_close(self):
+        for dtype, atol in (("float16", 1e-3), ("int8", 2e-2)):
+            compact = CompactVectors.from_array(self.vectors, dtype)
+            self.assertEqual(compact.dtype, dtype)
+            scores = compact.cosine(self.query)
+            np.testing.assert_allclose(scores, self.expected, atol=atol)
+            self.assertEqual(np.argmax(scores), np.argmax(self.expected))
+
+    def test_blocked_scores_match_one_block(self):
+        for dtype in ("float16", "int8"):
+            compact = CompactVectors.from_array(self.vectors, dtype)
+            whole = compact.cosine(self.query)
+            with patch.object(compact_vectors, "COSINE_BLOCK_ROWS", 7):
+                np.testing.assert_allclose(compact.cosine(self.query), whole, atol=1e-6)
+
+    def test_memory_shrinks(self):
+        float64_bytes = self.vectors.nbytes
+        self.assertEqual(CompactVectors.from_array(self.vectors).data.nbytes * 2, float64_bytes)
+        int8 = CompactVectors.from_array(self.vectors, "int8")
+        self.assertLess(int8.nbytes * 7, float64_bytes)
+
+    def test_row_round_trips(self):
+        compact = CompactVectors.from_array(self.vectors[0].tolist(), "int8")
+        self.assertEqual(len(compact), 1)
+        np.testing.assert_allclose(compact.row(0), self.vectors[0], atol=1e-3)
+
+    def test_unknown_dtype(self):
+        with self.assertRaises(ValueError):
+            CompactVectors.from_array(self.vectors, "bfloat16")
+
+
+if __name__ == "__main__":
+    unittest.main()
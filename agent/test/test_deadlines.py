@@ -0,0 +1,151 @@
+import unittest
+import time
+import asyncio
+import threading
+import sys
+import os
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.services import chat_service
+from src.utils.deadlines import (
+    DeadlineExceeded,
+    Hedger,
+    LatencyTracker,
+    current_deadline,
+    deadline_scope,
+    run_within,
+    stage_timeout,
+)
+
+
+class TestDeadlines(unittest.TestCase):
+
+    def test_stage_timeout_is_capped_by_the_turn_deadline(self):
+        self.assertEqual(stage_timeout("llm", 6), 6)
+        with deadline_scope(0.5):
+            self.assertLessEqual(stage_timeout("llm", 6), 0.5)
+            self.assertEqual(stage_timeout("search", 0.1), 0.1)
+        with deadline_scope(0):
+            with self.assertRaises(DeadlineExceeded):
+                stage_timeout("llm", 6)
+
+    def test_run_within_raises_instead_of_waiting_and_keeps_the_context(self):
+        with deadline_scope(5):
+            self.assertIsNotNone(run_within(current_deadline, "llm", 1))
+            started = time.perf_counter()
+            with self.assertRaises(DeadlineExceeded):
+                run_within(lambda: time.sleep(0.5), "llm", 0.05)
+            self.assertLess(time.perf_counter() - started, 0.3)
+
+    def test_latency_tracker_needs_enough_samples(self):
+        tracker = LatencyTracker()
+        for i in range(19):
+            tracker.observe(i / 100)
+        self.assertIsNone(tracker.p95())
+        for i in range(19, 100):
+            tracker.observe(i / 100)
+        self.assertAlmostEqual(tracker.p95(), 0.94)
+
+
+class TestHedger(unittest.TestCase):
+
+    def test_fast_calls_are_not_hedged(self):
+        hedger = Hedger("search", default_delay_ms=50, enabled=True, min_delay_ms=0)
+        calls = []
+        self.assertEqual(hedger(lambda: calls.append(1) or "ok"), "ok")
+        self.assertEqual(len(calls), 1)
+
+    def test_slow_call_is_hedged_and_the_faster_answer_wins(self):
+        hedger = Hedger("search", default_delay_ms=20, enabled=True, min_delay_ms=0)
+        calls = []
+        lock = threading.Lock()
+
+        def first_slow():
+            with lock:
+                calls.append(1)
+                attempt = len(calls)
+            if attempt == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "hedge"
+
+        started = time.perf_counter()
+        self.assertEqual(hedger(first_slow), "hedge")
+        self.assertLess(time.perf_counter() - started, 0.3)
+        self.assertEqual(len(calls), 2)
+
+    def test_failure_of_one_attempt_waits_for_the_other(self):
+        hedger = Hedger("embed", default_delay_ms=10, enabled=True, min_delay_ms=0)
+        calls = []
+
+        def fail_first():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                raise ConnectionError("reset")
+            time.sleep(0.1)
+            return "ok"
+
+        self.assertEqual(hedger(fail_first), "ok")
+
+
+class TestChatTurnDeadline(unittest.TestCase):
+
+    @patch("src.services.chat_service.top_faq_answer")
+    @patch("src.services.chat_service._answer_turn")
+    @patch("src.services.chat_service._route_locally")
+    @patch("src.services.chat_service.append_or_queue", new_callable=AsyncMock)
+    @patch("src.services.chat_service.open_chat", new_callable=AsyncMock)
+    def test_turn_past_its_deadline_serves_the_top_faq_answer(
+        self,
+        mock_open_chat,
+        mock_append,
+        mock_route_locally,
+        mock_answer_turn,
+        mock_top_faq_answer,
+    ):
+        mock_open_chat.return_value = ("chat_1", [])
+        mock_route_locally.return_value = ({"route": "faq", "source": "lexical"}, 0.0)
+        mock_answer_turn.side_effect = DeadlineExceeded("llm took longer than 6.00s")
+        mock_top_faq_answer.return_value = {"success": True, "degraded": True}
+
+        _, _, response = asyncio.run(
+            chat_service.chat_turn("Hành lý được mang bao nhiêu kg?", "chat_1")
+        )
+
+        self.assertTrue(response["degraded"])
+        mock_top_faq_answer.assert_called_once_with("Hành lý được mang bao nhiêu kg?", "chat_1")
+
+    @patch("src.services.chat_service.CHAT_DEADLINE_SECONDS", 0.05)
+    @patch("src.services.chat_service.top_faq_answer")
+    @patch("src.services.chat_service._route_locally")
+    @patch("src.services.chat_service.append_or_queue", new_callable=AsyncMock)
+    @patch("src.services.chat_service.open_chat", new_callable=AsyncMock)
+    def test_turn_budget_reaches_the_routing_thread(
+        self, mock_open_chat, mock_append, mock_route_locally, mock_top_faq_answer
+    ):
+        mock_open_chat.return_value = ("chat_1", [])
+        mock_top_faq_answer.return_value = {"degraded": True}
+
+        def slow_route(message, chat_id):
+            time.sleep(0.1)
+            return {"route": "faq", "source": "lexical"}, stage_timeout("llm", 6)
+
+        mock_route_locally.side_effect = slow_route
+
+        _, _, response = asyncio.run(chat_service.chat_turn("Xin chào", "chat_1"))
+
+        self.assertTrue(response["degraded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.integrates.embeddings import (
+    EmbeddingProvider,
+    collection_name_for,
+    get_embedding_provider,
+)
+
+
+class FakeProvider(EmbeddingProvider):
+    name = "fake"
+    model = "fake"
+    dimension = 2
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestEmbeddingProviders(unittest.TestCase):
+    def test_collection_per_dimension(self):
+        # ada-002 keeps the collection that already exists in production
+        self.assertEqual(collection_name_for(1536), "faq_vexere")
+        self.assertEqual(collection_name_for(384), "faq_vexere_384")
+
+    def test_embed_query_uses_embed_documents(self):
+        self.assertEqual(FakeProvider().embed_query("abc"), [3.0, 1.0])
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            get_embedding_provider("word2vec")
+
+    def test_local_provider_without_sentence_transformers(self):
+        with patch.dict(sys.modules, {"sentence_transformers": None}):
+            from src.integrates.embeddings import LocalEmbeddingProvider
+
+            with self.assertRaises(ImportError):
+                LocalEmbeddingProvider()
+
+
+if __name__ == "__main__":
+    unittest.main()
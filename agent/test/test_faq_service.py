@@ -14,7 +14,9 @@ sys.path.append(
     )
 )
 
-from src.services.faq_service import faq_rag_chat
+from src.services.faq_service import faq_rag_chat, retrieve_relevant_docs
+from src.utils.lexical_index import reciprocal_rank_fusion
+from src.utils.text_processing import fold_diacritics
 
 mock_docs: List[Dict] = [
     {
@@ -26,8 +28,9 @@ mock_docs: List[Dict] = [
 
 
 class TestFaqRagChat(unittest.TestCase):
+    @patch("src.services.faq_service.get_lexical_index", return_value=None)
     @patch("src.services.faq_service.get_milvus_client")
-    def test_faq_rag_chat_no_result(self, mock_get_client):
+    def test_faq_rag_chat_no_result(self, mock_get_client, mock_get_lexical_index):
         mock_client = MagicMock()
         mock_client.connected = True
         mock_client.embeddings = MagicMock()
@@ -102,5 +105,41 @@ class TestFaqRagChat(unittest.TestCase):
             )
 
 
+class TestHybridRetrieval(unittest.TestCase):
+    def test_fold_diacritics(self):
+        self.assertEqual(fold_diacritics("Hoàn tiền ĐỔI VÉ"), "hoan tien doi ve")
+
+    @patch("src.services.faq_service.get_milvus_client")
+    def test_decisive_lexical_hit_skips_embedding(self, mock_get_client):
+        docs = retrieve_relevant_docs("quy dinh mang chat long len may bay", top_k=1)
+
+        self.assertEqual(docs[0]["question"], "Quy định mang chất lỏng lên máy bay")
+        mock_get_client.assert_not_called()
+
+    @patch("src.services.faq_service.get_milvus_client")
+    def test_ambiguous_query_fuses_vector_and_lexical(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_client.connected = True
+        mock_client.embeddings = MagicMock()
+        mock_client.embed_query.return_value = [0.1] * 1536
+        mock_client.search_similar.return_value = mock_docs
+        mock_get_client.return_value = mock_client
+
+        docs = retrieve_relevant_docs("hoan tien", top_k=3)
+
+        mock_client.embed_query.assert_called_once_with("hoan tien")
+        self.assertEqual(len(docs), 3)
+        self.assertIn("rrf_score", docs[0])
+
+    def test_reciprocal_rank_fusion(self):
+        a = {"question": "a"}
+        b = {"question": "b"}
+        c = {"question": "c"}
+
+        fused = reciprocal_rank_fusion([[a, b], [b, c]])
+
+        self.assertEqual([doc["question"] for doc in fused], ["b", "a", "c"])
+
+
 if __name__ == "__main__":
     unittest.main()
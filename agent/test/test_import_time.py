@@ -0,0 +1,62 @@
+import unittest
+import subprocess
+import sys
+import os
+
+AGENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Loaded on first use or during the startup warm-up, never by importing the app
+LAZY_MODULES = (
+    "langchain_openai",
+    "langchain_community",
+    "langchain_core",
+    "openai",
+    "pymilvus",
+    "pandas",
+    "sentence_transformers",
+)
+
+# Whole `import src.app`, FastAPI included; generous so slow CI machines still pass
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in microseconds per module, from python -X importtime"""
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-test")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.times = import_times("src.app")
+
+    def test_heavy_integrations_are_lazy(self):
+        loaded = sorted(
+            name
+            for name in self.times
+            if name.split(".")[0] in LAZY_MODULES
+        )
+        self.assertEqual(loaded, [])
+
+    def test_app_import_within_budget(self):
+        self.assertLess(self.times["src.app"] / 1000, IMPORT_TIME_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
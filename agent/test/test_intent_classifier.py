@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils.intent_classifier import (
+    AfterServiceIntentClassifier,
+    TurnClassification,
+    classification_cache,
+)
+
+
+class TestAfterServiceIntentClassifier(unittest.TestCase):
+    def setUp(self):
+        classification_cache.clear()
+        with patch("src.utils.intent_classifier.get_chat_llm") as mock_get_chat_llm:
+            self.llm = mock_get_chat_llm.return_value
+            self.classifier = AfterServiceIntentClassifier()
+        self.structured_llm = MagicMock()
+        self.llm.with_structured_output.return_value = self.structured_llm
+        log_patcher = patch("src.utils.intent_classifier.log_decision")
+        self.mock_log_decision = log_patcher.start()
+        self.addCleanup(log_patcher.stop)
+
+    def tearDown(self):
+        classification_cache.clear()
+
+    def test_classify_turn_returns_route_intent_and_entities(self):
+        self.structured_llm.invoke.return_value = TurnClassification(
+            route="after_service",
+            intent="cancel_ticket",
+            entities={"ticket_code": "VX123456789"},
+        )
+
+        result = self.classifier.classify_turn("Hủy vé VX123456789")
+
+        self.assertEqual(result["route"], "after_service")
+        self.assertEqual(result["intent"], "cancel_ticket")
+        self.assertEqual(result["entities"]["ticket_code"], "VX123456789")
+        self.assertEqual(result["source"], "llm")
+        self.mock_log_decision.assert_called_once_with(
+            "Hủy vé VX123456789", "after_service", "cancel_ticket"
+        )
+
+    def test_classify_turn_is_cached_by_normalized_message(self):
+        self.structured_llm.invoke.return_value = TurnClassification(
+            route="faq", intent="general_inquiry"
+        )
+
+        self.classifier.classify_turn("Hành lý được mang bao nhiêu kg?")
+        self.classifier.classify_turn("  hành lý được mang   bao nhiêu kg? ")
+
+        self.structured_llm.invoke.assert_called_once()
+        self.llm.with_structured_output.assert_called_once()
+
+    def test_classify_intent_failure_falls_back_to_general_inquiry(self):
+        self.structured_llm.invoke.side_effect = Exception("Invalid tool call")
+
+        result = self.classifier.classify_intent("abc")
+
+        self.assertEqual(result["intent"], "general_inquiry")
+        self.assertEqual(result["entities"], {})
+        self.assertIsNone(classification_cache.get("intent:abc"))
+
+
+class TestLexicalShortcut(unittest.TestCase):
+    """Step 1 of routing against the real FAQ index, with no embedding or local model"""
+
+    def setUp(self):
+        from src.services import chat_service
+
+        self.chat_service = chat_service
+        for name, value in (
+            ("get_milvus_client", MagicMock(side_effect=Exception("offline"))),
+            ("get_prototype_router", MagicMock(return_value=None)),
+            ("get_local_intent_model", MagicMock(return_value=None)),
+        ):
+            patcher = patch.object(chat_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_faq_question_takes_the_shortcut(self):
+        result, _ = self.chat_service._classify_locally(
+            "Tôi có thể nhận lại tiền thanh toán dư bằng cách nào?"
+        )
+        self.assertEqual(result, {"route": "faq", "source": "lexical"})
+
+    def test_charge_complaint_is_not_answered_from_the_faq(self):
+        # Decisive BM25 hit on "Tôi bị trừ tiền nhiều lần khi thanh toán, cần làm gì?"
+        result, _ = self.chat_service._classify_locally("tôi bị trừ tiền hai lần")
+        self.assertIsNone(result)
+
+    def test_cue_with_a_router_reading_faq_keeps_the_lexical_hit(self):
+        local_model = MagicMock()
+        local_model.predict.return_value = {
+            "route": "faq",
+            "intent": None,
+            "confidence": 0.6,
+        }
+        with patch.object(
+            self.chat_service, "get_local_intent_model", return_value=local_model
+        ):
+            result, _ = self.chat_service._classify_locally(
+                "Sau khi hủy vé, tôi sẽ nhận được hoàn tiền bằng hình thức nào?"
+            )
+        self.assertEqual(result, {"route": "faq", "source": "lexical"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils.local_intent_model import (
+    LocalIntentModel,
+    flush_decisions,
+    log_decision,
+    load_decisions,
+    train_from_log,
+)
+
+TRAINING_DATA = {
+    "after_service:cancel_ticket": [
+        "Tôi muốn hủy vé VX123456789",
+        "hủy vé giúp tôi",
+        "huy ve VX987654321",
+        "cho mình hủy đặt chỗ",
+        "tôi không đi nữa, hủy vé",
+    ],
+    "after_service:change_schedule": [
+        "Đổi giờ vé VX123456789 sang 10:00",
+        "doi gio xe giup minh",
+        "tôi muốn chuyển giờ đi",
+        "thay đổi lịch trình chuyến xe",
+        "đổi giờ xe sang 8h tối",
+    ],
+    "faq": [
+        "Hành lý được mang bao nhiêu kg?",
+        "Chính sách hoàn tiền như thế nào?",
+        "Bao lâu thì nhận được tiền hoàn?",
+        "Quy định cho trẻ em khi đi xe",
+        "Thanh toán bằng những hình thức nào?",
+    ],
+}
+
+
+class TestLocalIntentModel(unittest.TestCase):
+    def test_predict_without_diacritics(self):
+        messages, labels = [], []
+        for label, examples in TRAINING_DATA.items():
+            messages.extend(examples)
+            labels.extend([label] * len(examples))
+
+        model = LocalIntentModel().fit(messages, labels)
+
+        prediction = model.predict("huy ve VX111222333")
+        self.assertEqual(prediction["route"], "after_service")
+        self.assertEqual(prediction["intent"], "cancel_ticket")
+        self.assertGreater(prediction["confidence"], 0.5)
+        self.assertEqual(model.predict("doi gio xe sang 9h")["intent"], "change_schedule")
+
+    def test_decisions_are_written_by_the_background_thread(self):
+        writers = []
+
+        def recording_open(*args, **kwargs):
+            writers.append(threading.current_thread().name)
+            return open(*args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "decisions.jsonl")
+            with patch(
+                "src.utils.local_intent_model.open", recording_open, create=True
+            ):
+                log_decision("Hành lý được mang bao nhiêu kg?", "faq", path=log_path)
+                flush_decisions()
+
+            self.assertEqual(writers, ["intent-decisions"])
+            self.assertEqual(load_decisions(log_path)[0]["route"], "faq")
+
+    def test_train_from_log_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "decisions.jsonl")
+            model_path = os.path.join(tmp, "model.npz")
+            for label, examples in TRAINING_DATA.items():
+                route, _, intent = label.partition(":")
+                for message in examples:
+                    log_decision(message, route, intent or None, path=log_path)
+            log_decision("hủy vé", "faq", None, source="fallback", path=log_path)
+            flush_decisions()
+
+            self.assertEqual(len(load_decisions(log_path)), 16)
+            trained = train_from_log(log_path, model_path)
+            loaded = LocalIntentModel.load(model_path)
+
+            self.assertEqual(loaded.labels, trained.labels)
+            self.assertEqual(
+                loaded.predict("Bao lâu nhận tiền hoàn?"),
+                trained.predict("Bao lâu nhận tiền hoàn?"),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import json
+import queue
+import logging
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.core.logger import DeferredQueueHandler, JsonFormatter, SamplingFilter
+
+
+def make_record(level=logging.INFO, msg="Turn classified", args=None, **extra):
+    record = logging.LogRecord("src.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestStructuredLogging(unittest.TestCase):
+    def test_json_output_includes_extra_fields(self):
+        record = make_record(route="faq", source="lexical")
+        payload = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(payload["message"], "Turn classified")
+        self.assertEqual(payload["level"], "INFO")
+        self.assertEqual(payload["route"], "faq")
+        self.assertEqual(payload["source"], "lexical")
+        self.assertNotIn("args", payload)
+
+    def test_sampling_never_drops_warnings(self):
+        sampler = SamplingFilter(0.0)
+        self.assertFalse(sampler.filter(make_record(logging.INFO)))
+        self.assertTrue(sampler.filter(make_record(logging.WARNING)))
+        self.assertTrue(SamplingFilter(1.0).filter(make_record(logging.DEBUG)))
+
+    def test_queue_handler_freezes_the_message(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        documents = ["faq_1"]
+        handler.handle(make_record(msg="Found %s", args=(documents,)))
+        # Changed by the caller before the listener gets to the record
+        documents.append("faq_2")
+
+        queued = log_queue.get_nowait()
+        self.assertEqual(queued.getMessage(), "Found ['faq_1']")
+        self.assertIsNone(queued.args)
+
+    def test_queue_handler_renders_the_traceback(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        try:
+            raise ValueError("bad ticket code")
+        except ValueError:
+            record = make_record(logging.ERROR, msg="Lookup failed")
+            record.exc_info = sys.exc_info()
+        handler.handle(record)
+
+        queued = log_queue.get_nowait()
+        self.assertIsNone(queued.exc_info)
+        payload = json.loads(JsonFormatter().format(queued))
+        self.assertIn("ValueError: bad ticket code", payload["exc_info"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.core.metrics import (
+    Registry,
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    LLM_COST,
+    LLM_TOKENS,
+    current_trace,
+    span,
+    start_trace,
+    traced,
+)
+from src.integrates.llm import record_usage
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = Registry()
+        histogram = registry.histogram("test_seconds", "Test", ["stage"], buckets=(0.1, 1))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+
+        text = registry.render()
+        self.assertIn('test_seconds_bucket{stage="a",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{stage="a",le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{stage="a",le="+Inf"} 2', text)
+        self.assertIn('test_seconds_count{stage="a"} 2', text)
+
+    def test_span_records_trace_and_errors(self):
+        start_trace()
+        before = STAGE_SECONDS.count(stage="test.ok")
+
+        @traced("test.ok")
+        def ok():
+            return 1
+
+        ok()
+        with self.assertRaises(ValueError):
+            with span("test.fail"):
+                raise ValueError("boom")
+
+        self.assertEqual(STAGE_SECONDS.count(stage="test.ok"), before + 1)
+        self.assertGreaterEqual(STAGE_ERRORS.value(stage="test.fail"), 1)
+        self.assertEqual(
+            [(stage, error) for stage, _, _, error in current_trace()],
+            [("test.ok", False), ("test.fail", True)],
+        )
+
+    def test_usage_is_priced_by_base_model(self):
+        tokens = LLM_TOKENS.value(model="gpt-4o-mini-2024-07-18", kind="prompt")
+        cost = LLM_COST.value(model="gpt-4o-mini")
+
+        record_usage("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000)
+
+        self.assertEqual(
+            LLM_TOKENS.value(model="gpt-4o-mini-2024-07-18", kind="prompt"),
+            tokens + 1_000_000,
+        )
+        self.assertAlmostEqual(LLM_COST.value(model="gpt-4o-mini") - cost, 0.75)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_metrics_endpoint_uses_route_templates(self):
+        from src.app import app
+
+        client = TestClient(app)
+        client.get("/")
+        response = client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'agent_http_request_duration_seconds_count{method="GET",route="/",status="200"}',
+            response.text,
+        )
+        self.assertIn("# TYPE agent_stage_duration_seconds histogram", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+import asyncio
+import threading
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils.micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_batch(self):
+        calls = []
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=1000)
+        results = {}
+
+        def worker(value):
+            results[value] = batcher(value)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # The fourth submit fills the batch, so nothing waits for the timer
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(calls[0]), [0, 1, 2, 3])
+        self.assertEqual(results, {0: 0, 1: 2, 2: 4, 3: 6})
+
+    def test_asubmit_batches_coroutines_without_blocking_the_loop(self):
+        calls = []
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=1000)
+
+        async def main():
+            return await asyncio.gather(*(batcher.asubmit(i) for i in range(3)))
+
+        self.assertEqual(asyncio.run(main()), [0, 2, 4])
+        self.assertEqual(calls, [[0, 1, 2]])
+
+    def test_full_batch_does_not_run_on_the_submitting_thread(self):
+        threads = []
+
+        def batch_fn(items):
+            threads.append(threading.current_thread())
+            return items
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=1)
+        self.assertEqual(batcher("a"), "a")
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_partial_batch_flushed_after_wait(self):
+        batcher = MicroBatcher(lambda items: [i + 1 for i in items], max_wait_ms=5)
+        self.assertEqual(batcher(1), 2)
+
+    def test_error_propagates_to_every_caller(self):
+        def batch_fn(items):
+            raise RuntimeError("milvus down")
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1000)
+        first = batcher.submit("a")
+        second = batcher.submit("b")
+
+        for future in (first, second):
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_one_flusher_thread_serves_every_window(self):
+        batcher = MicroBatcher(lambda items: [i + 1 for i in items], max_wait_ms=1)
+        self.assertEqual(batcher(1), 2)
+        flusher = batcher._flusher
+
+        for i in range(5):
+            self.assertEqual(batcher(i), i + 1)
+        self.assertIs(batcher._flusher, flusher)
+        self.assertTrue(flusher.is_alive())
+
+    def test_result_count_mismatch_is_an_error(self):
+        batcher = MicroBatcher(lambda items: [], max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher(1)
+
+
+class TestSearchMany(unittest.TestCase):
+
+    def test_batch_slices_results_to_each_top_k(self):
+        from src.integrates.milvus import MilvusClient
+        from src.utils.circuit_breaker import CircuitBreaker
+        from src.utils.deadlines import Hedger
+
+        client = MilvusClient.__new__(MilvusClient)
+        client.search_hedger = Hedger("search", default_delay_ms=100, enabled=False)
+        client.breaker = CircuitBreaker("milvus")
+        seen = {}
+
+        def search_many(embeddings, top_k):
+            seen["embeddings"], seen["top_k"] = embeddings, top_k
+            return [[{"answer": f"{i}-{k}"} for k in range(top_k)] for i in range(2)]
+
+        client.search_many = search_many
+        results = client._search_batch([([0.1], 1), ([0.2], 3)])
+
+        # One request with the largest top_k, trimmed per caller
+        self.assertEqual(seen, {"embeddings": [[0.1], [0.2]], "top_k": 3})
+        self.assertEqual([len(r) for r in results], [1, 3])
+
+
+class TestEmbedBatch(unittest.TestCase):
+
+    def test_concurrent_queries_share_one_embed_documents_call(self):
+        from unittest.mock import MagicMock
+        from src.integrates.milvus import MilvusClient
+
+        client = MilvusClient.__new__(MilvusClient)
+        client.embeddings = MagicMock()
+        client.embeddings.embed_documents.side_effect = lambda texts: [
+            [float(len(text))] for text in texts
+        ]
+        client.embed_batcher = MicroBatcher(
+            client._embed_batch, max_batch_size=3, max_wait_ms=1000
+        )
+
+        futures = [client.embed_batcher.submit(q) for q in ["ab", "abc", "ab"]]
+
+        self.assertEqual([f.result(timeout=5) for f in futures], [[2.0], [3.0], [2.0]])
+        # Duplicates are embedded once, in a single request
+        client.embeddings.embed_documents.assert_called_once_with(["ab", "abc"])
+
+    def test_cached_query_vector_keeps_full_precision(self):
+        from unittest.mock import MagicMock
+        from src.integrates.milvus import MilvusClient
+
+        vector = [0.1234567, -0.5, 0.0078125]
+        client = MilvusClient.__new__(MilvusClient)
+        client.embeddings = MagicMock(model="cache-precision-test")
+        client.embeddings.embed_documents.return_value = [vector]
+        client._embed_batch(["Hành lý được mang bao nhiêu kg?"])
+
+        cached = client.embed_query("Hành lý được mang bao nhiêu kg?")
+
+        client.embeddings.embed_documents.assert_called_once()
+        for value, expected in zip(cached, vector):
+            self.assertAlmostEqual(value, expected, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+import unittest
+import time
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+import httpx
+import openai
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.integrates.openai_gateway import (
+    GatewayTimeout,
+    OpenAIGateway,
+    Priority,
+    PriorityLimiter,
+    SharedRateWindow,
+    TokenBucket,
+    background_priority,
+    parse_rate_limits,
+    _priority,
+)
+from src.utils.shared_state import MemoryBackend, RedisBackend, SharedCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def rate_limit_error(retry_after: str = None) -> openai.RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1")
+    )
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def make_gateway(**kwargs) -> OpenAIGateway:
+    kwargs.setdefault("retry_max_wait", 0.01)
+    kwargs.setdefault(
+        "cooldowns", SharedCache("openai_cooldown", 1, backend=MemoryBackend())
+    )
+    return OpenAIGateway(**kwargs)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_reserve_returns_wait_once_the_bucket_is_empty(self):
+        now = [0.0]
+        bucket = TokenBucket(60, clock=lambda: now[0])  # one per second
+
+        self.assertEqual(bucket.reserve(60), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1), 2.0)
+
+        now[0] = 2.0
+        self.assertAlmostEqual(bucket.reserve(1), 1.0)
+
+    def test_oversized_reservation_is_capped_at_capacity(self):
+        bucket = TokenBucket(60, clock=lambda: 0.0)
+        self.assertAlmostEqual(bucket.reserve(1000), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1000), 60.0)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestSharedRateWindow(unittest.TestCase):
+
+    def setUp(self):
+        # Two clients on one server behave like two workers sharing Redis
+        server = fakeredis.FakeServer()
+        self.now = 600.0
+        self.workers = [
+            SharedRateWindow(
+                RedisBackend(client=fakeredis.FakeRedis(server=server)),
+                "gpt-4o-mini:requests",
+                2,
+                max_wait=120,
+                clock=lambda: self.now,
+            )
+            for _ in range(2)
+        ]
+
+    def test_workers_share_one_budget_per_minute(self):
+        worker_a, worker_b = self.workers
+        self.now = 610.0
+        self.assertEqual(worker_a.take(1)[0], 0)
+        self.assertEqual(worker_b.take(1)[0], 0)
+        # The minute is used up across both workers, so the next call waits for the next one
+        self.assertEqual(worker_a.take(1)[0], 50)
+        self.assertEqual(worker_b.take(1)[0], 50)
+        self.assertEqual(worker_b.take(1)[0], 110)
+
+    def test_refund_frees_the_window_again(self):
+        worker_a, worker_b = self.workers
+        worker_a.take(2)
+        wait, refund = worker_b.take(1)
+        self.assertEqual(wait, 60)
+        refund()
+        self.assertEqual(worker_a.take(1)[0], 60)
+
+    def test_windows_beyond_max_wait_are_not_charged(self):
+        worker = self.workers[0]
+        worker.max_wait = 0
+        worker.take(2)
+        self.assertEqual(worker.take(1)[0], 60)
+        self.assertEqual(worker.backend.incr("openai_rate", "gpt-4o-mini:requests:11", 0, 60), 0)
+
+    def test_backend_errors_let_calls_through(self):
+        worker = self.workers[0]
+        with patch.object(worker.backend.client, "incrbyfloat", side_effect=ConnectionError):
+            self.assertEqual(worker.take(1)[0], 0)
+
+
+class TestPriorityLimiter(unittest.TestCase):
+
+    def test_interactive_waiters_are_served_before_background(self):
+        limiter = PriorityLimiter(1)
+        limiter.acquire(Priority.INTERACTIVE, 1)
+        served = []
+
+        def worker(priority, name):
+            limiter.acquire(priority, 1)
+            served.append(name)
+            limiter.release()
+
+        threads = [
+            threading.Thread(target=worker, args=(Priority.BACKGROUND, "warm-up")),
+            threading.Thread(target=worker, args=(Priority.INTERACTIVE, "user")),
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        limiter.release()
+        for thread in threads:
+            thread.join(1)
+
+        self.assertEqual(served, ["user", "warm-up"])
+        self.assertEqual(limiter.active, 0)
+
+    def test_acquire_times_out_when_no_slot_frees(self):
+        limiter = PriorityLimiter(1)
+        limiter.acquire(Priority.INTERACTIVE, 1)
+        with self.assertRaises(GatewayTimeout):
+            limiter.acquire(Priority.INTERACTIVE, 0.01)
+        limiter.release()
+        self.assertEqual(limiter.active, 0)
+
+
+class TestOpenAIGateway(unittest.TestCase):
+
+    def test_parse_rate_limits(self):
+        self.assertEqual(
+            parse_rate_limits("gpt-4o-mini=500:200000, text-embedding-ada-002=3000"),
+            {"gpt-4o-mini": (500, 200000), "text-embedding-ada-002": (3000, 0)},
+        )
+        self.assertEqual(parse_rate_limits(""), {})
+
+    def test_retries_rate_limit_errors_then_succeeds(self):
+        gateway = make_gateway(max_retries=3)
+        errors = [rate_limit_error(), rate_limit_error()]
+
+        def flaky():
+            if errors:
+                raise errors.pop()
+            return "ok"
+
+        self.assertEqual(gateway.call("gpt-4o-mini", flaky), "ok")
+        self.assertEqual(errors, [])
+
+    def test_non_retryable_errors_are_raised_at_once(self):
+        gateway = make_gateway(max_retries=3)
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            gateway.call("gpt-4o-mini", broken)
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_max_retries(self):
+        gateway = make_gateway(max_retries=2)
+        calls = []
+
+        def always_limited():
+            calls.append(1)
+            raise rate_limit_error()
+
+        with self.assertRaises(openai.RateLimitError):
+            gateway.call("gpt-4o-mini", always_limited)
+        self.assertEqual(len(calls), 3)
+
+    def test_retry_after_sets_a_shared_cooldown(self):
+        gateway = make_gateway(max_retries=1, retry_max_wait=0.05)
+        errors = [rate_limit_error("0.05")]
+
+        def limited_once():
+            if errors:
+                raise errors.pop()
+            return "ok"
+
+        with patch.object(
+            gateway.cooldowns, "set", wraps=gateway.cooldowns.set
+        ) as cooldown_set:
+            self.assertEqual(gateway.call("gpt-4o-mini", limited_once), "ok")
+
+        model, until, ttl = cooldown_set.call_args.args
+        self.assertEqual(model, "gpt-4o-mini")
+        self.assertAlmostEqual(until - time.time(), 0, delta=0.05)
+        self.assertEqual(ttl, 0.05)
+
+    def test_rejects_when_the_rate_wait_exceeds_the_queue_timeout(self):
+        gateway = make_gateway(
+            limits={"gpt-4o-mini": (1, 0)}, queue_timeout=0.5, max_retries=0
+        )
+        self.assertEqual(gateway.call("gpt-4o-mini-2024-07-18", lambda: "first"), "first")
+        with self.assertRaises(GatewayTimeout):
+            gateway.call("gpt-4o-mini-2024-07-18", lambda: "second")
+        # Models without a configured limit are not throttled
+        self.assertEqual(gateway.call("text-embedding-ada-002", lambda: "ok"), "ok")
+
+    @unittest.skipIf(fakeredis is None, "fakeredis not installed")
+    def test_redis_backend_shares_the_limit_between_gateways(self):
+        server = fakeredis.FakeServer()
+        gateways = [
+            make_gateway(
+                limits={"gpt-4o-mini": (1, 0)},
+                queue_timeout=0.5,
+                max_retries=0,
+                cooldowns=SharedCache(
+                    "openai_cooldown",
+                    1,
+                    backend=RedisBackend(client=fakeredis.FakeRedis(server=server)),
+                ),
+            )
+            for _ in range(2)
+        ]
+        # Hour-long windows, so the test cannot straddle a window boundary
+        with patch.object(SharedRateWindow, "WINDOW_SECONDS", 3600):
+            self.assertEqual(gateways[0].call("gpt-4o-mini", lambda: "first"), "first")
+            with self.assertRaises(GatewayTimeout):
+                gateways[1].call("gpt-4o-mini", lambda: "second")
+
+    def test_background_priority_context(self):
+        self.assertEqual(_priority.get(), Priority.INTERACTIVE)
+        with background_priority():
+            self.assertEqual(_priority.get(), Priority.BACKGROUND)
+        self.assertEqual(_priority.get(), Priority.INTERACTIVE)
+
+
+if __name__ == "__main__":
+    unittest.main()
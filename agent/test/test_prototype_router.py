@@ -0,0 +1,66 @@
+import unittest
+import zlib
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils.prototype_router import PrototypeRouter, load_prototypes
+from src.utils.text_processing import char_ngrams
+
+
+def fake_embed(text: str) -> list[float]:
+    """Deterministic bag of character n-grams standing in for ada-002"""
+    vector = np.zeros(512, dtype=np.float32)
+    for ngram in char_ngrams(text):
+        vector[zlib.crc32(ngram.encode("utf-8")) % 512] += 1.0
+    return vector.tolist()
+
+
+def fake_embed_documents(texts: list[str]) -> list[list[float]]:
+    return [fake_embed(text) for text in texts]
+
+
+class TestPrototypeRouter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.router = PrototypeRouter.build(fake_embed_documents)
+
+    def test_prototypes_cover_faq_and_after_service(self):
+        labels = load_prototypes().keys()
+        self.assertIn("faq:Hoàn tiền", labels)
+        self.assertIn("after_service:cancel_ticket", labels)
+        self.assertEqual(self.router.centroids.shape, (len(labels), 512))
+
+    def test_route_returns_route_and_intent(self):
+        decision = self.router.route(fake_embed("Tôi muốn hủy vé VX987654321"))
+        self.assertEqual(decision["route"], "after_service")
+        self.assertEqual(decision["intent"], "cancel_ticket")
+
+        decision = self.router.route(fake_embed("Thanh toán bằng hình thức nào?"))
+        self.assertEqual(decision["route"], "faq")
+        self.assertIsNone(decision["intent"])
+
+    def test_low_margin_is_not_confident(self):
+        decision = {
+            "route": "after_service",
+            "intent": "complaint",
+            "score": 0.95,
+            "margin": 0.001,
+            "route_margin": 0.2,
+        }
+        self.assertFalse(self.router.is_confident(decision))
+        self.assertTrue(self.router.is_confident({**decision, "margin": 0.1}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils import shared_state
+from src.utils.compact_vectors import CompactVectors
+from src.utils.shared_state import MemoryBackend, RedisBackend, SharedCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class TestMemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MemoryBackend()
+
+    def test_entries_expire_and_namespaces_are_separate(self):
+        self.backend.set("session", "chat_1", {"intent": "cancel_ticket"}, 0.05)
+        self.backend.set("classification", "chat_1", "other", 60)
+
+        self.assertEqual(
+            self.backend.get("session", "chat_1"), {"intent": "cancel_ticket"}
+        )
+        time.sleep(0.06)
+        self.assertIsNone(self.backend.get("session", "chat_1"))
+        self.assertEqual(self.backend.get("classification", "chat_1"), "other")
+
+    def test_max_entries_evicts_least_recently_used(self):
+        for i in range(3):
+            self.backend.set("embedding", f"q{i}", i, 60, max_entries=2)
+
+        self.assertIsNone(self.backend.get("embedding", "q0"))
+        self.assertEqual(self.backend.get("embedding", "q2"), 2)
+
+    def test_counter_resets_after_its_window(self):
+        self.assertEqual(self.backend.incr("rate", "openai", 5, 0.05), 5)
+        self.assertEqual(self.backend.incr("rate", "openai", 3, 0.05), 8)
+        time.sleep(0.06)
+        self.assertEqual(self.backend.incr("rate", "openai", 1, 0.05), 1)
+
+    def test_clear_only_touches_one_namespace(self):
+        self.backend.set("session", "a", 1, 60)
+        self.backend.set("embedding", "a", 2, 60)
+
+        self.backend.clear("session")
+
+        self.assertIsNone(self.backend.get("session", "a"))
+        self.assertEqual(self.backend.get("embedding", "a"), 2)
+
+
+class TestSharedCache(unittest.TestCase):
+
+    def test_uses_its_default_ttl(self):
+        backend = MagicMock()
+        cache = SharedCache("session", ttl_seconds=900, max_entries=10, backend=backend)
+
+        cache.set("chat_1", {"intent": "complaint"})
+
+        backend.set.assert_called_once_with(
+            "session", "chat_1", {"intent": "complaint"}, 900, 10
+        )
+
+    def test_backend_is_chosen_from_settings(self):
+        shared_state.get_state_backend.cache_clear()
+        self.addCleanup(shared_state.get_state_backend.cache_clear)
+
+        with patch.object(shared_state, "STATE_BACKEND", "memory"):
+            self.assertIsInstance(shared_state.get_state_backend(), MemoryBackend)
+
+        shared_state.get_state_backend.cache_clear()
+        with patch.object(shared_state, "STATE_BACKEND", "memcached"):
+            with self.assertRaises(ValueError):
+                shared_state.get_state_backend()
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestRedisBackend(unittest.TestCase):
+
+    def setUp(self):
+        # Two clients on one server behave like two workers sharing Redis
+        server = fakeredis.FakeServer()
+        self.worker_a = RedisBackend(client=fakeredis.FakeRedis(server=server))
+        self.worker_b = RedisBackend(client=fakeredis.FakeRedis(server=server))
+
+    def test_session_written_by_one_worker_is_read_by_another(self):
+        sessions_a = SharedCache("session", 900, backend=self.worker_a)
+        sessions_b = SharedCache("session", 900, backend=self.worker_b)
+
+        sessions_a.set("chat_1", {"intent": "change_schedule", "entities": {}})
+        self.assertEqual(sessions_b.get("chat_1")["intent"], "change_schedule")
+
+        sessions_b.delete("chat_1")
+        self.assertIsNone(sessions_a.get("chat_1"))
+
+    def test_compact_vectors_round_trip(self):
+        vector = np.arange(8, dtype=np.float32)
+        self.worker_a.set("embedding", "q", CompactVectors.from_array(vector, "int8"), 60)
+
+        restored = self.worker_b.get("embedding", "q")
+
+        np.testing.assert_allclose(restored.row(0), vector, atol=0.05)
+
+    def test_entries_get_a_redis_expiry(self):
+        self.worker_a.set("classification", "k", "v", 1.5)
+
+        ttl = self.worker_a.client.pttl("vexere-agent:classification:k")
+        self.assertTrue(0 < ttl <= 1500)
+
+    def test_counters_are_shared_and_expire(self):
+        self.assertEqual(self.worker_a.incr("rate", "tokens", 100, 60), 100)
+        self.assertEqual(self.worker_b.incr("rate", "tokens", 50, 60), 150)
+        self.assertTrue(0 < self.worker_a.client.pttl("vexere-agent:rate:tokens") <= 60000)
+
+    def test_clear_removes_only_its_namespace(self):
+        self.worker_a.set("session", "a", 1, 60)
+        self.worker_a.set("embedding", "a", 2, 60)
+
+        self.worker_b.clear("session")
+
+        self.assertIsNone(self.worker_a.get("session", "a"))
+        self.assertEqual(self.worker_a.get("embedding", "a"), 2)
+
+    def test_redis_errors_are_cache_misses(self):
+        client = MagicMock()
+        client.get.side_effect = ConnectionError("connection refused")
+        client.set.side_effect = ConnectionError("connection refused")
+        backend = RedisBackend(client=client)
+
+        backend.set("session", "chat_1", {}, 60)
+        self.assertIsNone(backend.get("session", "chat_1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
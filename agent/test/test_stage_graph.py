@@ -0,0 +1,256 @@
+import unittest
+import time
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.services import chat_service
+from src.utils import chat_procesing
+from src.integrates.openai_gateway import TokenBucket
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.stage_graph import Stage, run_stages
+
+
+def sleeper(seconds: float, result=None):
+    async def stage(*inputs):
+        await asyncio.sleep(seconds)
+        return result
+
+    return stage
+
+
+class TestRunStages(unittest.TestCase):
+
+    def test_independent_stages_overlap(self):
+        stages = [
+            Stage("a", sleeper(0.1, "a")),
+            Stage("b", sleeper(0.1, "b")),
+            Stage("c", sleeper(0.1, "c")),
+        ]
+        started = time.perf_counter()
+        results = asyncio.run(run_stages(stages))
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(results, {"a": "a", "b": "b", "c": "c"})
+
+    def test_stage_gets_the_results_of_its_dependencies_in_order(self):
+        async def join(first, second):
+            return f"{first}+{second}"
+
+        stages = [
+            Stage("slow", sleeper(0.05, "slow")),
+            Stage("fast", sleeper(0, "fast")),
+            Stage("join", join, after=("slow", "fast")),
+        ]
+        self.assertEqual(asyncio.run(run_stages(stages))["join"], "slow+fast")
+
+    def test_error_cancels_the_other_stages(self):
+        finished = []
+
+        async def fail():
+            raise RuntimeError("backend down")
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            finished.append("slow")
+
+        stages = [Stage("fail", fail), Stage("slow", slow)]
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run_stages(stages))
+        self.assertEqual(finished, [])
+
+    def test_dependencies_must_be_listed_first(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(run_stages([Stage("answer", sleeper(0), after=("route",))]))
+
+
+class TestChatTurn(unittest.TestCase):
+
+    def test_routing_overlaps_with_the_backend_calls(self):
+        async def open_chat(chat_id):
+            await asyncio.sleep(0.2)
+            return "chat_1", []
+
+        def route(message, chat_id):
+            time.sleep(0.2)
+            return {"route": "faq", "source": "lexical"}, 0.0
+
+        with patch.object(chat_service, "open_chat", open_chat), patch.object(
+            chat_service, "append_or_queue", AsyncMock()
+        ) as append, patch.object(
+            chat_service, "_route_locally", side_effect=route
+        ), patch.object(
+            chat_service, "faq_rag_chat", return_value={"success": True}
+        ) as faq_rag_chat:
+            started = time.perf_counter()
+            chat_id, messages, response = asyncio.run(
+                chat_service.chat_turn("Hành lý được mang bao nhiêu kg?", None)
+            )
+
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual((chat_id, messages, response), ("chat_1", [], {"success": True}))
+        append.assert_awaited_once_with("chat_1", "Hành lý được mang bao nhiêu kg?")
+        faq_rag_chat.assert_called_once_with(
+            message="Hành lý được mang bao nhiêu kg?", chat_id="chat_1"
+        )
+
+    def test_unknown_chat_fails_before_the_routing_llm_call(self):
+        async def open_chat(chat_id):
+            await asyncio.sleep(0.05)
+            raise ValueError(f"Chat with ID {chat_id} does not exist.")
+
+        with patch.object(chat_service, "open_chat", open_chat), patch.object(
+            chat_service, "_route_locally", return_value=(None, 0.0)
+        ), patch.object(chat_service, "_classify_with_llm") as classify_with_llm:
+            with self.assertRaises(ValueError):
+                asyncio.run(chat_service.chat_turn("Xin chào", "missing"))
+
+        classify_with_llm.assert_not_called()
+
+    def test_routing_past_the_deadline_serves_the_top_faq_answer(self):
+        with patch.object(
+            chat_service, "open_chat", AsyncMock(return_value=("chat_1", []))
+        ), patch.object(chat_service, "append_or_queue", AsyncMock()), patch.object(
+            chat_service, "_route_locally", side_effect=DeadlineExceeded("llm")
+        ), patch.object(
+            chat_service, "top_faq_answer", return_value={"degraded": True}
+        ) as top_faq_answer:
+            _, _, response = asyncio.run(chat_service.chat_turn("Xin chào", "chat_1"))
+
+        self.assertTrue(response["degraded"])
+        top_faq_answer.assert_called_once_with("Xin chào", "chat_1")
+
+
+class TestSpeculativeFaqAnswer(unittest.TestCase):
+    """The routing LLM takes 0.2s and the FAQ answer 0.1s"""
+
+    message = "Đổi vé có mất phí không?"
+
+    def setUp(self):
+        self._patch("SPECULATIVE_ANSWERS", True)
+        self._patch("_draft_budget", TokenBucket(60))
+        self._patch("open_chat", AsyncMock(return_value=("chat_1", [])))
+        self._patch("append_or_queue", AsyncMock())
+        # Earlier router steps lean FAQ without being sure
+        self._patch("_route_locally", return_value=(None, 0.8))
+        self._patch("after_service_chat", return_value={"response": "Vui lòng cho biết mã vé"})
+        self.faq_answer = self._patch(
+            "faq_answer", side_effect=self._slow({"message": "Có"}, 0.1)
+        )
+        self.save_faq_answer = self._patch("save_faq_answer")
+
+    def _patch(self, name, *args, **kwargs):
+        patcher = patch.object(chat_service, name, *args, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    @staticmethod
+    def _slow(result, seconds):
+        def call(*args, **kwargs):
+            time.sleep(seconds)
+            return result
+
+        return call
+
+    def _route_by_llm(self, route):
+        self._patch(
+            "_classify_with_llm",
+            side_effect=self._slow({"route": route, "source": "llm"}, 0.2),
+        )
+
+    def test_draft_is_used_when_the_llm_routes_to_faq(self):
+        self._route_by_llm("faq")
+        started = time.perf_counter()
+        _, _, response = asyncio.run(chat_service.chat_turn(self.message, "chat_1"))
+
+        # The answer was generated during routing, not after it
+        self.assertLess(time.perf_counter() - started, 0.28)
+        self.assertEqual(response, {"message": "Có"})
+        self.save_faq_answer.assert_called_once_with(self.message, "chat_1", response)
+
+    def test_draft_is_discarded_for_other_routes(self):
+        self._route_by_llm("after_service")
+        _, _, response = asyncio.run(chat_service.chat_turn(self.message, "chat_1"))
+
+        self.assertEqual(response["response"], "Vui lòng cho biết mã vé")
+        self.faq_answer.assert_called_once()
+        self.save_faq_answer.assert_not_called()
+
+    def test_no_draft_when_the_router_does_not_lean_faq(self):
+        self._route_by_llm("faq")
+        with patch.object(chat_service, "_route_locally", return_value=(None, 0.3)):
+            with patch.object(
+                chat_service, "faq_rag_chat", return_value={"message": "Có"}
+            ) as faq_rag_chat:
+                asyncio.run(chat_service.chat_turn(self.message, "chat_1"))
+
+        self.faq_answer.assert_not_called()
+        faq_rag_chat.assert_called_once_with(message=self.message, chat_id="chat_1")
+
+    def test_draft_discarded_before_it_starts_is_refunded(self):
+        budget = TokenBucket(1)
+        self._patch("_draft_budget", budget)
+
+        async def discard_at_once():
+            draft = chat_service._start_faq_draft(self.message, 0.9)
+            draft.discard()
+            await asyncio.sleep(0.05)
+
+        asyncio.run(discard_at_once())
+
+        self.faq_answer.assert_not_called()
+        self.assertEqual(budget.reserve(1), 0)
+
+    def test_running_draft_keeps_its_budget_slot(self):
+        budget = TokenBucket(1)
+        self._patch("_draft_budget", budget)
+        self._route_by_llm("after_service")
+        asyncio.run(chat_service.chat_turn(self.message, "chat_1"))
+
+        self.faq_answer.assert_called_once()
+        self.assertGreater(budget.reserve(1), 0)
+
+    def test_drafts_are_capped_per_minute(self):
+        budget = TokenBucket(1)
+        budget.reserve(1)
+        with patch.object(chat_service, "_draft_budget", budget):
+            self.assertIsNone(chat_service._start_faq_draft(self.message, 0.9))
+
+
+class TestOpenChat(unittest.TestCase):
+
+    def test_one_request_fetches_history_and_checks_the_chat(self):
+        messages = [{"role": "user", "content": "Xin chào"}]
+        with patch.object(
+            chat_procesing, "get_chat_messages_by_id", AsyncMock(return_value=messages)
+        ) as get_messages:
+            self.assertEqual(
+                asyncio.run(chat_procesing.open_chat("chat_1")), ("chat_1", messages)
+            )
+        get_messages.assert_awaited_once_with("chat_1")
+
+    def test_unknown_chat_is_an_error(self):
+        request = httpx.Request("GET", "http://backend/api/chat-history/missing")
+        not_found = httpx.HTTPStatusError(
+            "not found", request=request, response=httpx.Response(404, request=request)
+        )
+        with patch.object(
+            chat_procesing, "get_chat_messages_by_id", AsyncMock(side_effect=not_found)
+        ):
+            with self.assertRaises(ValueError):
+                asyncio.run(chat_procesing.open_chat("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.core import startup
+
+
+class TestStartupWarmUp(unittest.TestCase):
+    def setUp(self):
+        startup.readiness.__init__()
+        self.milvus = MagicMock()
+        self.milvus.connected = True
+        self.milvus.ensure_connected.return_value = True
+        self.milvus.embeddings.model = "text-embedding-ada-002"
+        self.circuits = {}
+        patches = [
+            patch("src.core.startup.breaker_states", side_effect=lambda: self.circuits),
+            patch("src.core.startup.get_milvus_client", return_value=self.milvus),
+            patch("src.core.startup.build_prototype_router", return_value=MagicMock()),
+            patch("src.core.startup.get_lexical_index", return_value=MagicMock()),
+            patch("src.core.startup.get_local_intent_model", return_value=None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_all_checks_pass(self):
+        with patch("src.core.startup.warm_up_llm"):
+            snapshot = asyncio.run(startup.warm_up())
+
+        self.assertTrue(snapshot["ready"])
+        self.assertEqual(
+            set(snapshot["checks"]),
+            {"milvus", "embeddings", "prototype_router", "llm", "local_indexes"},
+        )
+        # The embedding pool was warmed with a real call
+        self.milvus.embeddings.embed_query.assert_called_once()
+
+    def test_failed_required_check_is_not_ready(self):
+        with patch("src.core.startup.warm_up_llm", side_effect=Exception("timeout")):
+            snapshot = asyncio.run(startup.warm_up())
+
+        self.assertFalse(snapshot["ready"])
+        self.assertTrue(snapshot["finished"])
+        self.assertEqual(snapshot["checks"]["llm"]["error"], "timeout")
+
+    def test_not_ready_before_warm_up(self):
+        self.assertFalse(startup.readiness.ready)
+
+    def test_readiness_follows_milvus_and_the_breakers(self):
+        with patch("src.core.startup.warm_up_llm"):
+            asyncio.run(startup.warm_up())
+        self.assertTrue(startup.readiness.ready)
+
+        self.circuits = {"milvus": "open"}
+        snapshot = startup.readiness.snapshot()
+        self.assertFalse(snapshot["ready"])
+        self.assertFalse(snapshot["live"]["milvus"])
+
+        self.circuits = {"openai:gpt-4o-mini": "open"}
+        self.assertFalse(startup.readiness.ready)
+
+        self.circuits = {}
+        self.milvus.connected = False
+        self.assertFalse(startup.readiness.ready)
+        self.milvus.connected = True
+        self.assertTrue(startup.readiness.ready)
+
+    def test_skipped_steps_are_rebuilt_when_a_breaker_closes(self):
+        with patch("src.core.startup.build_prototype_router", return_value=None), patch(
+            "src.core.startup.get_lexical_index", return_value=None
+        ), patch("src.core.startup.warm_up_llm"):
+            asyncio.run(startup.warm_up())
+        self.assertFalse(startup.readiness.checks["prototype_router"]["ok"])
+        self.assertFalse(startup.readiness.checks["local_indexes"]["ok"])
+
+        with patch("src.core.startup.threading.Thread") as thread:
+            startup._on_breaker_closed("milvus")
+        thread.assert_called_once()
+        self.assertIs(thread.call_args.kwargs["target"], startup.recheck_failed)
+
+        startup.recheck_failed()
+        self.assertTrue(startup.readiness.checks["prototype_router"]["ok"])
+        self.assertTrue(startup.readiness.checks["local_indexes"]["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
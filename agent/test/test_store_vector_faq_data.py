@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock
+import json
+import tempfile
+import sys
+import os
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+        )
+    )
+)
+
+from src.utils.store_vector_faq_data import (
+    store_faq_to_milvus,
+    plan_ingestion,
+    faq_key,
+)
+
+FAQ_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "mock", "faq.json")
+
+
+class FakeCollection:
+    """Keeps upserted rows in memory and answers the queries used by ingestion"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def query(self, expr, output_fields, limit):
+        return [
+            {field: row[field] for field in output_fields}
+            for row in self.rows.values()
+        ]
+
+    def upsert(self, rows):
+        for row in rows:
+            self.rows[row["faq_id"]] = dict(row)
+
+    def delete(self, expr):
+        for key in json.loads(expr.split(" in ", 1)[1]):
+            self.rows.pop(key, None)
+
+    def flush(self):
+        pass
+
+
+class TestIncrementalIngestion(unittest.TestCase):
+    def setUp(self):
+        self.collection = FakeCollection()
+        self.embeddings = MagicMock(model="text-embedding-ada-002", dimension=1536)
+        self.embeddings.embed_documents.side_effect = lambda texts: [
+            [0.1] * 1536 for _ in texts
+        ]
+
+    def test_rerun_on_unchanged_corpus_costs_no_embedding_calls(self):
+        first = store_faq_to_milvus(
+            FAQ_PATH, embeddings=self.embeddings, collection=self.collection, batch_size=8
+        )
+        calls_after_first_run = self.embeddings.embed_documents.call_count
+
+        second = store_faq_to_milvus(
+            FAQ_PATH, embeddings=self.embeddings, collection=self.collection
+        )
+
+        self.assertEqual(first["upserted"], len(self.collection.rows))
+        self.assertEqual(calls_after_first_run, 3)
+        self.assertEqual(second["upserted"], 0)
+        self.assertEqual(second["deleted"], 0)
+        self.assertEqual(self.embeddings.embed_documents.call_count, 3)
+
+    def test_switching_embedding_model_reembeds_everything(self):
+        store_faq_to_milvus(
+            FAQ_PATH, embeddings=self.embeddings, collection=self.collection
+        )
+        local = MagicMock(model="multilingual-minilm", dimension=384)
+        local.embed_documents.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+
+        summary = store_faq_to_milvus(FAQ_PATH, embeddings=local, collection=self.collection)
+
+        self.assertEqual(summary["upserted"], summary["total"])
+
+    def test_repeated_questions_are_stored_once(self):
+        items = json.load(open(FAQ_PATH, encoding="utf-8"))
+        repeated = {**items[0], "answer": "Bản trả lời thứ hai"}
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "faq.json")
+            with open(data_path, "w", encoding="utf-8") as f:
+                json.dump(items + [repeated], f, ensure_ascii=False)
+
+            first = store_faq_to_milvus(
+                data_path, embeddings=self.embeddings, collection=self.collection
+            )
+            second = store_faq_to_milvus(
+                data_path, embeddings=self.embeddings, collection=self.collection
+            )
+
+        self.assertEqual(first["duplicates"], 1)
+        self.assertEqual(first["upserted"], len(items))
+        self.assertEqual(self.collection.rows[faq_key(items[0])]["answer"], items[0]["answer"])
+        self.assertEqual((second["upserted"], second["unchanged"]), (0, len(items)))
+
+    def test_plan_only_changed_and_stale_entries(self):
+        items = [
+            {"question": "Q1", "category": "C", "answer": "A1"},
+            {"question": "Q2", "category": "C", "answer": "A2"},
+        ]
+        changed, _ = plan_ingestion(items, {}, "text-embedding-ada-002")
+        existing = {row["faq_id"]: row["content_hash"] for row in changed}
+        existing["removed"] = "hash"
+
+        items[1]["answer"] = "A2 updated"
+        changed, stale = plan_ingestion(items, existing, "text-embedding-ada-002")
+
+        self.assertEqual([row["faq_id"] for row in changed], [faq_key(items[1])])
+        self.assertEqual(stale, ["removed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Compare two bench/run.py reports, e.g. the main branch against a feature branch.
+
+Prints latency and RPS per scenario and concurrency level with the relative change,
+and exits non-zero when p95 latency or RPS regresses by more than --threshold.
+
+Usage:
+    python bench/compare.py bench/results/base.json bench/results/head.json --threshold 10
+"""
+
+import sys
+import json
+import argparse
+from typing import Dict, Tuple
+
+# Metric -> True when a higher value is better
+METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "rps": True}
+GATED = ("p95_ms", "rps")
+
+
+def load(path: str) -> Tuple[Dict, Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    results = {(r["scenario"], r["concurrency"]): r for r in report["results"]}
+    return report, results
+
+
+def change(base: float, head: float) -> float:
+    return (head - base) / base * 100 if base else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two load-test reports")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Allowed regression in percent"
+    )
+    args = parser.parse_args()
+
+    base_report, base = load(args.base)
+    head_report, head = load(args.head)
+    print(f"base {base_report.get('commit', '')[:8]}  {base_report.get('timestamp', '')}")
+    print(f"head {head_report.get('commit', '')[:8]}  {head_report.get('timestamp', '')}")
+    if base_report.get("config") != head_report.get("config"):
+        print("warning: the runs used different settings")
+
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        scenario, concurrency = key
+        cells = []
+        for metric, higher_is_better in METRICS.items():
+            delta = change(base[key][metric], head[key][metric])
+            worse = -delta if higher_is_better else delta
+            if metric in GATED and worse > args.threshold:
+                regressions.append(f"{scenario} c={concurrency} {metric} {delta:+.1f}%")
+            cells.append(f"{metric}={head[key][metric]:.1f} ({delta:+.1f}%)")
+        errors = f"errors={base[key]['errors']}->{head[key]['errors']}"
+        print(f"{scenario:<7} c={concurrency:<4} " + "  ".join(cells) + f"  {errors}")
+
+        base_calls = base[key].get("calls_per_turn", {})
+        for name, value in head[key].get("calls_per_turn", {}).items():
+            if value != base_calls.get(name):
+                print(f"{'':<15}{name}: {base_calls.get(name)} -> {value} per turn")
+
+    if regressions:
+        print(f"\nRegressions over {args.threshold:.0f}%:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
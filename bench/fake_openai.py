@@ -0,0 +1,228 @@
+"""
+Local stand-in for the OpenAI API used by the load-test harness.
+
+Serves /v1/chat/completions, /v1/embeddings and /v1/models with a configurable
+latency so the agent can be driven without network access or API spend:
+
+- Structured-output calls (a request with `tools`) get a tool call built from
+  keyword rules, so routing and after-service slot filling behave like production.
+- Plain completions get a short canned Vietnamese answer.
+- Embeddings are deterministic hashed character-trigram vectors, so the same text
+  always maps to the same vector and similar texts land close together.
+
+/stats returns request counters; the harness diffs them to report calls per turn.
+
+Usage:
+    python bench/fake_openai.py --port 8900 --chat-latency-ms 400 --embed-latency-ms 80
+"""
+
+import re
+import time
+import json
+import base64
+import asyncio
+import hashlib
+import argparse
+import threading
+from typing import Dict, List
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+
+DEFAULT_DIMENSION = 1536
+
+TICKET_CODE = re.compile(r"\b([0-9a-f]{24}|VX\d{6,})\b", re.IGNORECASE)
+SCHEDULE_TIME = re.compile(r"\b(\d{1,2}:\d{2}\s*(?:AM|PM)?)", re.IGNORECASE)
+
+# First matching rule wins; anything else is a general (FAQ) question
+INTENT_RULES = [
+    ("change_schedule", ("đổi giờ", "đổi lịch", "dời", "đổi chuyến")),
+    ("cancel_ticket", ("hủy vé", "huỷ vé", "hủy", "huỷ")),
+    ("invoice_request", ("hóa đơn", "hoá đơn", "xuất vat")),
+    ("complaint", ("khiếu nại", "phàn nàn", "thái độ")),
+]
+
+CANNED_ANSWER = (
+    "Dựa trên thông tin FAQ, bạn có thể liên hệ tổng đài 1900 6484 "
+    "hoặc thao tác trực tiếp trên ứng dụng Vexere để được hỗ trợ."
+)
+
+app = FastAPI(title="Fake OpenAI")
+app.state.chat_latency = 0.0
+app.state.embed_latency = 0.0
+
+stats: Dict[str, int] = {}
+stats_lock = threading.Lock()
+
+
+def count(name: str, amount: int = 1) -> None:
+    with stats_lock:
+        stats[name] = stats.get(name, 0) + amount
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def embed_text(text: str, dimension: int) -> np.ndarray:
+    vector = np.zeros(dimension, dtype=np.float32)
+    padded = f"  {text.lower()}  "
+    for i in range(len(padded) - 2):
+        digest = hashlib.blake2b(padded[i : i + 3].encode("utf-8"), digest_size=8)
+        bucket = int.from_bytes(digest.digest(), "little")
+        vector[bucket % dimension] += 1.0 if bucket & (1 << 63) else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def classify(text: str) -> Dict:
+    lowered = text.lower()
+    intent = next(
+        (name for name, keywords in INTENT_RULES if any(k in lowered for k in keywords)),
+        "general_inquiry",
+    )
+    ticket = TICKET_CODE.search(text)
+    schedule = SCHEDULE_TIME.search(text)
+    return {
+        "route": "faq" if intent == "general_inquiry" else "after_service",
+        "intent": intent,
+        "entities": {
+            "ticket_code": ticket.group(1) if ticket else None,
+            "schedule_time": schedule.group(1).upper() if schedule else None,
+            "reason": text if intent == "complaint" else None,
+        },
+    }
+
+
+def tool_arguments(tool: Dict, text: str) -> Dict:
+    """Fill only the properties the requested schema declares"""
+    properties = tool.get("function", {}).get("parameters", {}).get("properties", {})
+    classification = classify(text)
+    return {key: value for key, value in classification.items() if key in properties}
+
+
+def last_user_text(messages: List[Dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content)
+            return content or ""
+    return ""
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    count("chat_completions")
+    await asyncio.sleep(app.state.chat_latency)
+
+    messages = body.get("messages", [])
+    prompt_text = " ".join(str(m.get("content", "")) for m in messages)
+    text = last_user_text(messages)
+    tools = body.get("tools") or []
+
+    if tools:
+        count("chat_completions_tool")
+        arguments = json.dumps(tool_arguments(tools[0], text), ensure_ascii=False)
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{hashlib.md5(text.encode()).hexdigest()[:12]}",
+                    "type": "function",
+                    "function": {
+                        "name": tools[0]["function"]["name"],
+                        "arguments": arguments,
+                    },
+                }
+            ],
+        }
+        finish_reason = "tool_calls"
+        completion_text = arguments
+    else:
+        message = {"role": "assistant", "content": CANNED_ANSWER}
+        finish_reason = "stop"
+        completion_text = CANNED_ANSWER
+
+    prompt_tokens = approx_tokens(prompt_text)
+    completion_tokens = approx_tokens(completion_text)
+    return {
+        "id": f"chatcmpl-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body.get("input", [])
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    count("embeddings")
+    count("embedding_inputs", len(inputs))
+    await asyncio.sleep(app.state.embed_latency)
+
+    dimension = body.get("dimensions") or DEFAULT_DIMENSION
+    data = []
+    for i, item in enumerate(inputs):
+        # Token-id inputs (client-side tokenization) are hashed by their repr
+        vector = embed_text(item if isinstance(item, str) else str(item), dimension)
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(vector.astype(np.float32).tobytes()).decode()
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+    tokens = sum(approx_tokens(str(item)) for item in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "text-embedding-ada-002"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.get("/v1/models")
+async def models():
+    count("models")
+    return {
+        "object": "list",
+        "data": [
+            {"id": name, "object": "model", "created": 0, "owned_by": "bench"}
+            for name in ("gpt-4o-mini", "text-embedding-ada-002")
+        ],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    with stats_lock:
+        return dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI API for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--chat-latency-ms", type=float, default=400)
+    parser.add_argument("--embed-latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    app.state.chat_latency = args.chat_latency_ms / 1000
+    app.state.embed_latency = args.embed_latency_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
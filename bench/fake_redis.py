@@ -0,0 +1,24 @@
+"""
+Redis protocol stand-in (fakeredis) for multi-worker load tests without a Redis server.
+
+Usage:
+    python bench/fake_redis.py --port 6390
+"""
+
+import argparse
+
+from fakeredis import TcpFakeServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Redis-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = TcpFakeServer((args.host, args.port))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Offline load test of the agent and backend APIs.
+
+Starts the fake OpenAI API, the backend on an in-memory (or local) MongoDB and the
+agent on an in-memory Milvus, seeds tickets and a chat, then drives each scenario
+at fixed concurrency levels:
+
+- faq:    POST /api/faq/ with FAQ questions
+- chat:   POST /api/chat/ with a mix of FAQ questions and after-service requests
+- server: ticket and chat-history reads plus message appends on the backend
+
+For every scenario and level it reports p50/p95/p99 latency, RPS, errors and the
+upstream calls per turn (OpenAI requests from the fake's counters, Milvus searches
+and embedding batches from the agent's /metrics). The report is written as JSON to
+bench/results/ so runs can be compared across commits with bench/compare.py.
+
+Usage:
+    python bench/run.py --concurrency 1 8 32 --requests 200
+    python bench/run.py --scenarios server --mongo-uri mongodb://127.0.0.1:27017
+"""
+
+import os
+import re
+import math
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+FAQ_PATH = os.path.join(ROOT_DIR, "agent", "src", "mock", "faq.json")
+
+SCENARIOS = ("faq", "chat", "server")
+
+# Agent stages counted per turn; names match the spans in agent/src
+AGENT_STAGES = ("milvus.search_many", "embedding.embed_documents", "classify_turn")
+
+AFTER_SERVICE_TEMPLATES = (
+    "Tôi muốn đổi giờ vé {ticket} sang 9:30 AM",
+    "Cho tôi hủy vé {ticket}",
+    "Tôi cần xuất hóa đơn cho vé {ticket}",
+    "Tôi muốn khiếu nại về vé {ticket}, tài xế có thái độ không tốt",
+)
+
+STAGE_COUNT = re.compile(
+    r'^agent_stage_duration_seconds_count\{stage="([^"]+)"\} ([0-9.e+]+)$', re.MULTILINE
+)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def git_revision() -> Dict:
+    def run(*command):
+        result = subprocess.run(
+            ["git", *command], cwd=ROOT_DIR, capture_output=True, text=True
+        )
+        return result.stdout.strip()
+
+    return {"commit": run("rev-parse", "HEAD"), "dirty": bool(run("status", "--porcelain"))}
+
+
+class Services:
+    """Subprocesses of the stand-ins and both APIs, stopped together"""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+        self.openai_url = f"http://127.0.0.1:{args.openai_port}"
+        self.server_url = f"http://127.0.0.1:{args.server_port}"
+        self.agent_url = f"http://127.0.0.1:{args.agent_port}"
+
+    def spawn(self, script: str, *arguments) -> None:
+        command = [sys.executable, os.path.join(BENCH_DIR, script), *map(str, arguments)]
+        self.processes.append(subprocess.Popen(command))
+
+    def start(self) -> None:
+        args = self.args
+        self.spawn(
+            "fake_openai.py",
+            "--port", args.openai_port,
+            "--chat-latency-ms", args.chat_latency_ms,
+            "--embed-latency-ms", args.embed_latency_ms,
+        )  # fmt: skip
+        server_args = ["--port", args.server_port]
+        if args.mongo_uri:
+            server_args += ["--mongo-uri", args.mongo_uri]
+        self.spawn("run_server.py", *server_args)
+        agent_args = ["--workers", args.agent_workers]
+        redis_url = args.redis_url
+        if args.agent_workers > 1 and not redis_url:
+            # Workers share sessions and caches through a local Redis stand-in
+            self.spawn("fake_redis.py", "--port", args.redis_port)
+            redis_url = f"redis://127.0.0.1:{args.redis_port}/0"
+        if redis_url:
+            agent_args += ["--redis-url", redis_url]
+        self.spawn(
+            "run_agent.py",
+            "--port", args.agent_port,
+            "--openai-url", f"{self.openai_url}/v1",
+            "--backend-url", self.server_url,
+            "--milvus-latency-ms", args.milvus_latency_ms,
+            *agent_args,
+        )  # fmt: skip
+
+    def stop(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+async def seed(client: httpx.AsyncClient, server_url: str, tickets: int) -> Dict:
+    ticket_ids = []
+    for i in range(tickets):
+        response = await client.post(
+            f"{server_url}/api/ticket/",
+            json={
+                "userName": f"bench-{i}",
+                "type": "bus",
+                "date": "2025-08-01",
+                "time": "08:00 AM",
+                "from": "Hồ Chí Minh",
+                "to": "Đà Lạt",
+            },
+        )
+        response.raise_for_status()
+        ticket_ids.append(response.json()["data"]["id"])
+
+    response = await client.post(
+        f"{server_url}/api/chat-history/",
+        json={
+            "title": "Bench conversation",
+            "messages": [
+                {
+                    "id": f"msg-{i}",
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "content": f"Tin nhắn {i}",
+                    "timestamp": "2025-08-01T08:00:00",
+                }
+                for i in range(20)
+            ],
+        },
+    )
+    response.raise_for_status()
+    return {"tickets": ticket_ids, "chat_id": response.json()["data"]["id"]}
+
+
+def build_requests(scenario: str, count: int, urls: Dict, fixtures: Dict, rng) -> List:
+    """(method, url, json body) for every request of one run"""
+    with open(FAQ_PATH, "r", encoding="utf-8") as f:
+        questions = [row["question"] for row in json.load(f)]
+    tickets = fixtures["tickets"]
+    chat_id = fixtures["chat_id"]
+    requests = []
+
+    for i in range(count):
+        if scenario == "faq":
+            body = {"message": rng.choice(questions)}
+            requests.append(("POST", f"{urls['agent']}/api/faq/", body))
+        elif scenario == "chat":
+            # About a third of real traffic is after-service; each turn opens a new chat
+            if rng.random() < 0.3:
+                template = rng.choice(AFTER_SERVICE_TEMPLATES)
+                message = template.format(ticket=rng.choice(tickets))
+            else:
+                message = rng.choice(questions)
+            body = {"chat_id": None, "message": message}
+            requests.append(("POST", f"{urls['agent']}/api/chat/", body))
+        else:
+            server = urls["server"]
+            requests.append(
+                [
+                    ("GET", f"{server}/api/ticket/{rng.choice(tickets)}", None),
+                    ("GET", f"{server}/api/chat-history/{chat_id}", None),
+                    (
+                        "POST",
+                        f"{server}/api/chat-history/{chat_id}/messages",
+                        {
+                            "role": "user",
+                            "content": f"Tin nhắn bench {i}",
+                            "timestamp": "2025-08-01T08:00:00",
+                        },
+                    ),
+                    ("GET", f"{server}/api/ticket/", None),
+                ][i % 4]
+            )
+    return requests
+
+
+async def upstream_counters(client: httpx.AsyncClient, urls: Dict) -> Dict[str, float]:
+    counters: Dict[str, float] = {}
+    stats = (await client.get(f"{urls['openai']}/stats")).json()
+    for name in ("chat_completions", "embeddings", "embedding_inputs"):
+        counters[f"openai.{name}"] = stats.get(name, 0)
+
+    metrics = (await client.get(f"{urls['agent']}/metrics")).text
+    stage_counts = {stage: float(value) for stage, value in STAGE_COUNT.findall(metrics)}
+    for stage in AGENT_STAGES:
+        counters[stage] = stage_counts.get(stage, 0.0)
+    return counters
+
+
+async def run_level(
+    client: httpx.AsyncClient, requests: List, concurrency: int, timeout: float
+) -> Dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    queue = list(reversed(requests))
+
+    async def worker():
+        while queue:
+            method, url, body = queue.pop()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, timeout=timeout)
+                if response.status_code >= 400:
+                    key = str(response.status_code)
+                    errors[key] = errors.get(key, 0) + 1
+                # Failed requests still count towards latency; a fast 500 is not a win
+                latencies.append((time.perf_counter() - started) * 1000)
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(requests),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(requests) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run_benchmark(args, urls: Dict) -> List[Dict]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(limits=limits) as client:
+        for name in ("openai", "server", "agent"):
+            path = "/stats" if name == "openai" else "/ready"
+            await wait_ready(client, f"{urls[name]}{path}", args.startup_timeout)
+        fixtures = await seed(client, urls["server"], args.tickets)
+
+        results = []
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                # A short unmeasured warm-up fills connection pools and lazy caches
+                warmup = build_requests(scenario, args.warmup, urls, fixtures, rng)
+                await run_level(client, warmup, concurrency, args.request_timeout)
+
+                requests = build_requests(scenario, args.requests, urls, fixtures, rng)
+                before = await upstream_counters(client, urls)
+                result = await run_level(client, requests, concurrency, args.request_timeout)
+                after = await upstream_counters(client, urls)
+
+                result = {"scenario": scenario, "concurrency": concurrency, **result}
+                if scenario != "server":
+                    result["calls_per_turn"] = {
+                        name: round((after[name] - before[name]) / len(requests), 3)
+                        for name in before
+                    }
+                results.append(result)
+                print(
+                    f"{scenario:<7} c={concurrency:<4} rps={result['rps']:<8} "
+                    f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+                    f"p99={result['p99_ms']:.1f}ms errors={result['errors']}"
+                )
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of agent and server")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per level")
+    parser.add_argument("--tickets", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chat-latency-ms", type=float, default=400)
+    parser.add_argument("--embed-latency-ms", type=float, default=80)
+    parser.add_argument("--milvus-latency-ms", type=float, default=15)
+    parser.add_argument("--mongo-uri", help="Local MongoDB; in-memory when omitted")
+    parser.add_argument("--openai-port", type=int, default=8900)
+    parser.add_argument("--server-port", type=int, default=8901)
+    parser.add_argument("--agent-port", type=int, default=8902)
+    parser.add_argument("--agent-workers", type=int, default=1)
+    parser.add_argument("--redis-url", help="Shared agent state; fakeredis when omitted")
+    parser.add_argument("--redis-port", type=int, default=8903)
+    parser.add_argument(
+        "--no-spawn",
+        action="store_true",
+        help="Drive services that are already running on the given ports",
+    )
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--output", help="Report path; defaults to bench/results/")
+    parser.add_argument("--label", default="", help="Free-form note stored in the report")
+    args = parser.parse_args()
+
+    services = Services(args)
+    urls = {
+        "openai": services.openai_url,
+        "server": services.server_url,
+        "agent": services.agent_url,
+    }
+    if not args.no_spawn:
+        services.start()
+    try:
+        results = asyncio.run(run_benchmark(args, urls))
+    finally:
+        services.stop()
+
+    revision = git_revision()
+    timestamp = datetime.now(timezone.utc)
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "label", "no_spawn")
+    }
+    report = {
+        "timestamp": timestamp.isoformat(timespec="seconds"),
+        **revision,
+        "label": args.label,
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{timestamp:%Y%m%dT%H%M%S}-{revision['commit'][:8] or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
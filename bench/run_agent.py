@@ -0,0 +1,92 @@
+"""
+Start the agent API against local stand-ins: OpenAI calls go to bench/fake_openai.py
+and Milvus is replaced by an in-memory collection of the FAQ answers.
+
+Usage:
+    python bench/run_agent.py --port 8000 --openai-url http://127.0.0.1:8900/v1 \
+        --backend-url http://127.0.0.1:8001 --milvus-latency-ms 15
+    python bench/run_agent.py --workers 4 --redis-url redis://127.0.0.1:6390/0
+"""
+
+import os
+import sys
+import json
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "agent")
+
+
+def create_app():
+    """App factory; runs in every worker, so each one gets the in-memory Milvus"""
+    from stubs import FakeMilvusCollection
+    from src.core.config import FAQ_DATA_PATH
+    from src.integrates.milvus import MilvusClient
+
+    latency_ms = float(os.environ.get("BENCH_MILVUS_LATENCY_MS", "0"))
+
+    def connect_in_memory(client: MilvusClient) -> None:
+        with open(FAQ_DATA_PATH, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        # The production collection embeds the answers, so the fake does too
+        vectors = client.embeddings.embed_documents([row["answer"] for row in rows])
+        client.collection = FakeMilvusCollection(rows, vectors, latency_ms)
+        client.connected = True
+
+    MilvusClient._connect = connect_in_memory
+
+    from src.app import app
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent API with local stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--openai-url", default="http://127.0.0.1:8900/v1")
+    parser.add_argument("--backend-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--milvus-latency-ms", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--redis-url", help="Shared state in Redis instead of memory")
+    parser.add_argument(
+        "--env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra agent settings"
+    )
+    args = parser.parse_args()
+
+    # Settings are read at import time, so the environment is set first
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "sk-bench",
+            "OPENAI_BASE_URL": args.openai_url,
+            "OPENAI_API_BASE": args.openai_url,
+            "BACKEND_URL": args.backend_url,
+            "EMBEDDING_PROVIDER": "openai",
+            # tiktoken downloads its BPE files on first use; the fake needs no chunking
+            "OPENAI_EMBEDDING_TOKENIZE": "false",
+            "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+            "BENCH_MILVUS_LATENCY_MS": str(args.milvus_latency_ms),
+        }
+    )
+    if args.redis_url:
+        os.environ.update({"STATE_BACKEND": "redis", "STATE_REDIS_URL": args.redis_url})
+    os.environ.update(item.split("=", 1) for item in args.env)
+    os.chdir(AGENT_DIR)
+    sys.path.insert(0, AGENT_DIR)
+    sys.path.insert(0, BENCH_DIR)
+
+    import uvicorn
+
+    # Workers are spawned processes, so the app is passed as an import string
+    uvicorn.run(
+        "run_agent:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Start the backend API on an in-memory MongoDB, or on a local mongod with --mongo-uri.
+
+Usage:
+    python bench/run_server.py --port 8001
+    python bench/run_server.py --port 8001 --mongo-uri mongodb://127.0.0.1:27017
+"""
+
+import os
+import sys
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(os.path.dirname(BENCH_DIR), "server")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend API with local MongoDB")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mongo-uri", help="Local MongoDB; in-memory when omitted")
+    parser.add_argument("--db-name", default="vexere_bench")
+    args = parser.parse_args()
+
+    os.environ.update(
+        {
+            "MONGODB_KEY": args.mongo_uri or "mongodb://127.0.0.1:27017",
+            "MONGODB_DB_NAME": args.db_name,
+            "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        }
+    )
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+    sys.path.insert(0, BENCH_DIR)
+
+    import uvicorn
+    from src.integrates.mongo import get_client
+
+    if args.mongo_uri:
+        # Each run starts from an empty database
+        get_client().client.drop_database(args.db_name)
+    else:
+        from stubs import InMemoryDatabase, InMemoryMongoClient
+
+        # pymongo connects lazily, so swapping these before startup opens no socket
+        client = get_client()
+        client.client.close()
+        client.client = InMemoryMongoClient()
+        client.db = InMemoryDatabase()
+
+    from src.app import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
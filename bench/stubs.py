@@ -0,0 +1,135 @@
+"""
+In-process stand-ins for Milvus and MongoDB used by run_agent.py and run_server.py.
+
+Both implement only the calls the services make, with the same return shapes as
+pymilvus and pymongo, so the real client wrappers (and their metrics) stay in the
+request path.
+"""
+
+import copy
+import time
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+from bson import ObjectId
+
+
+class FakeHit:
+    def __init__(self, fields: Dict[str, Any], score: float):
+        self._fields = fields
+        self.score = score
+
+    def get(self, name: str) -> Any:
+        return self._fields.get(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._fields)
+
+
+class FakeMilvusCollection:
+    """Brute-force cosine search over rows held in memory, one sleep per request"""
+
+    def __init__(self, rows: List[Dict], vectors: List[List[float]], latency_ms: float = 0):
+        self.rows = rows
+        matrix = np.asarray(vectors, dtype=np.float32)
+        self.vectors = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.latency = latency_ms / 1000
+        self.search_calls = 0
+
+    def load(self) -> None:
+        pass
+
+    def search(self, data, anns_field, param, limit, output_fields=None, **kwargs):
+        self.search_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        queries = np.asarray(data, dtype=np.float32)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ self.vectors.T
+        results = []
+        for row_scores in scores:
+            top = np.argsort(-row_scores)[:limit]
+            results.append(
+                [
+                    FakeHit(
+                        {field: self.rows[i].get(field) for field in output_fields or []},
+                        float(row_scores[i]),
+                    )
+                    for i in top
+                ]
+            )
+        return results
+
+
+def _matches(document: Dict, query: Dict) -> bool:
+    return all(document.get(key) == value for key, value in query.items())
+
+
+class InMemoryCollection:
+    def __init__(self):
+        self.documents: List[Dict] = []
+        self.lock = threading.Lock()
+
+    def insert_one(self, document: Dict):
+        document.setdefault("_id", ObjectId())
+        with self.lock:
+            self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    def find_one(self, query: Dict):
+        with self.lock:
+            for document in self.documents:
+                if _matches(document, query):
+                    return copy.deepcopy(document)
+        return None
+
+    def find(self, query: Dict = None):
+        with self.lock:
+            return [
+                copy.deepcopy(document)
+                for document in self.documents
+                if _matches(document, query or {})
+            ]
+
+    def update_one(self, query: Dict, update: Dict):
+        with self.lock:
+            for document in self.documents:
+                if not _matches(document, query):
+                    continue
+                before = copy.deepcopy(document)
+                for key, value in update.get("$set", {}).items():
+                    document[key] = copy.deepcopy(value)
+                for key, value in update.get("$push", {}).items():
+                    document.setdefault(key, []).append(copy.deepcopy(value))
+                modified = int(document != before)
+                return SimpleNamespace(matched_count=1, modified_count=modified)
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+    def delete_one(self, query: Dict):
+        with self.lock:
+            for i, document in enumerate(self.documents):
+                if _matches(document, query):
+                    del self.documents[i]
+                    return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return self.collections.setdefault(name, InMemoryCollection())
+
+
+class InMemoryMongoClient:
+    """Replaces pymongo.MongoClient behind MongoDBClient.client"""
+
+    def __init__(self):
+        self.admin = SimpleNamespace(command=lambda name: {"ok": 1.0})
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,65 @@
+"""
+Check that the code the agent and server both carry is still identical.
+
+The two services are deployed separately and share no package, so the logging setup
+and the shared section of the metrics module are copied into each. Exits non-zero and
+prints a diff when the copies have drifted apart.
+
+Usage:
+    python scripts/check_shared_copies.py
+"""
+
+import os
+import sys
+import difflib
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def whole_file(source: str) -> str:
+    return source
+
+
+def metrics_shared_section(source: str) -> str:
+    start = source.index("# Shared section")
+    return source[start : source.index("# End of shared section", start)]
+
+
+# Path relative to each service's directory -> the part that must match
+SHARED: List[Tuple[str, Callable[[str], str]]] = [
+    (os.path.join("src", "core", "logger.py"), whole_file),
+    (os.path.join("src", "core", "metrics.py"), metrics_shared_section),
+]
+
+
+def read(service: str, path: str) -> str:
+    with open(os.path.join(ROOT, service, path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    drifted = False
+    for path, extract in SHARED:
+        agent = extract(read("agent", path))
+        server = extract(read("server", path))
+        if agent == server:
+            print(f"ok       {path}")
+            continue
+        drifted = True
+        print(f"DIFFERS  {path}")
+        sys.stdout.writelines(
+            difflib.unified_diff(
+                agent.splitlines(keepends=True),
+                server.splitlines(keepends=True),
+                fromfile=f"agent/{path}",
+                tofile=f"server/{path}",
+            )
+        )
+
+    if drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
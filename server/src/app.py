@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import sys
 import os
+import time
+import asyncio
 import logging
 
 sys.path.append(
@@ -15,11 +20,44 @@ sys.path.append(
 
 from src.routes.ticket_route import router as ticket_router
 from src.routes.chat_history_route import router as chat_history_router
+from src.integrates.mongo import get_client
+from src.core.metrics import HTTP_REQUEST_SECONDS, registry
+from src.core.logger import setup_logging, stop_logging
+from src.core.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+readiness = {"ready": False, "checks": {}}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+
+    # Open the MongoDB connection pool before the first request is accepted
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(get_client().ping)
+        readiness["checks"]["mongodb"] = {"ok": True, "error": None}
+    except Exception as e:
+        logger.error("Startup check mongodb failed: %s", e)
+        readiness["checks"]["mongodb"] = {"ok": False, "error": str(e)}
+    readiness["checks"]["mongodb"]["duration_ms"] = round(
+        (time.perf_counter() - started) * 1000, 1
+    )
+    readiness["ready"] = readiness["checks"]["mongodb"]["ok"]
+
+    yield
+    get_client().close()
+    stop_logging()
+
 
 app = FastAPI(
     title="Vexere Server",
     version="1.0",
     description="This is the Vexere server API.",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -32,21 +70,67 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, so ids do not explode the label set
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route,
+            status=status,
+        )
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    # Invalid payloads keep the 400 and "; "-joined detail of the old dict validators
+    errors = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error["loc"] if part != "body")
+        errors.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return ORJSONResponse({"detail": "; ".join(errors)}, status_code=400)
+
+
+@app.exception_handler(ResponseValidationError)
+async def response_validation_error_handler(
+    request: Request, exc: ResponseValidationError
+):
+    # A stored document that does not fit the response_model is a server error
+    errors = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error["loc"] if part != "response")
+        errors.append(f"{location}: {error['msg']}" if location else error["msg"])
+    logger.error("Invalid response for %s: %s", request.url.path, "; ".join(errors))
+    return ORJSONResponse({"detail": "; ".join(errors)}, status_code=500)
+
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 
-app.include_router(ticket_router, prefix="/api/ticket")
-app.include_router(chat_history_router, prefix="/api/chat-history")
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/ready")
+def ready():
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
 
 
-@app.on_event("startup")
-async def startup_event():
-    logger = logging.getLogger("uvicorn.access")
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    logger.addHandler(handler)
+app.include_router(ticket_router, prefix="/api/ticket")
+app.include_router(chat_history_router, prefix="/api/chat-history")
 
 
 if __name__ == "__main__":
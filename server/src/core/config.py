@@ -16,3 +16,8 @@ def get_env_variable(name):
 
 MONGODB_KEY = os.getenv("MONGODB_KEY")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME")
+
+# Logging: level, "json" or "text" output, and the share of DEBUG/INFO records kept
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
@@ -0,0 +1,27 @@
+"""
+orjson response rendering, the app's default response class. Routes with a
+response_model hand it content already serialized by pydantic-core; anything else
+may still carry Mongo types, so datetime is encoded natively (same output as
+isoformat()) and ObjectId as its hex string.
+"""
+
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,4 +1,5 @@
 from src.core.config import MONGODB_KEY, MONGODB_DB_NAME
+from src.core.metrics import timed_mongo
 from pymongo import MongoClient
 
 
@@ -9,12 +10,13 @@ class MongoDBClient:
 
     def insert_one(self, collection_name, document):
         collection = self.db[collection_name]
-        result = collection.insert_one(document)
-        return result
+        with timed_mongo("insert_one", collection_name):
+            return collection.insert_one(document)
 
     def find_one(self, collection_name, query):
         collection = self.db[collection_name]
-        return collection.find_one(query)
+        with timed_mongo("find_one", collection_name):
+            return collection.find_one(query)
 
     def find(self, collection_name, query):
         collection = self.db[collection_name]
@@ -26,11 +28,17 @@ class MongoDBClient:
 
     def update_one(self, collection_name, query, update_data):
         collection = self.db[collection_name]
-        return collection.update_one(query, update_data)
+        with timed_mongo("update_one", collection_name):
+            return collection.update_one(query, update_data)
 
     def delete_one(self, collection_name, query):
         collection = self.db[collection_name]
-        return collection.delete_one(query)
+        with timed_mongo("delete_one", collection_name):
+            return collection.delete_one(query)
+
+    def ping(self):
+        # Opens the pooled connection; raises when the cluster is unreachable
+        return self.client.admin.command("ping")
 
     def close(self):
         self.client.close()
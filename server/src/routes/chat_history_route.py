@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Request, HTTPException, Query
-from typing import Optional
+from typing import List, Optional
+from src.schema.response_schema import ApiMessageResponse, ApiResponse, StatusResponse
 from src.services.chat_history_service import (
     read_all_chat_histories,
     create_chat_history,
@@ -13,12 +14,13 @@ from src.schema.chat_history_schema import (
     ChatHistoryUpdateSchema,
     AddMessageSchema,
     ChatHistorySearchSchema,
+    ChatHistoryResponseSchema,
 )
 
 router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", response_model=ApiResponse[List[ChatHistoryResponseSchema]])
 async def get_all_chat_histories():
     """Get all chat histories"""
     try:
@@ -28,7 +30,7 @@ async def get_all_chat_histories():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{chat_id}")
+@router.get("/{chat_id}", response_model=ApiResponse[ChatHistoryResponseSchema])
 async def get_chat_history_by_id_endpoint(chat_id: str):
     """Get a specific chat history by ID"""
     try:
@@ -40,12 +42,11 @@ async def get_chat_history_by_id_endpoint(chat_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/")
-async def create_new_chat_history(request: Request):
+@router.post("/", response_model=ApiMessageResponse[ChatHistoryResponseSchema])
+async def create_new_chat_history(chat: ChatHistoryCreateSchema):
     """Create a new chat history"""
     try:
-        chat_data = await request.json()
-        created_chat = await create_chat_history(chat_data)
+        created_chat = await create_chat_history(chat)
         return {
             "success": True,
             "data": created_chat,
@@ -57,12 +58,13 @@ async def create_new_chat_history(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{chat_id}")
-async def update_chat_history_endpoint(chat_id: str, request: Request):
+@router.put(
+    "/{chat_id}", response_model=ApiMessageResponse[ChatHistoryResponseSchema]
+)
+async def update_chat_history_endpoint(chat_id: str, chat: ChatHistoryUpdateSchema):
     """Update an existing chat history"""
     try:
-        update_data = await request.json()
-        updated_chat = await update_chat_history(chat_id, update_data)
+        updated_chat = await update_chat_history(chat_id, chat)
         return {
             "success": True,
             "data": updated_chat,
@@ -74,7 +76,7 @@ async def update_chat_history_endpoint(chat_id: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.delete("/{chat_id}")
+@router.delete("/{chat_id}", response_model=StatusResponse)
 async def delete_chat_history_endpoint(chat_id: str):
     """Delete a chat history"""
     try:
@@ -86,12 +88,14 @@ async def delete_chat_history_endpoint(chat_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/{chat_id}/messages")
-async def add_message_to_chat_endpoint(chat_id: str, request: Request):
+@router.post(
+    "/{chat_id}/messages",
+    response_model=ApiMessageResponse[ChatHistoryResponseSchema],
+)
+async def add_message_to_chat_endpoint(chat_id: str, message: AddMessageSchema):
     """Add a new message to an existing chat history"""
     try:
-        message_data = await request.json()
-        updated_chat = await add_message_to_chat(chat_id, message_data)
+        updated_chat = await add_message_to_chat(chat_id, message)
         return {
             "success": True,
             "data": updated_chat,
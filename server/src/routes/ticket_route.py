@@ -1,5 +1,11 @@
 from fastapi import APIRouter, Request, HTTPException, Query
-from typing import Optional
+from typing import List, Optional
+from src.schema.response_schema import ApiMessageResponse, ApiResponse, StatusResponse
+from src.schema.ticket_schema import (
+    TicketCreateSchema,
+    TicketResponseSchema,
+    TicketUpdateSchema,
+)
 from src.services.ticket_service import (
     read_all_tickets,
     create_ticket,
@@ -11,7 +17,7 @@ from src.services.ticket_service import (
 router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", response_model=ApiResponse[List[TicketResponseSchema]])
 async def get_all_tickets():
     """Get all tickets"""
     try:
@@ -21,7 +27,7 @@ async def get_all_tickets():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{ticket_id}")
+@router.get("/{ticket_id}", response_model=ApiResponse[TicketResponseSchema])
 async def get_ticket_by_id_endpoint(ticket_id: str):
     """Get a specific ticket by ID"""
     try:
@@ -33,12 +39,11 @@ async def get_ticket_by_id_endpoint(ticket_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/")
-async def create_new_ticket(request: Request):
+@router.post("/", response_model=ApiMessageResponse[TicketResponseSchema])
+async def create_new_ticket(ticket: TicketCreateSchema):
     """Create a new ticket"""
     try:
-        ticket_data = await request.json()
-        created_ticket = await create_ticket(ticket_data)
+        created_ticket = await create_ticket(ticket)
         return {
             "success": True,
             "data": created_ticket,
@@ -50,12 +55,11 @@ async def create_new_ticket(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{ticket_id}")
-async def update_ticket_endpoint(ticket_id: str, request: Request):
+@router.put("/{ticket_id}", response_model=ApiMessageResponse[TicketResponseSchema])
+async def update_ticket_endpoint(ticket_id: str, ticket: TicketUpdateSchema):
     """Update an existing ticket"""
     try:
-        update_data = await request.json()
-        updated_ticket = await update_ticket(ticket_id, update_data)
+        updated_ticket = await update_ticket(ticket_id, ticket)
         return {
             "success": True,
             "data": updated_ticket,
@@ -67,7 +71,7 @@ async def update_ticket_endpoint(ticket_id: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.delete("/{ticket_id}")
+@router.delete("/{ticket_id}", response_model=StatusResponse)
 async def delete_ticket_endpoint(ticket_id: str):
     """Delete a ticket"""
     try:
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional, Literal
 from datetime import datetime
-from bson import ObjectId
+
+from src.schema.response_schema import ObjectIdStr
 
 
 class MessageSchema(BaseModel):
@@ -14,8 +15,15 @@ class MessageSchema(BaseModel):
     content: str = Field(..., description="Nội dung tin nhắn")
     timestamp: datetime = Field(..., description="Thời gian gửi tin nhắn")
 
-    class Config:
-        json_encoders = {datetime: lambda v: v.isoformat()}
+
+class StoredMessageSchema(MessageSchema):
+    """Tin nhắn đọc từ MongoDB; các bản ghi cũ không có id"""
+
+    id: Optional[str] = Field(None, description="ID duy nhất của tin nhắn")
+
+
+# Stored message lists are validated in one pydantic-core call
+MessageList = TypeAdapter(List[StoredMessageSchema])
 
 
 class ChatHistoryCreateSchema(BaseModel):
@@ -27,10 +35,12 @@ class ChatHistoryCreateSchema(BaseModel):
     status: Literal["active", "resolved", "pending"] = Field(
         default="active", description="Trạng thái cuộc hội thoại"
     )
-    messages: List[MessageSchema] = Field(default=[], description="Danh sách tin nhắn")
+    messages: List[MessageSchema] = Field(
+        default_factory=list, description="Danh sách tin nhắn"
+    )
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "title": "Tìm vé Hà Nội - TP.HCM",
                 "status": "active",
@@ -43,7 +53,8 @@ class ChatHistoryCreateSchema(BaseModel):
                     }
                 ],
             }
-        }
+        },
+    )
 
 
 class ChatHistoryUpdateSchema(BaseModel):
@@ -59,13 +70,14 @@ class ChatHistoryUpdateSchema(BaseModel):
         None, description="Danh sách tin nhắn"
     )
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "title": "Tìm vé Hà Nội - TP.HCM (Đã giải quyết)",
                 "status": "resolved",
             }
-        }
+        },
+    )
 
 
 class AddMessageSchema(BaseModel):
@@ -74,30 +86,33 @@ class AddMessageSchema(BaseModel):
     role: Literal["user", "assistant"] = Field(..., description="Vai trò người gửi")
     content: str = Field(..., min_length=1, description="Nội dung tin nhắn")
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "role": "user",
                 "content": "Tôi muốn đặt chuyến Phương Trang 6h sáng",
             }
-        }
+        },
+    )
 
 
 class ChatHistoryResponseSchema(BaseModel):
     """Schema cho response của chat history"""
 
-    id: str = Field(..., description="ID của cuộc hội thoại")
+    object_id: ObjectIdStr = Field(..., alias="_id", description="ID MongoDB")
+    id: ObjectIdStr = Field(..., description="ID của cuộc hội thoại")
     title: str = Field(..., description="Tiêu đề cuộc hội thoại")
     createdAt: datetime = Field(..., description="Thời gian tạo")
     updatedAt: datetime = Field(..., description="Thời gian cập nhật")
     status: str = Field(..., description="Trạng thái cuộc hội thoại")
-    messages: List[MessageSchema] = Field(..., description="Danh sách tin nhắn")
+    messages: List[StoredMessageSchema] = Field(..., description="Danh sách tin nhắn")
     message_count: Optional[int] = Field(None, description="Số lượng tin nhắn")
 
-    class Config:
-        json_encoders = {datetime: lambda v: v.isoformat()}
-        schema_extra = {
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
+                "_id": "60f7b1b9e4b0c8a2a0a1b2c3",
                 "id": "60f7b1b9e4b0c8a2a0a1b2c3",
                 "title": "Tìm vé Hà Nội - TP.HCM",
                 "createdAt": "2025-01-03T09:00:00.000Z",
@@ -119,7 +134,8 @@ class ChatHistoryResponseSchema(BaseModel):
                     },
                 ],
             }
-        }
+        },
+    )
 
 
 class ChatHistoryListResponseSchema(BaseModel):
@@ -133,8 +149,8 @@ class ChatHistoryListResponseSchema(BaseModel):
     offset: int = Field(..., description="Vị trí bắt đầu")
     has_more: bool = Field(..., description="Có còn dữ liệu không")
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "chat_histories": [],
                 "total_count": 50,
@@ -142,7 +158,8 @@ class ChatHistoryListResponseSchema(BaseModel):
                 "offset": 0,
                 "has_more": True,
             }
-        }
+        },
+    )
 
 
 class ChatHistorySearchSchema(BaseModel):
@@ -159,8 +176,8 @@ class ChatHistorySearchSchema(BaseModel):
     limit: int = Field(default=10, ge=1, le=100, description="Số bản ghi trên trang")
     offset: int = Field(default=0, ge=0, description="Vị trí bắt đầu")
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "query": "tìm vé",
                 "status": "resolved",
@@ -169,87 +186,21 @@ class ChatHistorySearchSchema(BaseModel):
                 "limit": 10,
                 "offset": 0,
             }
-        }
-
-
-def validate_chat_history_data(data: dict, is_update: bool = False):
-    """Validate chat history data với business rules"""
-    errors = []
-
-    if not is_update:
-        # Required fields cho tạo mới
-        required_fields = ["title"]
-        for field in required_fields:
-            if field not in data or not data[field]:
-                errors.append(f"Missing required field: {field}")
-
-    # Validate title
-    if "title" in data and data["title"]:
-        if len(data["title"]) > 200:
-            errors.append("Title must not exceed 200 characters")
-
-    # Validate status
-    if "status" in data and data["status"]:
-        valid_statuses = ["active", "resolved", "pending"]
-        if data["status"] not in valid_statuses:
-            errors.append(f"Invalid status. Must be one of: {valid_statuses}")
-
-    # Validate messages
-    if "messages" in data and data["messages"]:
-        if not isinstance(data["messages"], list):
-            errors.append("Messages must be a list")
-        else:
-            for i, message in enumerate(data["messages"]):
-                if not isinstance(message, dict):
-                    errors.append(f"Message at index {i} must be a dictionary")
-                    continue
-
-                # Validate required message fields
-                required_msg_fields = ["id", "role", "content", "timestamp"]
-                for field in required_msg_fields:
-                    if field not in message:
-                        errors.append(
-                            f"Message at index {i} missing required field: {field}"
-                        )
-
-                # Validate role
-                if "role" in message and message["role"] not in ["user", "assistant"]:
-                    errors.append(
-                        f"Message at index {i} has invalid role. Must be 'user' or 'assistant'"
-                    )
-
-    if errors:
-        raise ValueError("; ".join(errors))
-
-    return data
+        },
+    )
 
 
 def serialize_chat_history(chat_history):
-    """Convert MongoDB document to JSON serializable format"""
+    """Shape a MongoDB document for the API; orjson renders the ids and dates"""
     if chat_history:
         # Keep both _id and id for frontend compatibility
-        chat_history["_id"] = str(
-            chat_history["_id"]
-        )  # Keep _id as string for frontend
-        chat_history["id"] = chat_history["_id"]  # Also provide id field
-
-        # Convert datetime objects to ISO string format
-        if "createdAt" in chat_history and isinstance(
-            chat_history["createdAt"], datetime
-        ):
-            chat_history["createdAt"] = chat_history["createdAt"].isoformat()
-        if "updatedAt" in chat_history and isinstance(
-            chat_history["updatedAt"], datetime
-        ):
-            chat_history["updatedAt"] = chat_history["updatedAt"].isoformat()
-
-        # Process messages timestamps
-        if "messages" in chat_history and chat_history["messages"]:
-            for message in chat_history["messages"]:
-                if "timestamp" in message and isinstance(
-                    message["timestamp"], datetime
-                ):
-                    message["timestamp"] = message["timestamp"].isoformat()
+        chat_history["id"] = chat_history["_id"]
+
+        # Early documents have no timestamps; the ObjectId records the creation time
+        if "createdAt" not in chat_history:
+            created_at = chat_history["_id"].generation_time.replace(tzinfo=None)
+            chat_history["createdAt"] = created_at
+        chat_history.setdefault("updatedAt", chat_history["createdAt"])
 
         # Add message count
         if "messages" in chat_history:
@@ -0,0 +1,27 @@
+from typing import Annotated, Generic, Optional, TypeVar
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, Field
+
+T = TypeVar("T")
+
+# MongoDB ObjectId rendered as its hex string
+ObjectIdStr = Annotated[
+    str, BeforeValidator(lambda v: str(v) if isinstance(v, ObjectId) else v)
+]
+
+
+class ApiResponse(BaseModel, Generic[T]):
+    """Envelope of every successful API response"""
+
+    success: bool = Field(True, description="Yêu cầu thành công")
+    data: T
+
+
+class ApiMessageResponse(ApiResponse[T], Generic[T]):
+    message: str = Field(..., description="Thông báo kết quả")
+
+
+class StatusResponse(BaseModel):
+    success: bool = Field(True, description="Yêu cầu thành công")
+    message: Optional[str] = Field(None, description="Thông báo kết quả")
@@ -1,99 +1,79 @@
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
-
-class PaymentInfo:
-    def __init__(self, done: bool = False, gate: str = ""):
-        self.done = done
-        self.gate = gate
-
-    def to_dict(self):
-        return {"done": self.done, "gate": self.gate}
-
-
-class TicketSchema:
-    def __init__(
-        self,
-        userName: str,
-        type: str,
-        date: str,
-        time: str,
-        fromLocation: str,
-        toLocation: str,
-        payment: PaymentInfo,
-        createdAt: Optional[datetime] = None,
-        updatedAt: Optional[datetime] = None,
-    ):
-        self.userName = userName
-        self.type = type
-        self.date = date
-        self.time = time
-        self.from_location = fromLocation
-        self.to_location = toLocation
-        self.payment = payment
-        self.createdAt = createdAt or datetime.utcnow()
-        self.updatedAt = updatedAt or datetime.utcnow()
-
-    def to_dict(self):
-        return {
-            "userName": self.userName,
-            "type": self.type,
-            "date": self.date,
-            "time": self.time,
-            "from": self.from_location,
-            "to": self.to_location,
-            "payment": (
-                self.payment.to_dict()
-                if isinstance(self.payment, PaymentInfo)
-                else self.payment
-            ),
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict):
-        payment_data = data.get("payment", {})
-        payment = PaymentInfo(
-            done=payment_data.get("done", False), gate=payment_data.get("gate", "")
-        )
-
-        return cls(
-            userName=data.get("userName", ""),
-            type=data.get("type", ""),
-            date=data.get("date", ""),
-            time=data.get("time", ""),
-            from_location=data.get("from", ""),
-            to_location=data.get("to", ""),
-            payment=payment,
-            createdAt=data.get("createdAt"),
-            updatedAt=data.get("updatedAt"),
-        )
-
-
-def validate_ticket_data(data: dict) -> dict:
-    """Validate and sanitize ticket data"""
-    required_fields = ["userName", "type", "date", "time", "from", "to"]
-
-    for field in required_fields:
-        if field not in data or not data[field]:
-            raise ValueError(f"Missing required field: {field}")
-
-    # Validate type
-    valid_types = ["bus", "train", "plane", "boat"]
-    if data["type"] not in valid_types:
-        raise ValueError(f"Invalid type. Must be one of: {valid_types}")
-
-    # Validate payment
-    if "payment" in data:
-        payment = data["payment"]
-        if not isinstance(payment, dict):
-            raise ValueError("Payment must be a dictionary")
-
-        if "done" in payment and not isinstance(payment["done"], bool):
-            raise ValueError("Payment 'done' field must be a boolean")
-
-        if "gate" in payment and not isinstance(payment["gate"], str):
-            raise ValueError("Payment 'gate' field must be a string")
-
-    return data
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictStr
+
+from src.schema.response_schema import ObjectIdStr
+
+TicketType = Literal["bus", "train", "plane", "boat"]
+
+
+class PaymentSchema(BaseModel):
+    """Trạng thái thanh toán của vé"""
+
+    done: StrictBool = Field(False, description="Đã thanh toán")
+    gate: StrictStr = Field("", description="Cổng thanh toán")
+
+
+class TicketCreateSchema(BaseModel):
+    """Schema để tạo vé mới"""
+
+    # Extra fields (e.g. a status set by the agent) are stored as sent
+    model_config = ConfigDict(
+        extra="allow",
+        populate_by_name=True,
+        json_schema_extra={
+            "example": {
+                "userName": "Nguyễn Văn A",
+                "type": "bus",
+                "date": "2025-08-01",
+                "time": "08:00 AM",
+                "from": "Hồ Chí Minh",
+                "to": "Đà Lạt",
+                "payment": {"done": True, "gate": "momo"},
+            }
+        },
+    )
+
+    userName: str = Field(..., min_length=1, description="Tên khách hàng")
+    type: TicketType = Field(..., description="Loại phương tiện")
+    date: str = Field(..., min_length=1, description="Ngày khởi hành")
+    time: str = Field(..., min_length=1, description="Giờ khởi hành")
+    from_: str = Field(..., alias="from", min_length=1, description="Điểm đi")
+    to: str = Field(..., min_length=1, description="Điểm đến")
+    payment: PaymentSchema = Field(default_factory=PaymentSchema)
+
+
+class TicketUpdateSchema(BaseModel):
+    """Schema để cập nhật vé; chỉ các trường được gửi mới được ghi"""
+
+    model_config = ConfigDict(
+        extra="allow",
+        populate_by_name=True,
+        json_schema_extra={"example": {"time": "09:30 AM"}},
+    )
+
+    userName: Optional[str] = Field(None, min_length=1)
+    type: Optional[TicketType] = None
+    date: Optional[str] = Field(None, min_length=1)
+    time: Optional[str] = Field(None, min_length=1)
+    from_: Optional[str] = Field(None, alias="from", min_length=1)
+    to: Optional[str] = Field(None, min_length=1)
+    payment: Optional[PaymentSchema] = None
+
+
+class TicketResponseSchema(BaseModel):
+    """Schema cho response của vé"""
+
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    id: ObjectIdStr = Field(..., description="ID của vé")
+    userName: Optional[str] = None
+    type: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    from_: Optional[str] = Field(None, alias="from")
+    to: Optional[str] = None
+    payment: Optional[PaymentSchema] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
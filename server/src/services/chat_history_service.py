@@ -6,7 +6,9 @@ from datetime import datetime
 from bson import ObjectId
 from src.integrates.mongo import get_client
 from src.schema.chat_history_schema import (
-    validate_chat_history_data,
+    AddMessageSchema,
+    ChatHistoryCreateSchema,
+    ChatHistoryUpdateSchema,
     serialize_chat_history,
 )
 
@@ -46,19 +48,11 @@ async def get_chat_history_by_id(chat_id: str):
         raise Exception(f"Error fetching chat history: {str(e)}")
 
 
-async def create_chat_history(chat_data: Dict):
-    """Create a new chat history with validation"""
+async def create_chat_history(chat: ChatHistoryCreateSchema):
+    """Create a new chat history from a validated payload"""
     try:
-        # Validate chat history data
-        validated_data = validate_chat_history_data(chat_data, is_update=False)
-
-        # Ensure default status if not provided
-        if "status" not in validated_data:
-            validated_data["status"] = "active"
-
-        # Ensure messages array exists
-        if "messages" not in validated_data:
-            validated_data["messages"] = []
+        # Defaults (status "active", empty messages) come from the schema
+        validated_data = chat.model_dump()
 
         # Add timestamps
         current_time = datetime.utcnow()
@@ -77,8 +71,8 @@ async def create_chat_history(chat_data: Dict):
         raise Exception(f"Error creating chat history: {str(e)}")
 
 
-async def update_chat_history(chat_id: str, chat_data: Dict):
-    """Update an existing chat history with validation"""
+async def update_chat_history(chat_id: str, chat: ChatHistoryUpdateSchema):
+    """Update an existing chat history with the fields sent in a validated payload"""
     try:
         # Validate ObjectId format
         try:
@@ -86,8 +80,7 @@ async def update_chat_history(chat_id: str, chat_data: Dict):
         except:
             raise ValueError("Invalid chat history ID format")
 
-        # Validate update data
-        validated_data = validate_chat_history_data(chat_data, is_update=True)
+        validated_data = chat.model_dump(exclude_unset=True)
 
         # Remove None values from update_data
         filtered_update_data = {
@@ -145,7 +138,7 @@ async def delete_chat_history(chat_id: str):
         raise Exception(f"Error deleting chat history: {str(e)}")
 
 
-async def add_message_to_chat(chat_id: str, message_data: Dict):
+async def add_message_to_chat(chat_id: str, message: AddMessageSchema):
     """Add a new message to an existing chat history"""
     try:
         # Validate ObjectId format
@@ -154,23 +147,13 @@ async def add_message_to_chat(chat_id: str, message_data: Dict):
         except:
             raise ValueError("Invalid chat history ID format")
 
-        # Validate message data
-        if "role" not in message_data or message_data["role"] not in [
-            "user",
-            "assistant",
-        ]:
-            raise ValueError("Message must have valid role: 'user' or 'assistant'")
-
-        if "content" not in message_data or not message_data["content"]:
-            raise ValueError("Message content is required")
-
         # Generate message ID and timestamp
         import uuid
 
         new_message = {
             "id": f"msg_{str(uuid.uuid4())[:8]}",
-            "role": message_data["role"],
-            "content": message_data["content"],
+            "role": message.role,
+            "content": message.content,
             "timestamp": datetime.utcnow(),
         }
 
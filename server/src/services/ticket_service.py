@@ -5,59 +5,18 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from bson import ObjectId
 from src.integrates.mongo import get_client
+from src.schema.ticket_schema import TicketCreateSchema, TicketUpdateSchema
 
 COLLECTION_NAME = "tickets"
 
 
 def serialize_ticket(ticket):
-    """Convert MongoDB document to JSON serializable format"""
+    """Shape a MongoDB document for the API; response models render ids and dates"""
     if ticket:
-        ticket["id"] = str(ticket["_id"])
-        del ticket["_id"]
-
-        # Convert datetime objects to ISO string format
-        if "createdAt" in ticket and isinstance(ticket["createdAt"], datetime):
-            ticket["createdAt"] = ticket["createdAt"].isoformat()
-        if "updatedAt" in ticket and isinstance(ticket["updatedAt"], datetime):
-            ticket["updatedAt"] = ticket["updatedAt"].isoformat()
+        ticket["id"] = ticket.pop("_id")
     return ticket
 
 
-def validate_ticket_data(data: dict, is_update: bool = False):
-    """Validate ticket data with comprehensive business rules"""
-    errors = []
-
-    if not is_update:
-        # Required fields for creation
-        required_fields = ["userName", "type", "date", "time", "from", "to"]
-        for field in required_fields:
-            if field not in data or not data[field]:
-                errors.append(f"Missing required field: {field}")
-
-    # Validate type if provided
-    if "type" in data and data["type"]:
-        valid_types = ["bus", "train", "plane", "boat"]
-        if data["type"] not in valid_types:
-            errors.append(f"Invalid type. Must be one of: {valid_types}")
-
-    # Validate payment if provided
-    if "payment" in data and data["payment"]:
-        payment = data["payment"]
-        if not isinstance(payment, dict):
-            errors.append("Payment must be a dictionary")
-        else:
-            if "done" in payment and not isinstance(payment["done"], bool):
-                errors.append("Payment 'done' field must be a boolean")
-
-            if "gate" in payment and not isinstance(payment["gate"], str):
-                errors.append("Payment 'gate' field must be a string")
-
-    if errors:
-        raise ValueError("; ".join(errors))
-
-    return data
-
-
 async def read_all_tickets():
     """Get all tickets"""
     try:
@@ -91,15 +50,10 @@ async def get_ticket_by_id(ticket_id: str):
         raise Exception(f"Error fetching ticket: {str(e)}")
 
 
-async def create_ticket(ticket_data: Dict):
-    """Create a new ticket with validation"""
+async def create_ticket(ticket: TicketCreateSchema):
+    """Create a new ticket from a validated payload"""
     try:
-        # Validate ticket data
-        validated_data = validate_ticket_data(ticket_data, is_update=False)
-
-        # Ensure payment object exists
-        if "payment" not in validated_data:
-            validated_data["payment"] = {"done": False, "gate": ""}
+        validated_data = ticket.model_dump(by_alias=True)
 
         # Add timestamps
         current_time = datetime.utcnow()
@@ -118,8 +72,8 @@ async def create_ticket(ticket_data: Dict):
         raise Exception(f"Error creating ticket: {str(e)}")
 
 
-async def update_ticket(ticket_id: str, ticket_data: Dict):
-    """Update an existing ticket with validation"""
+async def update_ticket(ticket_id: str, ticket: TicketUpdateSchema):
+    """Update an existing ticket with the fields sent in a validated payload"""
     try:
         # Validate ObjectId format
         try:
@@ -127,8 +81,7 @@ async def update_ticket(ticket_id: str, ticket_data: Dict):
         except:
             raise ValueError("Invalid ticket ID format")
 
-        # Validate update data
-        validated_data = validate_ticket_data(ticket_data, is_update=True)
+        validated_data = ticket.model_dump(by_alias=True, exclude_unset=True)
 
         # Remove None values from update_data
         filtered_update_data = {
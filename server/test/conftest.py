@@ -0,0 +1,105 @@
+"""
+Synthetic tickets and chats for the server benchmarks, and a TestClient whose
+MongoDBClient is a mock serving them.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import create_autospec, patch
+
+import pytest
+from bson import ObjectId
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The module-level MongoDBClient needs a database name; it never connects here
+os.environ.setdefault("MONGODB_DB_NAME", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src.integrates.mongo import MongoDBClient
+
+MESSAGE_COUNTS = [10, 100, 1000, 10000]
+CREATED_AT = datetime(2025, 1, 3, 9, 0, 0)
+
+
+def make_messages(count: int, as_documents: bool = True) -> list:
+    """Messages as stored in MongoDB (datetime timestamps) or as sent by clients"""
+    messages = []
+    for i in range(count):
+        timestamp = CREATED_AT + timedelta(seconds=i)
+        messages.append(
+            {
+                "id": f"msg_{i:08d}",
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": f"Tôi muốn đổi giờ vé VX{i:09d} sang chuyến 9:30 AM ngày mai",
+                "timestamp": timestamp if as_documents else timestamp.isoformat(),
+            }
+        )
+    return messages
+
+
+def make_chat_document(message_count: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "title": "Hỗ trợ đổi vé",
+        "status": "active",
+        "messages": make_messages(message_count),
+        "createdAt": CREATED_AT,
+        "updatedAt": CREATED_AT,
+    }
+
+
+def make_ticket_payload(i: int = 0) -> dict:
+    return {
+        "userName": f"Nguyễn Văn {i}",
+        "type": "bus",
+        "date": "2025-08-01",
+        "time": "08:00 AM",
+        "from": "Hồ Chí Minh",
+        "to": "Đà Lạt",
+        "payment": {"done": True, "gate": "momo"},
+    }
+
+
+def make_ticket_document(i: int = 0) -> dict:
+    return {
+        "_id": ObjectId(),
+        **make_ticket_payload(i),
+        "createdAt": CREATED_AT,
+        "updatedAt": CREATED_AT,
+    }
+
+
+def fresh(document: dict) -> dict:
+    """
+    Copy of a document as the driver would return it. Serializers mutate in place,
+    and a new dict per message is about what BSON decoding costs anyway.
+    """
+    copy = dict(document)
+    if "messages" in copy:
+        copy["messages"] = [dict(message) for message in copy["messages"]]
+    return copy
+
+
+@pytest.fixture
+def mongo():
+    """Mocked MongoDBClient installed behind get_client()"""
+    client = create_autospec(MongoDBClient, instance=True)
+    client.insert_one.side_effect = lambda collection, document: SimpleNamespace(
+        inserted_id=document.setdefault("_id", ObjectId())
+    )
+    client.update_one.return_value.matched_count = 1
+    client.update_one.return_value.modified_count = 1
+    with patch("src.integrates.mongo.client", client):
+        yield client
+
+
+@pytest.fixture
+def api(mongo):
+    from fastapi.testclient import TestClient
+    from src.app import app
+
+    # Not entered as a context manager, so the lifespan (and its Mongo ping) is skipped
+    return TestClient(app)
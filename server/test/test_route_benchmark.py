@@ -0,0 +1,88 @@
+"""
+End-to-end route benchmarks through FastAPI's TestClient with a mocked MongoDBClient,
+so the numbers include request parsing, validation, serialization and JSON encoding.
+
+    cd server && python -m pytest test -k route --benchmark-group-by=func
+"""
+
+import pytest
+
+from conftest import (
+    MESSAGE_COUNTS,
+    fresh,
+    make_chat_document,
+    make_messages,
+    make_ticket_document,
+    make_ticket_payload,
+)
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_get_chat_history(benchmark, api, mongo, message_count):
+    document = make_chat_document(message_count)
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    response = benchmark(api.get, f"/api/chat-history/{document['_id']}")
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["message_count"] == message_count
+    assert data["id"] == data["_id"] == str(document["_id"])
+    assert data["messages"][-1]["timestamp"] == document["messages"][-1][
+        "timestamp"
+    ].isoformat()
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_create_chat_history(benchmark, api, mongo, message_count):
+    payload = {
+        "title": "Hỗ trợ đổi vé",
+        "messages": make_messages(message_count, as_documents=False),
+    }
+    stored = make_chat_document(message_count)
+    mongo.find_one.side_effect = lambda collection, query: fresh(stored)
+
+    response = benchmark(api.post, "/api/chat-history/", json=payload)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_add_message(benchmark, api, mongo, message_count):
+    document = make_chat_document(message_count)
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    response = benchmark(
+        api.post,
+        f"/api/chat-history/{document['_id']}/messages",
+        json={"role": "user", "content": "Cho tôi hủy vé VX123456789"},
+    )
+
+    assert response.status_code == 200
+
+
+def test_get_ticket(benchmark, api, mongo):
+    document = make_ticket_document()
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    response = benchmark(api.get, f"/api/ticket/{document['_id']}")
+
+    assert response.status_code == 200
+
+
+def test_list_tickets(benchmark, api, mongo):
+    documents = [make_ticket_document(i) for i in range(500)]
+    mongo.find_all.side_effect = lambda collection: [fresh(d) for d in documents]
+
+    response = benchmark(api.get, "/api/ticket/")
+
+    assert len(response.json()["data"]) == 500
+
+
+def test_create_ticket(benchmark, api, mongo):
+    stored = make_ticket_document()
+    mongo.find_one.side_effect = lambda collection, query: fresh(stored)
+
+    response = benchmark(api.post, "/api/ticket/", json=make_ticket_payload())
+
+    assert response.status_code == 200
@@ -0,0 +1,69 @@
+"""
+Serializer and validator benchmarks over synthetic chats of 10 to 10,000 messages.
+
+    cd server && python -m pytest test -k serialization --benchmark-group-by=func
+"""
+
+import orjson
+import pytest
+
+from conftest import (
+    MESSAGE_COUNTS,
+    fresh,
+    make_chat_document,
+    make_messages,
+    make_ticket_document,
+    make_ticket_payload,
+)
+from src.schema.chat_history_schema import (
+    ChatHistoryCreateSchema,
+    MessageList,
+    serialize_chat_history,
+)
+from src.schema.ticket_schema import TicketCreateSchema
+from src.services.ticket_service import serialize_ticket
+
+
+def run_on_fresh(benchmark, fn, document, rounds=20):
+    # Serializers mutate their input, so every round gets an untouched copy
+    return benchmark.pedantic(
+        fn, setup=lambda: ((fresh(document),), {}), rounds=rounds, warmup_rounds=1
+    )
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_serialize_chat_history(benchmark, message_count):
+    document = make_chat_document(message_count)
+    result = run_on_fresh(benchmark, serialize_chat_history, document)
+
+    assert result["message_count"] == message_count
+    assert result["id"] == document["_id"]
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_validate_chat_history_create(benchmark, message_count):
+    payload = {
+        "title": "Hỗ trợ đổi vé",
+        "status": "active",
+        "messages": make_messages(message_count, as_documents=False),
+    }
+    chat = benchmark(ChatHistoryCreateSchema.model_validate, payload)
+    assert len(chat.messages) == message_count
+
+
+@pytest.mark.parametrize("message_count", MESSAGE_COUNTS)
+def test_validate_message_list_json(benchmark, message_count):
+    body = orjson.dumps(make_messages(message_count, as_documents=False))
+    messages = benchmark(MessageList.validate_json, body)
+    assert len(messages) == message_count
+
+
+def test_serialize_ticket(benchmark):
+    document = make_ticket_document()
+    result = run_on_fresh(benchmark, serialize_ticket, document, rounds=1000)
+    assert result["id"] == document["_id"] and "_id" not in result
+
+
+def test_validate_ticket_create(benchmark):
+    ticket = benchmark(TicketCreateSchema.model_validate, make_ticket_payload())
+    assert ticket.from_ == "Hồ Chí Minh"
@@ -0,0 +1,94 @@
+from conftest import fresh, make_chat_document, make_ticket_document, make_ticket_payload
+
+
+def test_missing_fields_return_400(api, mongo):
+    response = api.post("/api/chat-history/", json={"messages": []})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "title: Field required"
+    mongo.insert_one.assert_not_called()
+
+
+def test_invalid_message_is_reported_with_its_index(api, mongo):
+    payload = {"title": "Chat", "messages": [{"id": "m1", "role": "bot", "content": "x"}]}
+
+    detail = api.post("/api/chat-history/", json=payload).json()["detail"]
+
+    assert "messages.0.role" in detail
+    assert "messages.0.timestamp: Field required" in detail
+
+
+def test_ticket_payment_flag_must_be_boolean(api, mongo):
+    payload = {**make_ticket_payload(), "payment": {"done": "yes", "gate": "momo"}}
+
+    response = api.post("/api/ticket/", json=payload)
+
+    assert response.status_code == 400
+    assert "payment.done" in response.json()["detail"]
+
+
+def test_ticket_update_keeps_extra_fields(api, mongo):
+    document = make_ticket_document()
+    mongo.find_one.side_effect = lambda collection, query: fresh(
+        {**document, "status": "cancelled"}
+    )
+
+    response = api.put(f"/api/ticket/{document['_id']}", json={"status": "cancelled"})
+
+    assert response.status_code == 200
+    update = mongo.update_one.call_args.args[2]["$set"]
+    assert update["status"] == "cancelled"
+    data = response.json()["data"]
+    assert data["status"] == "cancelled"
+    assert data["from"] == "Hồ Chí Minh"
+    assert data["id"] == str(document["_id"])
+
+
+def test_stored_message_of_the_wrong_shape_is_an_error(api, mongo):
+    document = make_chat_document(2)
+    document["messages"][1]["role"] = "bot"
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    response = api.get(f"/api/chat-history/{document['_id']}")
+
+    assert response.status_code == 500
+    assert "1.role" in response.json()["detail"]
+
+
+def test_legacy_chat_without_timestamps_or_message_ids(api, mongo):
+    document = make_chat_document(2)
+    del document["createdAt"], document["updatedAt"]
+    del document["messages"][0]["id"]
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    response = api.get(f"/api/chat-history/{document['_id']}")
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    created_at = document["_id"].generation_time.replace(tzinfo=None).isoformat()
+    assert data["createdAt"] == data["updatedAt"] == created_at
+    assert data["messages"][0]["id"] is None
+    assert data["messages"][1]["id"] == "msg_00000001"
+
+
+def test_chat_response_keeps_both_ids(api, mongo):
+    document = make_chat_document(2)
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    data = api.get(f"/api/chat-history/{document['_id']}").json()["data"]
+
+    assert data["_id"] == data["id"] == str(document["_id"])
+    assert data["createdAt"] == document["createdAt"].isoformat()
+    assert data["message_count"] == 2
+
+
+def test_extra_stored_fields_are_not_returned(api, mongo):
+    document = make_chat_document(2)
+    document["internal_note"] = "agent escalation"
+    document["messages"][0]["tokens"] = 12
+    mongo.find_one.side_effect = lambda collection, query: fresh(document)
+
+    data = api.get(f"/api/chat-history/{document['_id']}").json()["data"]
+
+    assert "internal_note" not in data
+    assert "tokens" not in data["messages"][0]